@@ -0,0 +1,234 @@
+# activos.py
+"""
+Manifiesto de cartas y almacén de imágenes direccionado por contenido.
+
+Muchas cartas están repetidas entre proyectos (p. ej. 134.jpg en las
+Actividades de los proyectos 3 y 5, o los entregables 7-14). El almacén
+guarda cada contenido una sola vez:
+
+    .cache/activos/objetos/<hash>/<id>.jpg     (un contenido por hash, un nombre por id)
+    .cache/activos/manifiesto.json             índice compacto de TODAS las cartas
+
+El manifiesto es una lista de [proyecto, nivel, id, ruta, bytes, hash]. En
+ejecución se lee una sola vez y sustituye a los os.listdir/exists que se
+hacían al arrancar y en cada rerun.
+
+El objeto conserva "<id>.jpg" como nombre para que las funciones que sacan
+el ID del nombre del archivo sigan funcionando: si el mismo contenido es la
+carta 7 y la 12, en objetos/<hash>/ están 7.jpg y 12.jpg (enlaces al mismo
+archivo).
+
+    python activos.py                # manifiesto + objetos
+    python activos.py --sin-objetos  # solo el manifiesto
+
+Los objetos se crean como enlaces duros a imagenes/ (si se puede), así que
+no ocupan disco extra. Sin manifiesto, ruta_activo() devuelve None y
+game_logic recorre imagenes/ como siempre.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+IMG_DIR = BASE_DIR / "imagenes" / "Proyectos"
+ACTIVOS_DIR = Path(os.environ.get("BIVRA_ACTIVOS_DIR") or BASE_DIR / ".cache" / "activos")
+OBJETOS_DIR = ACTIVOS_DIR / "objetos"
+
+NIVELES = ("proyecto", "entregable", "paquete", "actividad")
+_EXTENSIONES = (".jpg", ".jpeg", ".png", ".webp")
+
+VERSION_MANIFIESTO = 2
+CAMPOS = ("proyecto", "nivel", "id", "ruta", "bytes", "hash")
+
+# Manifiesto cargado (una vez por proceso)
+_MANIFIESTO: Optional["Manifiesto"] = None
+
+
+def hash_archivo(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloque)
+    return h.hexdigest()[:16]
+
+
+def clasificar(ruta: Path) -> Optional[Tuple[int, str, int]]:
+    """
+    (proyecto, nivel, id) según dónde está la imagen dentro de imagenes/Proyectos:
+      <p>/<p>.jpg                          -> proyecto
+      <p>/Entregables/<id>.jpg             -> entregable
+      <p>/Entregables/<paquetes>/<id>.jpg  -> paquete   ("Paquete trabajo", "Paquetes trabajo"...)
+      <p>/Entregables/<paquetes>/Actividades/<id>.jpg -> actividad
+    """
+    try:
+        partes = ruta.relative_to(IMG_DIR).parts
+    except ValueError:
+        return None
+    m = re.match(r"^(\d+)\.", partes[-1])
+    if not m or not partes[0].isdigit():
+        return None
+    niveles = {2: "proyecto", 3: "entregable", 4: "paquete", 5: "actividad"}
+    nivel = niveles.get(len(partes))
+    if nivel is None:
+        return None
+    return int(partes[0]), nivel, int(m.group(1))
+
+
+def _clave(proyecto, nivel: str, cid) -> str:
+    return f"{int(proyecto)}/{nivel}/{int(cid)}"
+
+
+# ==============================
+# Construcción
+# ==============================
+
+def _guardar_objeto(origen: Path, hash_img: str, cid: int) -> Path:
+    destino = OBJETOS_DIR / hash_img / f"{cid}{origen.suffix.lower()}"
+    if destino.exists():
+        return destino
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_name(destino.name + ".tmp")
+    try:
+        os.link(origen, tmp)
+    except OSError:
+        shutil.copyfile(origen, tmp)
+    tmp.replace(destino)
+    return destino
+
+
+def construir(objetos: bool = True) -> List[list]:
+    """
+    Recorre imagenes/Proyectos y escribe el manifiesto (índice de todas las cartas).
+    Con `objetos=True` además guarda cada contenido una vez en objetos/.
+    """
+    cartas = []
+    guardados = set()
+    for raiz, _dirs, archivos in os.walk(IMG_DIR):
+        for f in sorted(archivos):
+            if not f.lower().endswith(_EXTENSIONES):
+                continue
+            origen = Path(raiz) / f
+            clave = clasificar(origen)
+            if clave is None:
+                continue
+            hash_img = hash_archivo(origen)
+            # Un nombre por (hash, id): es la ruta a la que apunta el manifiesto
+            objeto = (hash_img, clave[2], origen.suffix.lower())
+            if objetos and objeto not in guardados:
+                _guardar_objeto(origen, hash_img, clave[2])
+                guardados.add(objeto)
+            proyecto, nivel, cid = clave
+            rel = origen.relative_to(BASE_DIR).as_posix()
+            cartas.append([proyecto, nivel, cid, rel, origen.stat().st_size, hash_img])
+
+    cartas.sort(key=lambda c: (c[0], NIVELES.index(c[1]), c[2]))
+    datos = {"version": VERSION_MANIFIESTO, "objetos": objetos, "campos": list(CAMPOS), "cartas": cartas}
+
+    ACTIVOS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = ACTIVOS_DIR / "manifiesto.json.tmp"
+    tmp.write_text(json.dumps(datos, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    tmp.replace(ACTIVOS_DIR / "manifiesto.json")
+
+    global _MANIFIESTO
+    _MANIFIESTO = None
+    distintos = len({c[5] for c in cartas})
+    print(f"{len(cartas)} cartas ({distintos} imágenes distintas) -> {ACTIVOS_DIR / 'manifiesto.json'}")
+    return cartas
+
+
+# ==============================
+# Runtime
+# ==============================
+
+class Manifiesto:
+    """Manifiesto cargado en memoria con los índices que usa el juego."""
+
+    def __init__(self, cartas: List[list], objetos: bool):
+        self.cartas = cartas
+        # (proyecto, nivel, id) -> ruta absoluta (objeto o imagen original)
+        self.rutas: Dict[Tuple[int, str, int], str] = {}
+        # (proyecto, nivel) -> {id -> ruta} ordenado por id
+        self.por_nivel: Dict[Tuple[int, str], Dict[int, str]] = {}
+        # Cualquier forma de la ruta (objeto, absoluta, relativa) -> hash del contenido
+        self.hashes: Dict[str, str] = {}
+        self.proyectos: List[int] = sorted({c[0] for c in cartas})
+
+        for proyecto, nivel, cid, rel, _tam, hash_img in cartas:
+            original = str(BASE_DIR / rel)
+            ruta = str(OBJETOS_DIR / hash_img / f"{cid}{Path(rel).suffix.lower()}") if objetos else original
+            self.rutas[(proyecto, nivel, cid)] = ruta
+            self.por_nivel.setdefault((proyecto, nivel), {})[cid] = ruta
+            for forma in (ruta, original, rel):
+                self.hashes[forma] = hash_img
+
+
+def cargar_manifiesto() -> Manifiesto:
+    """Lee el manifiesto una vez por proceso (vacío si no se ha generado)."""
+    global _MANIFIESTO
+    if _MANIFIESTO is None:
+        try:
+            datos = json.loads((ACTIVOS_DIR / "manifiesto.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            datos = {}
+        if datos.get("version") != VERSION_MANIFIESTO:
+            datos = {}
+        _MANIFIESTO = Manifiesto(datos.get("cartas", []), bool(datos.get("objetos")))
+    return _MANIFIESTO
+
+
+def hay_manifiesto() -> bool:
+    return bool(cargar_manifiesto().cartas)
+
+
+def ruta_activo(proyecto, nivel: str, cid) -> Optional[str]:
+    """Ruta de la carta (proyecto, nivel, id), o None si no está en el manifiesto."""
+    try:
+        return cargar_manifiesto().rutas.get((int(proyecto), nivel, int(cid)))
+    except (TypeError, ValueError):
+        return None
+
+
+def listar(proyecto, nivel: str) -> Dict[int, str]:
+    """{id -> ruta} de un nivel de un proyecto, ordenado por id."""
+    try:
+        return dict(cargar_manifiesto().por_nivel.get((int(proyecto), nivel), {}))
+    except (TypeError, ValueError):
+        return {}
+
+
+def proyectos() -> List[int]:
+    return list(cargar_manifiesto().proyectos)
+
+
+def existe_imagen(ruta) -> bool:
+    """Como os.path.exists, pero sin tocar disco si la ruta está en el manifiesto."""
+    if not ruta:
+        return False
+    if str(ruta) in cargar_manifiesto().hashes:
+        return True
+    return os.path.exists(ruta)
+
+
+def hash_de_ruta(ruta) -> Optional[str]:
+    """Hash del contenido de `ruta`: del manifiesto o, si es un objeto, de su carpeta."""
+    hash_img = cargar_manifiesto().hashes.get(str(ruta))
+    if hash_img is not None:
+        return hash_img
+    p = Path(str(ruta))
+    try:
+        p.relative_to(OBJETOS_DIR)
+    except ValueError:
+        return None
+    return p.parent.name
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera el manifiesto de cartas (y el almacén de objetos)")
+    parser.add_argument("--sin-objetos", action="store_true", help="Solo el índice, sin copiar/enlazar imágenes")
+    args = parser.parse_args()
+    construir(objetos=not args.sin_objetos)
@@ -0,0 +1,708 @@
+# almacen.py
+"""
+Almacenes de partidas.
+
+- AlmacenJSON:   un JSON por partida + diario + .lock (formato de siempre)
+- AlmacenSQLite: una sola base de datos SQLite en modo WAL
+
+Se elige con la variable de entorno BIVRA_ALMACEN ("json" por defecto o
+"sqlite"); la ruta de la base de datos se puede cambiar con BIVRA_SQLITE y
+la carpeta de partidas con BIVRA_PARTIDAS_DIR.
+
+Las lecturas pasan por CacheLecturas: si la partida no ha cambiado (stat()
+del archivo o versión en SQLite) se devuelve el estado ya parseado, de solo
+lectura (ver inmutable.py). Tamaño máximo con BIVRA_CACHE_PARTIDAS.
+
+Con BIVRA_REGISTRO=1 (lo activa servidor.py) en vez de la cache se usa
+RegistroPartidas: las partidas vivas se quedan en memoria, compartidas por
+todas las sesiones del proceso, y se escriben en el almacén cada
+BIVRA_VOLCADO_S segundos (escritura diferida; ver su docstring para qué se
+puede perder si el proceso muere).
+
+Con BIVRA_SERVIDOR=http://... las partidas están en el servidor de partidas
+(servidor.py) y el "almacén" es su cliente (cliente.ClientePartidas).
+
+Control de concurrencia optimista: cada guardado incrementa estado["version"].
+Si el estado que se guarda trae "version" y no coincide con la guardada,
+se lanza PartidaDesactualizada en vez de pisar la jugada del otro equipo.
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import diario
+import metricas
+from inmutable import congelar
+
+PARTIDAS_DIR = Path(os.environ.get("BIVRA_PARTIDAS_DIR") or Path(__file__).resolve().parent / "partidas")
+
+
+class PartidaDesactualizada(Exception):
+    """El estado se leyó antes de que otro equipo guardara una jugada."""
+
+    def __init__(self, codigo: str, esperada: int, actual: int):
+        super().__init__(f"Partida {codigo}: versión {esperada} desactualizada (actual {actual})")
+        self.codigo = codigo
+        self.esperada = esperada
+        self.actual = actual
+
+
+def normalizar_codigo(codigo: str) -> str:
+    return codigo.strip().upper()
+
+
+def _con_version(estado: Dict[str, Any], version: int) -> Dict[str, Any]:
+    datos = dict(estado)
+    datos["version"] = version
+    return datos
+
+
+# ==============================
+# Interfaz
+# ==============================
+
+class AlmacenPartidas:
+    """Interfaz común de los almacenes de partidas."""
+
+    def cargar(self, codigo: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def guardar(self, codigo: str, estado: Dict[str, Any]) -> int:
+        """
+        Guarda y devuelve la nueva versión.
+        Lanza PartidaDesactualizada si estado["version"] no es la guardada.
+        """
+        raise NotImplementedError
+
+    def volcar(self, codigo: str, estado: Dict[str, Any], esperada: Optional[int]) -> int:
+        """
+        Escribe `estado` conservando su "version" (la asignó RegistroPartidas).
+        Lanza PartidaDesactualizada si `esperada` no es None y no es la guardada.
+        """
+        raise NotImplementedError
+
+    def existe(self, codigo: str) -> bool:
+        raise NotImplementedError
+
+    def token(self, codigo: str) -> Any:
+        """Valor barato que cambia cada vez que cambia la partida (para la cache)."""
+        raise NotImplementedError
+
+    def crear_si_no_existe(self, codigo: str, estado_inicial: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Carga la partida o la crea con `estado_inicial()` (sin pisar una existente)."""
+        raise NotImplementedError
+
+    def codigos(self) -> List[str]:
+        """Códigos de todas las partidas guardadas."""
+        raise NotImplementedError
+
+
+# ==============================
+# JSON (un archivo por partida)
+# ==============================
+
+class AlmacenJSON(AlmacenPartidas):
+    def __init__(self, directorio: Path = PARTIDAS_DIR):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(exist_ok=True)
+
+    def _path_partida(self, codigo: str) -> Path:
+        return self.directorio / f"{normalizar_codigo(codigo)}.json"
+
+    def _path_diario(self, codigo: str) -> Path:
+        return self.directorio / f"{normalizar_codigo(codigo)}.diario.jsonl"
+
+    def _path_lock(self, codigo: str) -> Path:
+        return self.directorio / f"{normalizar_codigo(codigo)}.lock"
+
+    def codigos(self) -> List[str]:
+        return sorted(p.stem for p in self.directorio.glob("*.json"))
+
+    @contextmanager
+    def _bloqueo(self, codigo: str):
+        """Lock exclusivo del sistema (flock); bloquea hasta obtenerlo y se suelta solo si el proceso muere."""
+        with open(self._path_lock(codigo), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK se rinde tras ~10 s
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _guardar_con_version(
+        self, codigo: str, estado: Dict[str, Any], esperada: Optional[int], nueva: Optional[int] = None
+    ) -> int:
+        """Compara versión y escribe (con `nueva` o la siguiente). Hay que tener el lock."""
+        path_snap, path_diario = self._path_partida(codigo), self._path_diario(codigo)
+        anterior = diario.leer_ultimo(path_snap, path_diario)
+        actual = int(anterior.get("version", 0)) if anterior is not None else 0
+        if esperada is not None and int(esperada) != actual:
+            raise PartidaDesactualizada(normalizar_codigo(codigo), int(esperada), actual)
+        nueva = actual + 1 if nueva is None else nueva
+        diario.guardar(path_snap, path_diario, _con_version(estado, nueva))
+        return nueva
+
+    def cargar(self, codigo: str) -> Optional[Dict[str, Any]]:
+        try:
+            # Última instantánea + acciones del diario posteriores
+            return diario.cargar(self._path_partida(codigo), self._path_diario(codigo))
+        except Exception:
+            return None
+
+    def guardar(self, codigo: str, estado: Dict[str, Any]) -> int:
+        with self._bloqueo(codigo):
+            # Solo se añade la diferencia al diario (compacta cada cierto tiempo)
+            return self._guardar_con_version(codigo, estado, estado.get("version"))
+
+    def volcar(self, codigo: str, estado: Dict[str, Any], esperada: Optional[int]) -> int:
+        with self._bloqueo(codigo):
+            return self._guardar_con_version(codigo, estado, esperada, int(estado["version"]))
+
+    def existe(self, codigo: str) -> bool:
+        return self._path_partida(codigo).exists()
+
+    def token(self, codigo: str) -> Any:
+        # mtime/tamaño de instantánea y diario (solo stat, sin leer)
+        return diario.token(self._path_partida(codigo), self._path_diario(codigo))
+
+    def crear_si_no_existe(self, codigo: str, estado_inicial: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        with self._bloqueo(codigo):
+            estado = self.cargar(codigo)
+            if estado is None:
+                estado = estado_inicial()
+                estado["version"] = self._guardar_con_version(codigo, estado, None)
+            return estado
+
+
+# ==============================
+# SQLite (WAL)
+# ==============================
+
+class AlmacenSQLite(AlmacenPartidas):
+    """
+    Todas las partidas en una tabla indexada por código (PRIMARY KEY).
+    Cada hilo usa su propia conexión (Streamlit ejecuta cada sesión en un hilo).
+    """
+
+    def __init__(self, ruta_db: Path):
+        self.ruta_db = Path(ruta_db)
+        self.ruta_db.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._conexion()
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS partidas (
+                    codigo      TEXT PRIMARY KEY,
+                    estado      TEXT NOT NULL,
+                    version     INTEGER NOT NULL DEFAULT 0,
+                    actualizado REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(partidas)")}
+            if "version" not in columnas:
+                conn.execute("ALTER TABLE partidas ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _conexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None -> las transacciones se abren a mano (BEGIN IMMEDIATE)
+            conn = sqlite3.connect(str(self.ruta_db), timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def cargar(self, codigo: str) -> Optional[Dict[str, Any]]:
+        fila = self._conexion().execute(
+            "SELECT estado FROM partidas WHERE codigo = ?",
+            (normalizar_codigo(codigo),),
+        ).fetchone()
+        metricas.sumar("sqlite.lecturas")
+        if fila is None:
+            return None
+        metricas.sumar("sqlite.bytes_leidos", len(fila[0]))
+        try:
+            return json.loads(fila[0])
+        except Exception:
+            return None
+
+    def guardar(self, codigo: str, estado: Dict[str, Any]) -> int:
+        return self._escribir(codigo, estado, estado.get("version"))
+
+    def volcar(self, codigo: str, estado: Dict[str, Any], esperada: Optional[int]) -> int:
+        return self._escribir(codigo, estado, esperada, int(estado["version"]))
+
+    def _escribir(self, codigo: str, estado: Dict[str, Any], esperada: Optional[int], nueva: Optional[int] = None) -> int:
+        codigo = normalizar_codigo(codigo)
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fila = conn.execute("SELECT version FROM partidas WHERE codigo = ?", (codigo,)).fetchone()
+            actual = fila[0] if fila is not None else 0
+            if esperada is not None and int(esperada) != actual:
+                raise PartidaDesactualizada(codigo, int(esperada), actual)
+
+            nueva = actual + 1 if nueva is None else nueva
+            datos = json.dumps(_con_version(estado, nueva), ensure_ascii=False, separators=(",", ":"))
+            conn.execute(
+                """
+                INSERT INTO partidas (codigo, estado, version, actualizado) VALUES (?, ?, ?, ?)
+                ON CONFLICT(codigo) DO UPDATE SET
+                    estado = excluded.estado,
+                    version = excluded.version,
+                    actualizado = excluded.actualizado
+                """,
+                (codigo, datos, nueva, time.time()),
+            )
+            conn.execute("COMMIT")
+            metricas.sumar("sqlite.escrituras")
+            metricas.sumar("sqlite.bytes_escritos", len(datos))
+            return nueva
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def existe(self, codigo: str) -> bool:
+        fila = self._conexion().execute(
+            "SELECT 1 FROM partidas WHERE codigo = ?",
+            (normalizar_codigo(codigo),),
+        ).fetchone()
+        return fila is not None
+
+    def token(self, codigo: str) -> Any:
+        fila = self._conexion().execute(
+            "SELECT version FROM partidas WHERE codigo = ?",
+            (normalizar_codigo(codigo),),
+        ).fetchone()
+        return None if fila is None else fila[0]
+
+    def codigos(self) -> List[str]:
+        return [f[0] for f in self._conexion().execute("SELECT codigo FROM partidas ORDER BY codigo")]
+
+    def crear_si_no_existe(self, codigo: str, estado_inicial: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        codigo = normalizar_codigo(codigo)
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fila = conn.execute("SELECT estado FROM partidas WHERE codigo = ?", (codigo,)).fetchone()
+            if fila is not None:
+                conn.execute("COMMIT")
+                return json.loads(fila[0])
+
+            estado = _con_version(estado_inicial(), 1)
+            conn.execute(
+                "INSERT INTO partidas (codigo, estado, version, actualizado) VALUES (?, ?, 1, ?)",
+                (codigo, json.dumps(estado, ensure_ascii=False, separators=(",", ":")), time.time()),
+            )
+            conn.execute("COMMIT")
+            return estado
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+# ==============================
+# Cache de lecturas (LRU)
+# ==============================
+
+class CacheLecturas(AlmacenPartidas):
+    """
+    Envuelve otro almacén. `cargar` revalida con `token()` y, si la partida no
+    ha cambiado, devuelve el mismo estado parseado (de solo lectura) sin leer
+    ni parsear de nuevo. Guarda como mucho `maximo` partidas (LRU).
+    """
+
+    def __init__(self, almacen: AlmacenPartidas, maximo: int = 256):
+        self.almacen = almacen
+        self.maximo = maximo
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cargar(self, codigo: str) -> Optional[Dict[str, Any]]:
+        codigo = normalizar_codigo(codigo)
+        # El token se mira ANTES de leer: si cambia mientras leemos, la próxima vez se relee
+        token = self.almacen.token(codigo)
+        with self._lock:
+            entrada = self._entradas.get(codigo)
+            if entrada is not None and entrada[0] == token:
+                self._entradas.move_to_end(codigo)
+                return entrada[1]
+
+        estado = self.almacen.cargar(codigo)
+        if estado is None:
+            with self._lock:
+                self._entradas.pop(codigo, None)
+            return None
+
+        estado = congelar(estado)
+        with self._lock:
+            self._entradas[codigo] = (token, estado)
+            self._entradas.move_to_end(codigo)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        return estado
+
+    def guardar(self, codigo: str, estado: Dict[str, Any]) -> int:
+        return self.almacen.guardar(codigo, estado)
+
+    def volcar(self, codigo: str, estado: Dict[str, Any], esperada: Optional[int]) -> int:
+        return self.almacen.volcar(codigo, estado, esperada)
+
+    def existe(self, codigo: str) -> bool:
+        return self.almacen.existe(codigo)
+
+    def token(self, codigo: str) -> Any:
+        return self.almacen.token(codigo)
+
+    def codigos(self) -> List[str]:
+        return self.almacen.codigos()
+
+    def crear_si_no_existe(self, codigo: str, estado_inicial: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        return self.almacen.crear_si_no_existe(codigo, estado_inicial)
+
+
+# ==============================
+# Registro en memoria (escritura diferida)
+# ==============================
+
+class _Viva:
+    """Una partida del registro: último estado, su versión y la que hay en el almacén (y su token)."""
+
+    __slots__ = ("lock", "estado", "version", "guardada", "token", "activa")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.estado: Optional[Dict[str, Any]] = None   # None: aún no se ha cargado
+        self.version = 0
+        self.guardada = 0
+        self.token: Any = None
+        self.activa = True                              # False: ya no está en el registro
+
+    @property
+    def pendiente(self) -> bool:
+        return self.estado is not None and self.version != self.guardada
+
+
+class RegistroPartidas(AlmacenPartidas):
+    """
+    Partidas vivas en memoria, compartidas por todas las sesiones del proceso.
+
+    Cada partida se lee y parsea del almacén una sola vez; después `cargar`
+    devuelve el último estado (de solo lectura) y `guardar` hace el
+    compare-and-swap de versión en memoria con el lock de esa partida, sin
+    tocar disco. Un hilo vuelca cada `volcado_s` segundos las partidas con
+    cambios, solo su último estado: varias jugadas entre dos volcados son una
+    sola escritura. Con volcado_s <= 0 se escribe en cada guardado, con
+    compare-and-swap contra el almacén (igual de seguro que sin registro).
+
+    Durabilidad:
+      - cierre normal del proceso (Ctrl+C, SIGTERM a Streamlit, fin del
+        intérprete): atexit vuelca todo lo pendiente, no se pierde nada;
+      - el proceso muere de golpe (kill -9, OOM, corte de luz): se pierden las
+        jugadas de como mucho los últimos `volcado_s` segundos. Lo que hay en
+        el almacén es siempre un estado completo de antes (el diario y SQLite
+        escriben de forma atómica), nunca una partida a medias;
+      - las partidas que terminan (estado["finalizado"]) se escriben al
+        momento, igual que las que se crean;
+      - si falla un volcado (disco lleno...), la partida sigue pendiente y se
+        reintenta en el siguiente.
+
+    Otros procesos que escriban las mismas partidas:
+      - antes de la primera jugada sin volcar se mira el token del almacén;
+        si otro proceso ha guardado, se relee la partida y la jugada falla con
+        PartidaDesactualizada (actualizar_partida la repite sobre lo nuevo);
+      - si otro proceso guarda mientras hay jugadas sin volcar, el volcado
+        falla el compare-and-swap: gana lo guardado en el almacén y las
+        jugadas del registro se descartan (error en el log y
+        registro.conflictos). Nunca se pisa lo que escribió el otro.
+    Por eso es opcional (BIVRA_REGISTRO=1): pensado para un solo proceso dueño
+    de las partidas (servidor.py); con varios procesos, volcado_s=0.
+    """
+
+    def __init__(self, almacen: AlmacenPartidas, volcado_s: float = 2.0, maximo: int = 256):
+        self.almacen = almacen
+        self.volcado_s = volcado_s
+        self.maximo = maximo
+        self._vivas: "OrderedDict[str, _Viva]" = OrderedDict()
+        self._pendientes = set()
+        self._lock = threading.Lock()
+        # Un volcado a la vez (hilo de fondo, volcar() explícito, atexit)
+        self._volcando = threading.Lock()
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        atexit.register(self.cerrar)
+
+    # ------------------------------
+    # Partidas en memoria
+    # ------------------------------
+
+    @contextmanager
+    def _viva(self, codigo: str):
+        """La partida en memoria (cargándola si hace falta) con su lock cogido, o None si no existe."""
+        while True:
+            with self._lock:
+                viva = self._vivas.get(codigo)
+                if viva is None:
+                    viva = self._vivas[codigo] = _Viva()
+                    self._expulsar()
+                else:
+                    self._vivas.move_to_end(codigo)
+
+            with viva.lock:
+                if not viva.activa:
+                    continue  # la expulsaron mientras esperábamos el lock
+                if viva.estado is None:
+                    # Solo una sesión lee del almacén; las demás esperan el lock
+                    self._recargar(codigo, viva)
+                    if viva.estado is None:
+                        yield None
+                        return
+                yield viva
+                return
+
+    def _recargar(self, codigo: str, viva: _Viva) -> None:
+        """Lee la partida del almacén (descartando lo no volcado). Hay que tener viva.lock."""
+        if viva.pendiente:
+            logging.getLogger(__name__).error(
+                "Partida %s guardada por otro proceso: se descartan las versiones %s-%s no volcadas",
+                codigo, viva.guardada + 1, viva.version,
+            )
+            metricas.sumar("registro.conflictos")
+        # El token se mira ANTES de leer: si cambia mientras leemos, se detecta en el siguiente guardado
+        viva.token = self.almacen.token(codigo)
+        estado = self.almacen.cargar(codigo)
+        metricas.sumar("registro.cargas")
+        if estado is None:
+            viva.estado = None
+            self._quitar(codigo, viva)
+            return
+        viva.estado = congelar(estado)
+        viva.version = viva.guardada = int(estado.get("version", 0))
+
+    def _quitar(self, codigo: str, viva: _Viva) -> None:
+        with self._lock:
+            if self._vivas.get(codigo) is viva:
+                del self._vivas[codigo]
+        viva.activa = False
+
+    def _expulsar(self) -> None:
+        """Quita las partidas menos usadas sin cambios pendientes. Hay que tener self._lock."""
+        for codigo in list(self._vivas):
+            if len(self._vivas) <= self.maximo:
+                return
+            viva = self._vivas[codigo]
+            if viva.estado is None or not viva.lock.acquire(blocking=False):
+                continue  # cargándose o en uso
+            try:
+                if not viva.pendiente:
+                    del self._vivas[codigo]
+                    viva.activa = False
+            finally:
+                viva.lock.release()
+
+    # ------------------------------
+    # Interfaz de almacén
+    # ------------------------------
+
+    def cargar(self, codigo: str) -> Optional[Dict[str, Any]]:
+        with self._viva(normalizar_codigo(codigo)) as viva:
+            return None if viva is None else viva.estado
+
+    def guardar(self, codigo: str, estado: Dict[str, Any]) -> int:
+        codigo = normalizar_codigo(codigo)
+        esperada = estado.get("version")
+        inmediato = self.volcado_s <= 0 or bool(estado.get("finalizado"))
+        with self._viva(codigo) as viva:
+            if viva is not None and not viva.pendiente and self.almacen.token(codigo) != viva.token:
+                # Otro proceso ha guardado: se relee y el compare-and-swap de abajo decide
+                self._recargar(codigo, viva)
+            if viva is None or viva.estado is None:
+                # Partida nueva: se escribe directamente en el almacén
+                return self.almacen.guardar(codigo, estado)
+            if esperada is not None and int(esperada) != viva.version:
+                raise PartidaDesactualizada(codigo, int(esperada), viva.version)
+
+            nuevo = congelar(_con_version(estado, viva.version + 1))
+            if inmediato:
+                try:
+                    self.almacen.volcar(codigo, nuevo, viva.guardada)
+                except PartidaDesactualizada:
+                    self._recargar(codigo, viva)
+                    raise PartidaDesactualizada(codigo, nuevo["version"] - 1, viva.version)
+                viva.guardada = nuevo["version"]
+                viva.token = self.almacen.token(codigo)
+                metricas.sumar("registro.escrituras")
+            viva.version = nuevo["version"]
+            viva.estado = nuevo
+            metricas.sumar("registro.guardados")
+            pendiente = viva.pendiente
+
+        with self._lock:
+            if pendiente:
+                self._pendientes.add(codigo)
+            else:
+                self._pendientes.discard(codigo)
+        if pendiente:
+            self._arrancar()
+        return nuevo["version"]
+
+    def volcar(self, codigo: str, estado: Dict[str, Any], esperada: Optional[int]) -> int:
+        return self.almacen.volcar(codigo, estado, esperada)
+
+    def existe(self, codigo: str) -> bool:
+        with self._lock:
+            viva = self._vivas.get(normalizar_codigo(codigo))
+            if viva is not None and viva.estado is not None:
+                return True
+        return self.almacen.existe(codigo)
+
+    def token(self, codigo: str) -> Any:
+        # La versión en memoria: cambia en cuanto se guarda, sin esperar al volcado
+        with self._viva(normalizar_codigo(codigo)) as viva:
+            return None if viva is None else viva.version
+
+    def codigos(self) -> List[str]:
+        with self._lock:
+            pendientes = set(self._pendientes)
+        return sorted(set(self.almacen.codigos()) | pendientes)
+
+    def crear_si_no_existe(self, codigo: str, estado_inicial: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        codigo = normalizar_codigo(codigo)
+        estado = self.cargar(codigo)
+        if estado is not None:
+            return estado
+        self.almacen.crear_si_no_existe(codigo, estado_inicial)
+        return self.cargar(codigo)
+
+    # ------------------------------
+    # Volcado
+    # ------------------------------
+
+    def _arrancar(self) -> None:
+        with self._lock:
+            if self._hilo is None and not self._parar.is_set():
+                self._hilo = threading.Thread(target=self._bucle, name="bivra-registro", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        while not self._parar.wait(self.volcado_s):
+            self.volcar_pendientes()
+
+    def _volcar_una(self, codigo: str) -> bool:
+        """Escribe el último estado de la partida si tiene cambios. True si lo ha escrito."""
+        with self._volcando:
+            with self._lock:
+                viva = self._vivas.get(codigo)
+            if viva is None:
+                return False
+            with viva.lock:
+                if not viva.pendiente:
+                    with self._lock:
+                        self._pendientes.discard(codigo)
+                    return False
+                estado, version, guardada = viva.estado, viva.version, viva.guardada
+
+            try:
+                self.almacen.volcar(codigo, estado, guardada)
+            except PartidaDesactualizada:
+                # Otro proceso ha guardado encima: gana el almacén (no se pisa su jugada)
+                with viva.lock:
+                    self._recargar(codigo, viva)
+                with self._lock:
+                    self._pendientes.discard(codigo)
+                return False
+            except Exception:
+                # Sigue pendiente: se reintenta en el siguiente volcado
+                logging.getLogger(__name__).exception("No se ha podido volcar la partida %s", codigo)
+                metricas.sumar("registro.errores_volcado")
+                return False
+            metricas.sumar("registro.escrituras")
+
+            with viva.lock:
+                viva.guardada = version
+                viva.token = self.almacen.token(codigo)
+                if not viva.pendiente:
+                    with self._lock:
+                        self._pendientes.discard(codigo)
+            return True
+
+    def volcar_pendientes(self) -> int:
+        """Escribe ya todas las partidas con cambios. Devuelve cuántas ha escrito."""
+        with self._lock:
+            codigos = sorted(self._pendientes)
+        return sum(self._volcar_una(codigo) for codigo in codigos)
+
+    def pendientes(self) -> List[str]:
+        with self._lock:
+            return sorted(self._pendientes)
+
+    def cerrar(self) -> None:
+        """Para el hilo de volcado y escribe lo pendiente (se llama también al salir)."""
+        self._parar.set()
+        self.volcar_pendientes()
+
+
+# ==============================
+# Selección del almacén
+# ==============================
+
+_ALMACEN: Optional[AlmacenPartidas] = None
+_ALMACEN_LOCK = threading.Lock()
+
+
+def crear_almacen(tipo: Optional[str] = None) -> AlmacenPartidas:
+    tipo = (tipo or os.environ.get("BIVRA_ALMACEN", "json")).strip().lower()
+    if tipo == "sqlite":
+        ruta = os.environ.get("BIVRA_SQLITE") or str(PARTIDAS_DIR / "partidas.db")
+        return AlmacenSQLite(Path(ruta))
+    if tipo == "json":
+        return AlmacenJSON(PARTIDAS_DIR)
+    raise ValueError(f"BIVRA_ALMACEN desconocido: {tipo}")
+
+
+def obtener_almacen() -> AlmacenPartidas:
+    """Almacén del proceso (se crea la primera vez que se usa)."""
+    global _ALMACEN
+    with _ALMACEN_LOCK:
+        if _ALMACEN is None:
+            maximo = int(os.environ.get("BIVRA_CACHE_PARTIDAS", "256"))
+            if os.environ.get("BIVRA_SERVIDOR"):
+                # Importado aquí: cliente.py depende de este módulo
+                from cliente import ClientePartidas
+
+                _ALMACEN = ClientePartidas(os.environ["BIVRA_SERVIDOR"])
+            elif os.environ.get("BIVRA_REGISTRO", "0") == "1":
+                volcado_s = float(os.environ.get("BIVRA_VOLCADO_S", "2.0"))
+                _ALMACEN = RegistroPartidas(crear_almacen(), volcado_s=volcado_s, maximo=maximo)
+            else:
+                _ALMACEN = CacheLecturas(crear_almacen(), maximo=maximo)
+        return _ALMACEN
@@ -1,36 +1,38 @@
-import os
+import time
 
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 
 from game_logic import (
     cargar_estructura_proyecto,
     generar_diccionario_agrupaciones,
-    inicializar_juego,
-    siguiente_ronda,
     extraer_id,
     listar_proyectos_imagenes,
-    catalogo_actividades_proyecto,
     FUSIONES_PAQUETES,
-
-    ejecutar_fusion_con_seleccion,
-    ejecutar_entregable,
-    ejecutar_proyecto,
-    ejecutar_entregable_con_seleccion,
-    ejecutar_proyecto_con_seleccion,
-
+    REGLAS,
+    ZONAS_EQUIPO,
 
     entregables_disponibles,
     proyectos_disponibles,
     proyecto_asignado,
     ruta_paquete,
-    _extraer_id_carta,
-    _normalizar_fusiones,
+    ruta_carta,
+    normalizar_estado,
+    ESQUEMA,
 
     cargar_partida,
-    guardar_partida,
+    actualizar_partida,
     crear_partida_si_no_existe,
     existe_partida,
 )
+from notificaciones import INTERVALO_S, obtener_vigilante
+from estaticos import ACTIVO as ESTATICOS_ACTIVOS, fuente_imagen, url_carta
+from catalogo import indice_proyecto
+from activos import existe_imagen
+from deshacer import linea_temporal
+from motor import CrearEntregable, CrearProyecto, Deshacer, Fusionar, Motor, Rehacer, Reiniciar, SiguienteRonda
+import metricas
+from metricas import medido, tramo
 
 
 st.set_page_config(
@@ -40,17 +42,16 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# Métricas de esta sesión (además de las del proceso): ver panel "Rendimiento (debug)"
+if "metricas" not in st.session_state:
+    st.session_state.metricas = metricas.Metricas()
+metricas.activar(st.session_state.metricas)
+inicio_rerun = time.perf_counter()
+
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
 
-def abs_path(ruta_relativa: str) -> str:
-    p = Path(ruta_relativa)
-    if p.is_absolute():
-        return str(p)
-    return str((BASE_DIR / p).resolve())
-
-
 def mostrar_fin_partida(estado: dict):
     if estado.get("finalizado", False):
         ganador = estado.get("ganador", "?")
@@ -106,10 +107,45 @@ with st.sidebar:
             st.success(f"Unido a {codigo} como equipo {equipo}.")
             st.rerun()
 
-    # -------------------------------------------------------
-    # CATÁLOGO (OPCIÓN B): selector de proyecto + cartas + fusiones
-    # -------------------------------------------------------
-    st.divider()
+# -------------------------------------------------------
+# CATÁLOGO (OPCIÓN B): selector de proyecto + cartas + fusiones
+# Fragmento: cambiar de proyecto o filtrar solo repinta el catálogo
+# -------------------------------------------------------
+# Cartas por página del catálogo (solo se pintan las de la página)
+CARTAS_POR_PAGINA = 24
+
+
+def pintar_rejilla(indice, ids, columnas=3):
+    """
+    Cartas `ids` del índice en una rejilla. Con URLs estáticas (BIVRA_ESTATICOS=1)
+    es HTML con <img loading="lazy">: el navegador solo descarga las visibles.
+    """
+    rutas = [indice.ruta(cid) for cid in ids]
+    urls = [url_carta(ruta, 160) if ESTATICOS_ACTIVOS and ruta else None for ruta in rutas]
+    if urls and all(urls):
+        celdas = "".join(
+            f'<figure style="margin:0;text-align:center"><img src="{url}" loading="lazy" '
+            f'style="width:100%"><figcaption>{cid}</figcaption></figure>'
+            for cid, url in zip(ids, urls)
+        )
+        st.markdown(
+            f'<div style="display:grid;grid-template-columns:repeat({columnas},1fr);gap:.5rem">{celdas}</div>',
+            unsafe_allow_html=True,
+        )
+        return
+
+    cols = st.columns(columnas)
+    for idx, (cid, ruta) in enumerate(zip(ids, rutas)):
+        with cols[idx % columnas]:
+            if ruta and existe_imagen(ruta):
+                st.image(fuente_imagen(ruta, 160), caption=str(cid), use_container_width=True)
+            else:
+                st.write(str(cid))
+
+
+@st.fragment
+@medido("fragmento.catalogo")
+def catalogo_cartas():
     ver_catalogo = st.toggle("🗂️ Catálogo de cartas", value=False, key="toggle_catalogo")
 
     if ver_catalogo:
@@ -120,30 +156,27 @@ with st.sidebar:
             else:
                 proyecto_sel = st.selectbox("Proyecto", proyectos, key="cat_proyecto")
 
-                filtro = st.text_input(
-                    "Filtrar por número (opcional)",
+                consulta = st.text_input(
+                    "Buscar (número, prefijo o rango)",
                     "",
                     key="cat_filtro",
-                    placeholder="Ej: 79",
+                    placeholder="Ej: 79 o 10-50",
                 ).strip()
 
-                catalogo = catalogo_actividades_proyecto(proyecto_sel)  # {id:int -> ruta:str}
-                ids = list(catalogo.keys())
-
-                if filtro:
-                    ids = [i for i in ids if filtro in str(i)]
-
-                st.caption(f"{len(ids)} cartas")
-
-                # Grid 3 columnas (sidebar)
-                cols = st.columns(3)
-                for idx, cid in enumerate(ids):
-                    with cols[idx % 3]:
-                        ruta = catalogo.get(cid)
-                        if ruta and os.path.exists(ruta):
-                            st.image(ruta, caption=str(cid), use_container_width=True)
-                        else:
-                            st.write(str(cid))
+                # Índice cacheado por proyecto: buscar y paginar no recorre todas las cartas
+                indice = indice_proyecto(proyecto_sel)
+                busqueda = indice.buscar(consulta)
+                paginas = busqueda.paginas(CARTAS_POR_PAGINA)
+                pagina = 1
+                if paginas > 1:
+                    # Clave por búsqueda: al cambiarla se vuelve a la página 1
+                    pagina = st.number_input(
+                        "Página", min_value=1, max_value=paginas, value=1,
+                        key=f"cat_pagina_{proyecto_sel}_{consulta}",
+                    )
+
+                st.caption(f"{busqueda.total} cartas · página {pagina} de {paginas}")
+                pintar_rejilla(indice, busqueda.pagina(int(pagina), CARTAS_POR_PAGINA))
 
         with st.expander("🧩 Fusiones → Paquetes", expanded=False):
             # Si no hay fusiones cargadas (fusiones.py no disponible), avisa
@@ -163,23 +196,16 @@ with st.sidebar:
 
                 st.write(f"Requiere: {', '.join(map(str, req_ids)) if req_ids else '(sin datos)'}")
 
-                # Mostrar las 4 cartas si el catálogo está cargado
-                # Si el usuario no abrió el expander anterior, volvemos a cargar el catálogo
-                if "cat_proyecto" in st.session_state:
-                    proyecto_sel = st.session_state["cat_proyecto"]
-                    catalogo = catalogo_actividades_proyecto(proyecto_sel)
-                else:
-                    catalogo = {}
-
-                if req_ids:
-                    cols2 = st.columns(min(4, len(req_ids)))
-                    for j, rid in enumerate(req_ids):
-                        with cols2[j % len(cols2)]:
-                            ruta = catalogo.get(int(rid))
-                            if ruta and os.path.exists(ruta):
-                                st.image(ruta, caption=str(rid), use_container_width=True)
-                            else:
-                                st.write(str(rid))
+                # Mostrar las 4 cartas con el índice del proyecto elegido arriba (ya cacheado)
+                if req_ids and "cat_proyecto" in st.session_state:
+                    pintar_rejilla(indice_proyecto(st.session_state["cat_proyecto"]), req_ids, columnas=4)
+                elif req_ids:
+                    st.caption("Elige un proyecto en el catálogo para ver las cartas.")
+
+
+with st.sidebar:
+    st.divider()
+    catalogo_cartas()
 
 # ---------------------------------
 # SI NO HAY CÓDIGO, PARAMOS AQUÍ (PERO LA SIDEBAR YA EXISTE)
@@ -193,10 +219,116 @@ CODIGO = st.session_state.codigo
 # ---------------------------------
 # CARGA ESTADO PARTIDA
 # ---------------------------------
+vigilante = obtener_vigilante()
+# Token ANTES de leer: si el otro equipo guarda mientras pintamos, habrá otro rerun
+st.session_state.token_visto = vigilante.actualizar(CODIGO)
+
 estado = cargar_partida(CODIGO)
 if estado is None:
     estado = crear_partida_si_no_existe(CODIGO)
 
+# Partida guardada con rutas (esquema antiguo): se pasa a IDs una vez, para todos
+if estado.get("esquema") != ESQUEMA:
+    estado, _, _ = actualizar_partida(
+        CODIGO, lambda e: (normalizar_estado(dict(e)), True, ""), con_deshacer=False
+    )
+
+
+# ---------------------------------
+# INVALIDACIÓN DE ZONAS
+# ---------------------------------
+# La página son fragmentos que se repintan por separado:
+#   - columna de cada equipo: sus jugadas solo repintan esa columna,
+#   - catálogo (sidebar): sus widgets solo repintan el catálogo,
+#   - jugadas (sidebar): la pinta el fragmento que vigila la partida (sin leerla
+#     si no ha cambiado),
+#   - barra de acciones: ronda y reinicio cambian todo -> página entera.
+# Cada zona apunta la firma de lo que ha pintado; si la partida cambia en disco
+# y alguna firma ya no coincide, se repinta la página entera.
+def firmas(estado):
+    """Lo que pinta cada zona: partida (ronda, fin) y, por equipo, sus zonas y su proyecto."""
+    res = {"partida": (estado.get("ronda"), estado.get("finalizado"), estado.get("ganador"))}
+    for eq in ("1", "2"):
+        res[eq] = (estado.get("proyectos_asignados", {}).get(eq),) + tuple(
+            tuple(estado.get(zona, {}).get(eq, ())) for zona in ZONAS_EQUIPO
+        )
+    return res
+
+
+def pintado(zona, estado):
+    st.session_state.setdefault("firmas_pintadas", {})[zona] = firmas(estado)[zona]
+
+
+def repintar_tras_jugada(res):
+    """Tras una jugada de un equipo: solo su columna, salvo que termine la partida."""
+    if res.estado is not None and res.estado.get("finalizado", False):
+        st.rerun()
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # La jugada llegó en un rerun de la página entera, no del fragmento
+        st.rerun()
+
+
+pintado("partida", estado)
+
+
+# ---------------------------------
+# DESHACER / REHACER (para todos; también con la partida finalizada)
+# ---------------------------------
+@medido("panel.jugadas")
+def panel_jugadas(hechas, deshechas):
+    st.subheader("↩️ Jugadas")
+    if not hechas and not deshechas:
+        st.caption("Todavía no hay jugadas que deshacer.")
+        return
+    maximo = max(len(hechas), len(deshechas), 1)
+    pasos = st.number_input("Jugadas", min_value=1, max_value=maximo, value=1, key="pasos_deshacer")
+    col_d, col_r = st.columns(2)
+    if col_d.button(f"↶ Deshacer ({len(hechas)})", disabled=not hechas, key="btn_deshacer"):
+        res = Motor(codigo=CODIGO, crear=False).aplicar(Deshacer(int(pasos)))
+        if res.ok:
+            st.rerun()
+        st.warning(res.msg)
+    if col_r.button(f"↷ Rehacer ({len(deshechas)})", disabled=not deshechas, key="btn_rehacer"):
+        res = Motor(codigo=CODIGO, crear=False).aplicar(Rehacer(int(pasos)))
+        if res.ok:
+            st.rerun()
+        st.warning(res.msg)
+    if hechas:
+        st.caption("Última: " + (hechas[-1] or "jugada"))
+
+
+# ---------------------------------
+# AVISOS DEL OTRO EQUIPO (solo rerun si ESTA partida cambió)
+# ---------------------------------
+# Línea de jugadas de lo último que ha visto esta sesión (página entera o vigilante)
+st.session_state.linea_temporal = linea_temporal(estado)
+
+
+@st.fragment(run_every=INTERVALO_S)
+@medido("fragmento.jugadas")
+def vigilar_partida():
+    """
+    Único sondeo de la sesión, contra el vigilante compartido (en memoria). Solo
+    lee la partida si ha cambiado: si cambió algo pintado, repinta la página; si
+    no (p. ej. la jugada de esta sesión ya repintada en su columna), solo el
+    panel de jugadas, que se pinta aquí con la última partida leída.
+    """
+    if vigilante.ha_cambiado(CODIGO, st.session_state.get("token_visto")):
+        token = vigilante.token(CODIGO)
+        actual = cargar_partida(CODIGO)
+        if actual is None or firmas(actual) != st.session_state.get("firmas_pintadas"):
+            st.rerun()
+        st.session_state.token_visto = token
+        st.session_state.linea_temporal = linea_temporal(actual)
+    panel_jugadas(*st.session_state.linea_temporal)
+
+
+with st.sidebar:
+    st.divider()
+    vigilar_partida()
+
 bloquear_si_finalizado(estado)
 
 # ---------------------------------
@@ -216,29 +348,32 @@ def cargar_datos():
     return estructura, agrupaciones
 
 
-estructura, agrupaciones = cargar_datos()
+with tramo("app.cargar_datos"):
+    estructura, agrupaciones = cargar_datos()
+# Todas las jugadas pasan por el motor (guarda con compare-and-swap y deshacer)
+motor = Motor(codigo=CODIGO, estructura=estructura, crear=False)
 
 
 # ---------------------------------
 # ACCIONES
 # ---------------------------------
-col_a, col_b = st.columns(2)
-
-with col_a:
-    if st.button("▶️ Siguiente ronda (acción compartida)", key="btn_siguiente_ronda"):
-        estado, eventos = siguiente_ronda(estado, estructura, agrupaciones)
-        guardar_partida(CODIGO, estado)
-        st.rerun()
+# Ronda y reinicio cambian las dos columnas: repintan la página entera
+@st.fragment
+def barra_acciones():
+    col_a, col_b = st.columns(2)
+
+    with col_a:
+        if st.button("▶️ Siguiente ronda (acción compartida)", key="btn_siguiente_ronda"):
+            motor.aplicar(SiguienteRonda())
+            st.rerun()
 
+    with col_b:
+        if st.button("🔄 Reiniciar partida (para todos)"):
+            motor.aplicar(Reiniciar())
+            st.rerun()
 
 
-with col_b:
-    if st.button("🔄 Reiniciar partida (para todos)"):
-        estado = inicializar_juego()
-    # opcional: guardar el código dentro del estado
-        estado["codigo_partida"] = CODIGO
-        guardar_partida(CODIGO, estado)
-        st.rerun()
+barra_acciones()
 
         
 
@@ -250,7 +385,8 @@ with col_b:
 # ---------------------------------
 # VISUALIZACIÓN DE EQUIPOS
 # ---------------------------------
-def mostrar_equipo(col, equipo):
+@medido("panel.mostrar_equipo")
+def mostrar_equipo(col, equipo, estado):
     with col:
         st.subheader(f"Equipo {equipo}")
 
@@ -260,10 +396,16 @@ def mostrar_equipo(col, equipo):
             st.info("Sin cartas todavía")
             return
 
+        proyecto_id = proyecto_asignado(estado, equipo)
         for carta in mazo:
-            st.image(carta, width=160)
+            ruta = ruta_carta("actividad", carta, proyecto_id)
+            if ruta:
+                st.image(fuente_imagen(ruta, 160), width=160)
+            else:
+                st.write(f"Actividad {carta}")
 
-def mostrar_fusiones(col, equipo):
+@medido("panel.mostrar_fusiones")
+def mostrar_fusiones(col, equipo, estado):
     with col:
         st.subheader("Fusiones (selecciona cartas)")
 
@@ -287,21 +429,20 @@ def mostrar_fusiones(col, equipo):
         st.multiselect(
             "Selecciona las actividades a fusionar",
             options=actividades,
-            format_func=lambda r: os.path.basename(str(r)),
+            format_func=lambda r: f"{extraer_id(r)}.jpg",
             key=sel_key
         )
 
         seleccion = st.session_state.get(sel_key, [])
 
         if st.button("Fusionar selección", key=f"btn_fusion_sel_{equipo}"):
-            nuevo_estado, ok, msg = ejecutar_fusion_con_seleccion(estado, equipo, seleccion)
+            res = motor.aplicar(Fusionar(equipo, tuple(extraer_id(x) for x in seleccion)))
+            ok, msg = res.ok, res.msg
 
             if ok:
-                st.session_state.estado = nuevo_estado
-                guardar_partida(CODIGO, nuevo_estado)
                 st.session_state[clear_key] = True  # se limpia en el rerun
                 st.success(msg)
-                st.rerun()
+                repintar_tras_jugada(res)
             else:
                 st.warning(msg)
 
@@ -309,7 +450,8 @@ def mostrar_fusiones(col, equipo):
 
 
 
-def mostrar_proyectos(col, equipo):
+@medido("panel.mostrar_proyectos")
+def mostrar_proyectos(col, equipo, estado):
     with col:
         st.subheader("Paquetes completados")
 
@@ -341,8 +483,8 @@ def mostrar_proyectos(col, equipo):
 
             ruta = ruta_paquete(pid, proyecto_id)
 
-            if os.path.exists(ruta):
-                st.image(ruta, width=180)
+            if existe_imagen(ruta):
+                st.image(fuente_imagen(ruta, 180), width=180)
             else:
                 st.error(f"Imagen no encontrada: {ruta}")
 
@@ -350,7 +492,8 @@ def mostrar_proyectos(col, equipo):
 
 
 
-def mostrar_entregables(col, equipo):
+@medido("panel.mostrar_entregables")
+def mostrar_entregables(col, equipo, estado):
     with col:
         st.subheader("Entregables posibles")
 
@@ -366,19 +509,18 @@ def mostrar_entregables(col, equipo):
                 f"Crear Entregable {entregable_id}",
                 key=f"entregable_{equipo}_{entregable_id}",
             ):
-                nuevo_estado, ok = ejecutar_entregable(
-                    estado, equipo, int(entregable_id)  # 👈 MUY IMPORTANTE
-                )
+                paquetes = tuple(sorted(REGLAS.requisitos["entregable"][int(entregable_id)]))
+                res = motor.aplicar(CrearEntregable(str(equipo), paquetes))
 
-                if ok:
-                    guardar_partida(CODIGO, nuevo_estado)
-                    st.rerun()
+                if res.ok:
+                    repintar_tras_jugada(res)
 
                 else:
                     st.warning("❌ No se cumplen los requisitos para este entregable")
 
 
-def mostrar_entregables_creados(col, equipo):
+@medido("panel.mostrar_entregables_creados")
+def mostrar_entregables_creados(col, equipo, estado):
     with col:
         st.subheader("Entregables creados")
 
@@ -388,14 +530,17 @@ def mostrar_entregables_creados(col, equipo):
             st.info("No hay entregables creados todavía")
             return
 
-        for ruta in entregables:
-            if os.path.exists(ruta):
-                st.image(ruta, width=200)
+        proyecto_id = proyecto_asignado(estado, equipo)
+        for entregable in entregables:
+            ruta = ruta_carta("entregable", entregable, proyecto_id)
+            if existe_imagen(ruta):
+                st.image(fuente_imagen(ruta, 200), width=200)
             else:
                 st.error(f"Imagen no encontrada: {ruta}")
 
 
-def mostrar_proyectos2(col, equipo):
+@medido("panel.mostrar_proyectos2")
+def mostrar_proyectos2(col, equipo, estado):
     with col:
         st.subheader("Proyecto final")
 
@@ -411,10 +556,12 @@ def mostrar_proyectos2(col, equipo):
                 f"Crear Proyecto {proyecto_id}",
                 key=f"crear_proyecto_{equipo}_{proyecto_id}",
             ):
-                nuevo_estado, ok = ejecutar_proyecto(estado, equipo, proyecto_id)
-                if ok:
-                    guardar_partida(CODIGO, nuevo_estado)
-                    st.rerun()
+                entregables_req = tuple(sorted(REGLAS.requisitos["proyecto"][int(proyecto_id)]))
+                res = motor.aplicar(CrearProyecto(str(equipo), entregables_req))
+                if res.ok:
+                    repintar_tras_jugada(res)
+                else:
+                    st.warning(res.msg)
 
 
 
@@ -422,7 +569,8 @@ def mostrar_proyectos2(col, equipo):
 
 
                     
-def mostrar_proyecto_final(col, equipo):
+@medido("panel.mostrar_proyecto_final")
+def mostrar_proyecto_final(col, equipo, estado):
     with col:
         st.subheader("Proyecto completado")
 
@@ -434,17 +582,18 @@ def mostrar_proyecto_final(col, equipo):
             st.info("Aún no se ha completado el proyecto")
             return
 
-        for ruta_rel in lista:
-            ruta_abs = abs_path(ruta_rel)
-            if not Path(ruta_abs).exists():
-                st.error(f"Imagen no encontrada: {ruta_rel}")
+        for proyecto_id in lista:
+            ruta_abs = ruta_carta("proyecto", proyecto_id, None)
+            if not existe_imagen(ruta_abs):
+                st.error(f"Imagen no encontrada del proyecto {proyecto_id}")
             else:
-                st.image(ruta_abs, width=220)
+                st.image(fuente_imagen(ruta_abs, 220), width=220)
 
             
 
 
-def mostrar_entregables_seleccion(col, equipo):
+@medido("panel.mostrar_entregables_seleccion")
+def mostrar_entregables_seleccion(col, equipo, estado):
     with col:
         st.subheader("Entregables (selecciona paquetes)")
 
@@ -475,17 +624,18 @@ def mostrar_entregables_seleccion(col, equipo):
         seleccion = st.session_state.get(sel_key, [])
 
         if st.button("Crear entregable", key=f"btn_ent_sel_{equipo}"):
-            nuevo_estado, ok, msg = ejecutar_entregable_con_seleccion(estado, equipo, seleccion)
+            res = motor.aplicar(CrearEntregable(equipo, tuple(extraer_id(x) for x in seleccion)))
+            ok, msg = res.ok, res.msg
 
             if ok:
-                st.session_state.estado = nuevo_estado
                 st.session_state[clear_key] = True
                 st.success(msg)
-                st.rerun()
+                repintar_tras_jugada(res)
             else:
                 st.warning(msg)
 
-def mostrar_proyecto_final_seleccion(col, equipo):
+@medido("panel.mostrar_proyecto_final_seleccion")
+def mostrar_proyecto_final_seleccion(col, equipo, estado):
     with col:
         st.subheader("Proyecto final (selecciona entregables)")
 
@@ -509,43 +659,45 @@ def mostrar_proyecto_final_seleccion(col, equipo):
         st.multiselect(
             "Selecciona los entregables a fusionar",
             options=entregs,
-            format_func=lambda r: os.path.basename(str(r)),
+            format_func=lambda r: f"Entregable {extraer_id(r)}",
             key=sel_key
         )
 
         seleccion = st.session_state.get(sel_key, [])
 
         if st.button("Crear proyecto", key=f"btn_proyecto_sel_{equipo}"):
-            nuevo_estado, ok, msg = ejecutar_proyecto_con_seleccion(estado, equipo, seleccion)
+            res = motor.aplicar(CrearProyecto(equipo, tuple(extraer_id(x) for x in seleccion)))
+            ok, msg = res.ok, res.msg
 
             if ok:
-                st.session_state.estado = nuevo_estado
                 st.session_state[clear_key] = True
                 st.success(msg)
-                st.rerun()
+                repintar_tras_jugada(res)
             else:
                 st.warning(msg)
 
 
 
-col1, col2 = st.columns(2)
+@st.fragment
+def columna_equipo(equipo):
+    """Zonas de un equipo. Sus jugadas solo repintan esta columna (ver repintar_tras_jugada)."""
+    with tramo(f"fragmento.equipo_{equipo}"):
+        # En un rerun del fragmento el `estado` global es el de la última página entera
+        estado_equipo = cargar_partida(CODIGO) or estado
+        zona = st.container()
+        for panel in (mostrar_equipo, mostrar_fusiones, mostrar_proyectos, mostrar_entregables,
+                      mostrar_entregables_creados, mostrar_proyectos2, mostrar_proyecto_final):
+            panel(zona, equipo, estado_equipo)
+        pintado(str(equipo), estado_equipo)
 
-mostrar_equipo(col1, 1)
-mostrar_fusiones(col1, 1)
-mostrar_proyectos(col1, 1)
-mostrar_entregables(col1, 1)
-mostrar_entregables_creados(col1, 1)
-mostrar_proyectos2(col1, 1)
-mostrar_proyecto_final(col1, 1)
 
+col1, col2 = st.columns(2)
+
+with col1:
+    columna_equipo(1)
 
-mostrar_equipo(col2, 2)
-mostrar_fusiones(col2, 2)
-mostrar_proyectos(col2, 2)
-mostrar_entregables(col2, 2)
-mostrar_entregables_creados(col2, 2)
-mostrar_proyectos2(col2, 2)
-mostrar_proyecto_final(col2, 2)
+with col2:
+    columna_equipo(2)
 
 
 # ---------------------------------
@@ -553,3 +705,27 @@ mostrar_proyecto_final(col2, 2)
 # ---------------------------------
 with st.expander("ℹ️ Estado interno (debug)"):
     st.json(estado)
+    st.caption("Refrescos automáticos (todas las sesiones de este servidor)")
+    st.json(vigilante.estadisticas.resumen())
+
+metricas.registrar("app.rerun", time.perf_counter() - inicio_rerun)
+with st.expander("⏱️ Rendimiento (debug)"):
+    ambito = st.radio("Métricas de", ["Esta sesión", "Todo el servidor"], horizontal=True, key="ambito_metricas")
+    datos_metricas = st.session_state.metricas if ambito == "Esta sesión" else metricas.METRICAS
+    resumen_metricas = datos_metricas.resumen()
+    st.caption(f"Últimas {datos_metricas.ventana} llamadas por tramo; totales desde que empezó la sesión/servidor")
+    st.dataframe(
+        [{"tramo": nombre, **fila} for nombre, fila in resumen_metricas["tramos"].items()],
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.json(resumen_metricas["contadores"])
+
+    col_json, col_prom, col_reset = st.columns(3)
+    if col_json.button("Exportar JSON", key="exportar_metricas_json"):
+        st.success(f"Guardado en {datos_metricas.exportar(metricas.METRICAS_DIR / 'bivra.json')}")
+    if col_prom.button("Exportar Prometheus", key="exportar_metricas_prom"):
+        st.success(f"Guardado en {datos_metricas.exportar(metricas.METRICAS_DIR / 'bivra.prom')}")
+    if col_reset.button("Reiniciar sesión", key="reiniciar_metricas"):
+        st.session_state.metricas.reiniciar()
+        st.rerun()
@@ -0,0 +1,26 @@
+# benchmarks/_entorno.py
+"""
+Preparación común de los benchmarks (también en los procesos hijos):
+la raíz del repo en sys.path y las variables BIVRA_ del almacén.
+
+    from _entorno import RAIZ, preparar_entorno
+    preparar_entorno("sqlite", directorio)
+    preparar_entorno(BIVRA_SERVIDOR=url, BIVRA_METRICAS="0")
+"""
+import os
+import sys
+from typing import Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def preparar_entorno(almacen: Optional[str] = None, directorio: Optional[str] = None, **variables: str) -> None:
+    """Almacén y carpeta de partidas (sin BIVRA_SQLITE heredado), otras variables y RAIZ en sys.path."""
+    if almacen is not None:
+        os.environ["BIVRA_ALMACEN"] = almacen
+        os.environ.pop("BIVRA_SQLITE", None)
+    if directorio is not None:
+        os.environ["BIVRA_PARTIDAS_DIR"] = directorio
+    os.environ.update(variables)
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
@@ -0,0 +1,105 @@
+# benchmarks/contencion.py
+"""
+Contención sobre UNA partida: N procesos ejecutan M acciones cada uno contra
+el mismo código con actualizar_partida (lock + compare-and-swap + reintento).
+
+Comprueba que no se pierde ninguna jugada (ronda final == N * M) y mide el
+rendimiento y la latencia por acción.
+
+    python benchmarks/contencion.py --almacen json --procesos 8 --acciones 200
+    python benchmarks/contencion.py --almacen sqlite
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+from _entorno import preparar_entorno
+
+CODIGO = "BENCH1"
+
+
+def _sumar_ronda(estado):
+    nuevo = dict(estado)
+    nuevo["ronda"] = estado.get("ronda", 0) + 1
+    return nuevo, True, ""
+
+
+def _trabajador(args):
+    almacen, directorio, acciones = args
+    preparar_entorno(almacen, directorio)
+    import game_logic
+
+    latencias = []
+    fallos = 0
+    for _ in range(acciones):
+        t0 = time.perf_counter()
+        _, ok, _ = game_logic.actualizar_partida(CODIGO, _sumar_ronda, intentos=1000)
+        latencias.append(time.perf_counter() - t0)
+        if not ok:
+            fallos += 1
+    return latencias, fallos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--almacen", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--acciones", type=int, default=200)
+    parser.add_argument("--json", dest="salida_json", help="Escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bivra_bench_") as directorio:
+        preparar_entorno(args.almacen, directorio)
+        import game_logic
+
+        game_logic.crear_partida_si_no_existe(CODIGO)
+
+        ctx = get_context("spawn")
+        t0 = time.perf_counter()
+        with ctx.Pool(args.procesos) as pool:
+            resultados = pool.map(_trabajador, [(args.almacen, directorio, args.acciones)] * args.procesos)
+        total_s = time.perf_counter() - t0
+
+        estado = game_logic.cargar_partida(CODIGO)
+
+    latencias = sorted(l for lats, _ in resultados for l in lats)
+    fallos = sum(f for _, f in resultados)
+    esperadas = args.procesos * args.acciones
+
+    def pct(p):
+        return latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000
+
+    res = {
+        "almacen": args.almacen,
+        "procesos": args.procesos,
+        "acciones_por_proceso": args.acciones,
+        "acciones_esperadas": esperadas,
+        "ronda_final": estado["ronda"],
+        "version_final": estado.get("version"),
+        "jugadas_perdidas": esperadas - estado["ronda"],
+        "fallos": fallos,
+        "acciones_por_s": round(esperadas / total_s, 1),
+        "latencia_ms": {
+            "media": round(statistics.mean(latencias) * 1000, 3),
+            "p50": round(pct(0.50), 3),
+            "p95": round(pct(0.95), 3),
+            "p99": round(pct(0.99), 3),
+            "max": round(latencias[-1] * 1000, 3),
+        },
+    }
+    print(json.dumps(res, indent=2, ensure_ascii=False))
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+
+    if res["jugadas_perdidas"] != 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# benchmarks/fragmentos.py
+"""
+Latencia de una interacción en la columna de un equipo repintando la página
+entera frente a repintar solo su fragmento, con la app real ejecutada por el
+arnés de pruebas de Streamlit (streamlit.testing, sin navegador ni red).
+
+La interacción es marcar/desmarcar cartas en el multiselect de fusiones del
+equipo 1 (widget dentro de `columna_equipo`). Se mide de dos formas:
+
+  pagina     el rerun que hace AppTest.run(): el script entero (lo que costaba
+             cada interacción antes de los fragmentos)
+  fragmento  el rerun que pide el navegador al tocar un widget de un
+             fragmento: RerunData con el fragment_id, que solo ejecuta
+             `columna_equipo(1)` (AppTest no lo expone; ver _RunnerFragmento)
+
+En cada modo se toma el tiempo de pared de la interacción y los tramos de
+metricas.py que se han ejecutado (en modo fragmento no debe aparecer
+app.rerun).
+
+    python benchmarks/fragmentos.py
+    python benchmarks/fragmentos.py --rondas 5 20 --repeticiones 20 --json fragmentos.json
+"""
+import argparse
+import dataclasses
+import inspect
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from unittest import mock
+
+from _entorno import RAIZ, preparar_entorno
+
+CODIGO = "BENCHF"
+SELECCION = "sel_fusion_1"
+TRAMOS = ("app.rerun", "fragmento.equipo_1", "fragmento.equipo_2", "fragmento.catalogo", "fragmento.jugadas")
+
+
+def _id_fragmento(at, funcion, *args):
+    """fragment_id con el que se registró `funcion(*args)` en la última ejecución."""
+    for fragment_id, envoltorio in at._fragment_storage._fragments.items():
+        cierre = inspect.getclosurevars(envoltorio).nonlocals
+        if cierre["non_optional_func"].__name__ == funcion and cierre["args"] == args:
+            return fragment_id
+    raise LookupError(f"fragmento {funcion}{args} no registrado")
+
+
+def _runner_fragmento(fragment_id):
+    """LocalScriptRunner cuyo rerun va al fragmento, como el del navegador."""
+    from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    class _RunnerFragmento(LocalScriptRunner):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # Sin el rerun inicial de página entera, que absorbería el del fragmento
+            self._requests = ScriptRequests()
+
+        def request_rerun(self, rerun_data):
+            return super().request_rerun(dataclasses.replace(rerun_data, fragment_id=fragment_id))
+
+    return _RunnerFragmento
+
+
+def _interacciones(at, metricas, repeticiones, runner=None):
+    """Marca/desmarca cartas `repeticiones` veces; tiempos de pared (ms) y tramos."""
+    from streamlit.testing.v1 import app_test
+
+    metricas.METRICAS.reiniciar()
+    tiempos = []
+    for i in range(repeticiones):
+        seleccion = at.multiselect(key=SELECCION)
+        seleccion.set_value(seleccion.options[: 1 + i % 2])
+        t0 = time.perf_counter()
+        if runner is None:
+            at.run()
+        else:
+            with mock.patch.object(app_test, "LocalScriptRunner", runner):
+                at.run()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    tramos = metricas.METRICAS.resumen()["tramos"]
+    res = {"p50_ms": round(statistics.median(tiempos), 2), "max_ms": round(max(tiempos), 2), "tramos": {}}
+    for nombre in TRAMOS:
+        if nombre in tramos:
+            res["tramos"][nombre] = {"llamadas": tramos[nombre]["llamadas"], "p50_ms": tramos[nombre]["p50_ms"]}
+    return res
+
+
+def _medir_ronda(AppTest, gl, metricas, rondas, repeticiones):
+    gl.crear_partida_si_no_existe(CODIGO)
+    gl.actualizar_partida(CODIGO, lambda e: (gl.inicializar_juego(semilla=rondas), True, ""), con_deshacer=False)
+    estructura = gl.cargar_estructura_proyecto()
+    for _ in range(rondas):
+        gl.actualizar_partida(CODIGO, lambda e: (gl.siguiente_ronda(e, estructura, None)[0], True, ""), con_deshacer=False)
+
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+    at.session_state["codigo"] = CODIGO
+    at.run()  # calentamiento (cache_data, catálogos, miniaturas) y registro de fragmentos
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    pagina = _interacciones(at, metricas, repeticiones)
+    runner = _runner_fragmento(_id_fragmento(at, "columna_equipo", 1))
+    fragmento = _interacciones(at, metricas, repeticiones, runner)
+    if "app.rerun" in fragmento["tramos"]:
+        raise RuntimeError("el rerun del fragmento ha ejecutado la página entera")
+
+    return {
+        "ronda": rondas,
+        "cartas_equipo_1": len(gl.cargar_partida(CODIGO)["mazos"]["1"]),
+        "pagina": pagina,
+        "fragmento": fragmento,
+        "reduccion_pct": round(100 * (1 - fragmento["p50_ms"] / pagina["p50_ms"]), 1) if pagina["p50_ms"] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rondas", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--json", dest="salida_json", help="Escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bivra_bench_") as directorio:
+        preparar_entorno(directorio=directorio)
+        logging.getLogger("streamlit").setLevel(logging.ERROR)
+        from streamlit.testing.v1 import AppTest
+
+        import game_logic as gl
+        import metricas
+
+        res = [_medir_ronda(AppTest, gl, metricas, r, args.repeticiones) for r in args.rondas]
+
+    print(json.dumps(res, indent=2, ensure_ascii=False))
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
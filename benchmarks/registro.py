@@ -0,0 +1,120 @@
+# benchmarks/registro.py
+"""
+N sesiones (hilos) viendo la misma partida en un proceso, como en Streamlit:
+cada rerun carga la partida y consulta su token, y una de cada --cada
+reruns es una jugada (actualizar_partida). Se compara la cache de lecturas
+(cada sesión revalida con stat/SQLite y escribe en cada jugada) con
+RegistroPartidas (partida en memoria y escritura diferida):
+
+  lecturas/escrituras del almacén (contadores de metricas.py), duración
+  total y latencia p50/p95 de una jugada.
+
+Al final se comprueba que no se ha perdido ninguna jugada (ronda == jugadas)
+y que lo que queda en el almacén tras volcar es el último estado.
+
+    python benchmarks/registro.py
+    python benchmarks/registro.py --almacen sqlite --sesiones 16 --reruns 500 --json registro.json
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import threading
+import time
+
+from _entorno import preparar_entorno
+
+
+def _sumar_ronda(estado):
+    nuevo = dict(estado)
+    nuevo["ronda"] = estado.get("ronda", 0) + 1
+    return nuevo, True, ""
+
+
+def _medir(modo, almacen, gl, metricas, args):
+    codigo = f"REG{modo.upper()}"
+    base = almacen.crear_almacen()
+    if modo == "registro":
+        almacen._ALMACEN = almacen.RegistroPartidas(base, volcado_s=args.volcado_s)
+    else:
+        almacen._ALMACEN = almacen.CacheLecturas(base)
+    ronda_inicial = gl.crear_partida_si_no_existe(codigo)["ronda"]
+    metricas.METRICAS.reiniciar()
+
+    latencias = []
+    jugadas = [0]
+    lock = threading.Lock()
+
+    def sesion(n):
+        propias = []
+        for i in range(args.reruns):
+            gl.cargar_partida(codigo)
+            almacen._ALMACEN.token(codigo)
+            if (i + n) % args.cada == 0:
+                t0 = time.perf_counter()
+                _, ok, _ = gl.actualizar_partida(codigo, _sumar_ronda, intentos=1000, con_deshacer=False)
+                propias.append(time.perf_counter() - t0)
+                assert ok
+        with lock:
+            latencias.extend(propias)
+            jugadas[0] += len(propias)
+
+    t0 = time.perf_counter()
+    hilos = [threading.Thread(target=sesion, args=(n,)) for n in range(args.sesiones)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - t0
+    if modo == "registro":
+        almacen._ALMACEN.cerrar()
+
+    contadores = metricas.METRICAS.resumen()["contadores"]
+    guardado = base.cargar(codigo)
+    assert guardado["ronda"] == ronda_inicial + jugadas[0], "se ha perdido alguna jugada"
+
+    latencias.sort()
+    lecturas = contadores.get("archivo.lecturas", 0) + contadores.get("sqlite.lecturas", 0)
+    escrituras = contadores.get("archivo.escrituras", 0) + contadores.get("sqlite.escrituras", 0)
+    return {
+        "reruns": args.sesiones * args.reruns,
+        "jugadas": jugadas[0],
+        "duracion_s": round(duracion, 3),
+        "lecturas_almacen": lecturas,
+        "escrituras_almacen": escrituras,
+        "jugada_p50_ms": round(statistics.median(latencias) * 1000, 3),
+        "jugada_p95_ms": round(latencias[int(0.95 * (len(latencias) - 1))] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--almacen", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--sesiones", type=int, default=8)
+    parser.add_argument("--reruns", type=int, default=300)
+    parser.add_argument("--cada", type=int, default=10, help="Una jugada cada tantos reruns de cada sesión")
+    parser.add_argument("--volcado-s", type=float, default=2.0)
+    parser.add_argument("--json", dest="salida_json", help="Escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bivra_bench_") as directorio:
+        preparar_entorno(args.almacen, directorio)
+        import almacen
+        import game_logic as gl
+        import metricas
+
+        res = {
+            "almacen": args.almacen,
+            "sesiones": args.sesiones,
+            "cache": _medir("cache", almacen, gl, metricas, args),
+            "registro": _medir("registro", almacen, gl, metricas, args),
+        }
+
+    print(json.dumps(res, indent=2, ensure_ascii=False))
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
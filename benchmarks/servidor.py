@@ -0,0 +1,162 @@
+# benchmarks/servidor.py
+"""
+Servidor de partidas en localhost con N "réplicas" de la app (procesos con
+BIVRA_SERVIDOR) que juegan M rondas cada una sobre la misma partida.
+
+Arranca servidor.py en un puerto libre con una carpeta de partidas temporal,
+comprueba que no se pierde ninguna jugada (la ronda avanza N * M), que
+los errores se contestan bien (404, 400, 401 con clave) y que, al parar el
+servidor (SIGTERM), lo que queda en disco es el último estado (escritura
+diferida del registro). Mide acciones por segundo y latencia de una jugada.
+
+    python benchmarks/servidor.py
+    python benchmarks/servidor.py --procesos 8 --acciones 200 --almacen sqlite --json servidor.json
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+from _entorno import RAIZ, preparar_entorno
+
+CODIGO = "BENCHS"
+CLAVE = "bench"
+
+
+def _preparar_entorno(url: str) -> None:
+    preparar_entorno(BIVRA_SERVIDOR=url, BIVRA_SERVIDOR_CLAVE=CLAVE, BIVRA_METRICAS="0")
+
+
+def _trabajador(args):
+    url, acciones = args
+    _preparar_entorno(url)
+    from motor import Motor, SiguienteRonda
+
+    motor = Motor(codigo=CODIGO, crear=False)
+    latencias = []
+    fallos = 0
+    for _ in range(acciones):
+        t0 = time.perf_counter()
+        res = motor.aplicar(SiguienteRonda())
+        latencias.append(time.perf_counter() - t0)
+        if not res.ok:
+            fallos += 1
+    return latencias, fallos
+
+
+def _arrancar_servidor(directorio: str, almacen: str):
+    """(proceso, URL) del servidor arrancado en un puerto libre."""
+    entorno = dict(os.environ, BIVRA_PARTIDAS_DIR=directorio, BIVRA_ALMACEN=almacen, BIVRA_SERVIDOR_CLAVE=CLAVE)
+    entorno.pop("BIVRA_SQLITE", None)
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "servidor.py"), "--puerto", "0"],
+        cwd=RAIZ, env=entorno, stdout=subprocess.PIPE, text=True,
+    )
+    linea = proceso.stdout.readline()
+    if "http://" not in linea:
+        proceso.kill()
+        raise RuntimeError(f"El servidor no ha arrancado: {linea!r}")
+    return proceso, linea.strip().rsplit(" ", 1)[-1]
+
+
+def _comprobar_errores(cliente_mod, url: str) -> dict:
+    """Códigos de respuesta de peticiones incorrectas (se esperan 401, 404, 400)."""
+    res = {}
+    sin_clave = cliente_mod.ClientePartidas(url, clave=None)
+    try:
+        sin_clave.token(CODIGO)
+    except cliente_mod.ErrorServidor as e:
+        res["sin_clave"] = e.estado_http
+    cliente = cliente_mod.ClientePartidas(url, clave=CLAVE)
+    res["partida_inexistente"] = 404 if cliente.cargar("NOEXISTE") is None else 200
+    try:
+        cliente._pedir("POST", f"/partidas/{CODIGO}/fusion", {"equipo": "1"})
+    except cliente_mod.ErrorServidor as e:
+        res["cuerpo_invalido"] = e.estado_http
+    return res
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--almacen", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--acciones", type=int, default=100)
+    parser.add_argument("--json", dest="salida_json", help="Escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bivra_bench_") as directorio:
+        servidor, url = _arrancar_servidor(directorio, args.almacen)
+        try:
+            _preparar_entorno(url)
+            import cliente
+
+            remoto = cliente.ClientePartidas(url, clave=CLAVE)
+            ronda_inicial = remoto.crear_si_no_existe(CODIGO)["ronda"]
+            errores = _comprobar_errores(cliente, url)
+
+            ctx = get_context("spawn")
+            t0 = time.perf_counter()
+            with ctx.Pool(args.procesos) as pool:
+                resultados = pool.map(_trabajador, [(url, args.acciones)] * args.procesos)
+            total_s = time.perf_counter() - t0
+            estado = remoto.cargar(CODIGO)
+        finally:
+            servidor.send_signal(signal.SIGTERM)
+            servidor.wait(timeout=30)
+
+        # Lo que ha quedado en disco tras parar el servidor
+        import almacen
+
+        if args.almacen == "sqlite":
+            en_disco = almacen.AlmacenSQLite(os.path.join(directorio, "partidas.db")).cargar(CODIGO)
+        else:
+            en_disco = almacen.AlmacenJSON(directorio).cargar(CODIGO)
+
+    latencias = sorted(l for lats, _ in resultados for l in lats)
+    fallos = sum(f for _, f in resultados)
+    esperadas = args.procesos * args.acciones
+
+    def pct(p):
+        return latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000
+
+    res = {
+        "almacen": args.almacen,
+        "procesos": args.procesos,
+        "acciones_por_proceso": args.acciones,
+        "acciones_esperadas": esperadas,
+        "ronda_final": estado["ronda"],
+        "jugadas_perdidas": esperadas - (estado["ronda"] - ronda_inicial),
+        "en_disco_tras_parar": {"ronda": en_disco["ronda"], "version": en_disco["version"]},
+        "errores": errores,
+        "fallos": fallos,
+        "acciones_por_s": round(esperadas / total_s, 1),
+        "latencia_ms": {
+            "media": round(statistics.mean(latencias) * 1000, 3),
+            "p50": round(pct(0.50), 3),
+            "p95": round(pct(0.95), 3),
+            "p99": round(pct(0.99), 3),
+            "max": round(latencias[-1] * 1000, 3),
+        },
+    }
+    print(json.dumps(res, indent=2, ensure_ascii=False))
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+
+    correcto = (
+        res["jugadas_perdidas"] == 0
+        and en_disco["version"] == estado["version"]
+        and errores == {"sin_clave": 401, "partida_inexistente": 404, "cuerpo_invalido": 400}
+    )
+    if not correcto:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# benchmarks/suite.py
+"""
+Suite de benchmarks de los caminos calientes de game_logic, reproducible y
+sin red (partidas en un directorio temporal, semillas fijas):
+
+  - cargar_partida / guardar_partida con mazos de 10, 100 y 1000 cartas
+    (cargar: con la cache de lecturas y leyendo del almacén),
+  - siguiente_ronda en las rondas 1, 100 y 1000,
+  - ejecutar_fusion/entregable/proyecto_con_seleccion (acierto y fallo con diagnóstico),
+  - cargar_estructura_proyecto en frío (proceso nuevo) y en caliente,
+  - resolución de imágenes: ruta_carta por nivel y existe_imagen,
+  - catálogo: búsqueda por prefijo + una página con 20 y 2.000 cartas.
+
+Cada caso da mediana, p90 y mínimo en µs. Con --json se guardan junto con el
+commit y la máquina, y con --comparar se marcan las regresiones respecto a
+otra ejecución (sale con código 1 si hay alguna):
+
+    python benchmarks/suite.py --json base.json
+    python benchmarks/suite.py --comparar base.json --umbral 1.25
+    python benchmarks/suite.py --filtro siguiente_ronda --repeticiones 500
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _entorno import RAIZ, preparar_entorno
+
+CODIGO = "BENCH"
+SEMILLA = 1234
+
+
+def _medir(fn, repeticiones: int, calentamiento: int = 3):
+    for _ in range(calentamiento):
+        fn()
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter_ns()
+        fn()
+        tiempos.append(time.perf_counter_ns() - t0)
+    tiempos.sort()
+    return {
+        "mediana_us": round(statistics.median(tiempos) / 1000, 2),
+        "p90_us": round(tiempos[min(len(tiempos) - 1, int(0.9 * len(tiempos)))] / 1000, 2),
+        "min_us": round(tiempos[0] / 1000, 2),
+        "n": repeticiones,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ==============================
+# Casos
+# ==============================
+
+def _casos_almacen(gl, almacen, tamanos):
+    """cargar_partida / guardar_partida con `tamano` cartas en el mazo de cada equipo."""
+    casos = {}
+    acts = list(gl.catalogo_actividades_proyecto(1)) or [1]
+    sin_cache = almacen.crear_almacen()
+    for tamano in tamanos:
+        codigo = f"{CODIGO}{tamano}"
+        estado = gl.inicializar_juego(SEMILLA)
+        estado["mazos"] = {eq: [acts[i % len(acts)] for i in range(tamano)] for eq in ("1", "2")}
+        gl.crear_partida_si_no_existe(codigo)
+        gl.actualizar_partida(codigo, lambda e, nuevo=estado: (nuevo, True, ""), con_deshacer=False)
+
+        def alternar(e, tamano=tamano):
+            # Añade o quita una carta: el estado no crece entre repeticiones
+            mazo = e["mazos"]["1"]
+            nuevo = dict(e)
+            nuevo["mazos"] = {**e["mazos"], "1": mazo[:tamano] if len(mazo) > tamano else mazo + [acts[0]]}
+            return nuevo, True, ""
+
+        casos[f"cargar_partida[{tamano}]"] = lambda c=codigo: gl.cargar_partida(c)
+        casos[f"cargar_partida_sin_cache[{tamano}]"] = lambda c=codigo: sin_cache.cargar(c)
+        casos[f"guardar_partida[{tamano}]"] = lambda c=codigo, a=alternar: gl.actualizar_partida(c, a, con_deshacer=False)
+    return casos
+
+
+def _casos_ronda(gl, estructura, rondas):
+    casos = {}
+    for ronda in rondas:
+        estado = gl.inicializar_juego(SEMILLA)
+        for _ in range(ronda - 1):
+            estado, _ = gl.siguiente_ronda(estado, estructura, None)
+        casos[f"siguiente_ronda[{ronda}]"] = lambda e=estado: gl.siguiente_ronda(e, estructura, None)
+    return casos
+
+
+def _casos_seleccion(gl, estructura):
+    """Equipo 1 en la ronda 100 con cartas para una fusión, un entregable y su proyecto."""
+    estado = gl.inicializar_juego(SEMILLA)
+    for _ in range(99):
+        estado, _ = gl.siguiente_ronda(estado, estructura, None)
+    entregables = list(gl.PROYECTOS[1])
+    paquetes = sorted(gl.ENTREGABLES[entregables[0]])
+    actividades = sorted(gl.FUSIONES_PAQUETES[paquetes[0]])
+    estado["proyectos_asignados"] = {"1": "1", "2": "3"}
+    estado["mazos"] = {**estado["mazos"], "1": estado["mazos"]["1"] + actividades}
+    estado["proyectos"] = {"1": paquetes, "2": []}
+    estado["entregables"] = {"1": entregables, "2": []}
+
+    def caso(fn, seleccion, ok_esperado):
+        def correr():
+            resultado = fn(estado, "1", seleccion)
+            assert resultado[1] is ok_esperado, resultado[2]
+        return correr
+
+    return {
+        "fusion_con_seleccion[ok]": caso(gl.ejecutar_fusion_con_seleccion, actividades, True),
+        "fusion_con_seleccion[fallo]": caso(gl.ejecutar_fusion_con_seleccion, actividades[1:], False),
+        "entregable_con_seleccion[ok]": caso(gl.ejecutar_entregable_con_seleccion, paquetes, True),
+        "entregable_con_seleccion[fallo]": caso(gl.ejecutar_entregable_con_seleccion, paquetes[1:], False),
+        "proyecto_con_seleccion[ok]": caso(gl.ejecutar_proyecto_con_seleccion, entregables, True),
+        "proyecto_con_seleccion[fallo]": caso(gl.ejecutar_proyecto_con_seleccion, entregables[1:], False),
+    }
+
+
+def _casos_imagenes(gl, activos):
+    entregable = gl.PROYECTOS[1][0]
+    paquete = min(gl.ENTREGABLES[entregable])
+    actividad = next(iter(gl.catalogo_actividades_proyecto(1)), 1)
+    ruta = gl.ruta_carta("actividad", actividad, 1)
+    return {
+        "ruta_carta[actividad]": lambda: gl.ruta_carta("actividad", actividad, 1),
+        "ruta_carta[paquete]": lambda: gl.ruta_carta("paquete", paquete, 1),
+        "ruta_carta[entregable]": lambda: gl.ruta_carta("entregable", entregable, 1),
+        "ruta_carta[proyecto]": lambda: gl.ruta_carta("proyecto", 1, 1),
+        "existe_imagen": lambda: activos.existe_imagen(ruta),
+    }
+
+
+def _casos_catalogo(catalogo, tamanos=(20, 2000), por_pagina=24):
+    """Buscar por prefijo y sacar una página debe costar lo mismo con 20 que con 2.000 cartas."""
+    casos = {}
+    for tamano in tamanos:
+        indice = catalogo.IndiceCatalogo(1, {i: f"{i}.jpg" for i in range(1, tamano + 1)})
+        casos[f"catalogo_pagina[{tamano}]"] = lambda ix=indice: ix.buscar("1").pagina(1, por_pagina)
+        casos[f"catalogo_rango[{tamano}]"] = lambda ix=indice: ix.buscar("5-15").pagina(1, por_pagina)
+    return casos
+
+
+def _estructura_en_frio(repeticiones: int):
+    """cargar_estructura_proyecto en un proceso nuevo (primera llamada tras importar)."""
+    codigo = (
+        "import sys, time; sys.path.insert(0, sys.argv[1]); import game_logic as gl; "
+        "t0 = time.perf_counter_ns(); gl.cargar_estructura_proyecto(); print(time.perf_counter_ns() - t0)"
+    )
+    tiempos = sorted(
+        int(subprocess.run([sys.executable, "-c", codigo, RAIZ], cwd=RAIZ, capture_output=True,
+                           text=True, check=True).stdout)
+        for _ in range(repeticiones)
+    )
+    return {
+        "mediana_us": round(statistics.median(tiempos) / 1000, 2),
+        "p90_us": round(tiempos[min(len(tiempos) - 1, int(0.9 * len(tiempos)))] / 1000, 2),
+        "min_us": round(tiempos[0] / 1000, 2),
+        "n": repeticiones,
+    }
+
+
+# ==============================
+# Comparación
+# ==============================
+
+def comparar(actual, base, umbral: float):
+    """Casos cuya mediana es `umbral` veces la de `base` o más: [(nombre, antes_us, ahora_us, ratio)]."""
+    regresiones = []
+    for nombre, res in actual["resultados"].items():
+        previo = base.get("resultados", {}).get(nombre)
+        if not previo or not previo["mediana_us"]:
+            continue
+        ratio = res["mediana_us"] / previo["mediana_us"]
+        if ratio >= umbral:
+            regresiones.append((nombre, previo["mediana_us"], res["mediana_us"], round(ratio, 2)))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--almacen", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--repeticiones-frio", type=int, default=5, help="Procesos para cargar_estructura_proyecto en frío")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rondas", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--filtro", help="Solo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--json", dest="salida_json", help="Escribe los resultados en este archivo")
+    parser.add_argument("--comparar", help="Resultados anteriores (--json) con los que comparar")
+    parser.add_argument("--umbral", type=float, default=1.25, help="Ratio de la mediana a partir del cual es regresión")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bivra_bench_") as directorio:
+        preparar_entorno(args.almacen, directorio)
+        import activos
+        import almacen
+        import catalogo
+        import game_logic as gl
+
+        estructura = gl.cargar_estructura_proyecto()
+        casos = {}
+        casos.update(_casos_almacen(gl, almacen, args.tamanos))
+        casos.update(_casos_ronda(gl, estructura, args.rondas))
+        casos.update(_casos_seleccion(gl, estructura))
+        casos["cargar_estructura_proyecto[caliente]"] = gl.cargar_estructura_proyecto
+        casos.update(_casos_imagenes(gl, activos))
+        casos.update(_casos_catalogo(catalogo))
+
+        resultados = {}
+        for nombre, fn in casos.items():
+            if args.filtro and args.filtro not in nombre:
+                continue
+            resultados[nombre] = _medir(fn, args.repeticiones)
+        if not args.filtro or args.filtro in "cargar_estructura_proyecto[frio]":
+            resultados["cargar_estructura_proyecto[frio]"] = _estructura_en_frio(args.repeticiones_frio)
+
+        res = {
+            "meta": {
+                "commit": _commit(),
+                "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "maquina": platform.platform(),
+                "almacen": args.almacen,
+                "manifiesto": activos.hay_manifiesto(),
+                "repeticiones": args.repeticiones,
+            },
+            "resultados": resultados,
+        }
+
+    ancho = max(len(n) for n in resultados)
+    print(f"{'caso':<{ancho}}  {'mediana µs':>12}  {'p90 µs':>12}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<{ancho}}  {r['mediana_us']:>12.2f}  {r['p90_us']:>12.2f}")
+
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(res, base, args.umbral)
+        print(f"\nComparado con {base.get('meta', {}).get('commit')} (umbral x{args.umbral}):")
+        for nombre, antes, ahora, ratio in regresiones:
+            print(f"  ❌ {nombre}: {antes} -> {ahora} µs (x{ratio})")
+        if not regresiones:
+            print("  ✅ sin regresiones")
+        else:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
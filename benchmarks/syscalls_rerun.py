@@ -0,0 +1,142 @@
+# benchmarks/syscalls_rerun.py
+"""
+Llamadas al sistema de archivos por rerun, sin y con manifiesto de cartas.
+
+Cuenta os.stat / os.lstat / os.listdir / os.scandir / open mientras se
+ejecuta lo que hace app.py con las imágenes en un rerun (catálogo abierto,
+paquetes, entregables y proyecto final de los dos equipos). Cada modo se
+ejecuta en un proceso aparte: "antes" con una carpeta de activos vacía y
+"despues" con el manifiesto generado por activos.construir().
+
+    python benchmarks/syscalls_rerun.py [--json resultados.json]
+"""
+import argparse
+import builtins
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _entorno import RAIZ, preparar_entorno
+
+
+_CONTADORES = {}
+
+
+def _contar(nombre, funcion):
+    def envoltorio(*args, **kwargs):
+        _CONTADORES[nombre] = _CONTADORES.get(nombre, 0) + 1
+        return funcion(*args, **kwargs)
+    return envoltorio
+
+
+def _instrumentar():
+    for nombre in ("stat", "lstat", "listdir", "scandir"):
+        setattr(os, nombre, _contar(nombre, getattr(os, nombre)))
+    builtins.open = io.open = _contar("open", io.open)
+
+
+def _estado_de_ejemplo(gl):
+    """Partida a media: mazo, 4 paquetes, 4 entregables y un proyecto final por equipo."""
+    estado = gl.inicializar_juego()
+    estado["proyectos_asignados"] = {"1": "1", "2": "3"}
+    for eq, proyecto in estado["proyectos_asignados"].items():
+        acts = gl.catalogo_actividades_proyecto(proyecto)
+        entregables = gl.PROYECTOS[int(proyecto)]
+        estado["mazos"][eq] = list(acts)[:12]
+        estado["proyectos"][eq] = sorted(gl.ENTREGABLES[entregables[0]])
+        estado.setdefault("entregables", {})[eq] = list(entregables)
+        estado.setdefault("proyectos_finales", {})[eq] = [int(proyecto)]
+    return estado
+
+
+def _rerun(gl, estado):
+    """Lo que app.py hace con el disco en un rerun (salvo cargar_partida)."""
+    from activos import existe_imagen
+
+    proyectos = gl.listar_proyectos_imagenes()
+    catalogo = gl.catalogo_actividades_proyecto(proyectos[0])
+    for ruta in catalogo.values():
+        existe_imagen(ruta)
+    catalogo = gl.catalogo_actividades_proyecto(proyectos[0])  # expander de fusiones
+    for rid in gl.FUSIONES_PAQUETES[15]:
+        existe_imagen(catalogo.get(rid))
+
+    for eq in ("1", "2"):
+        proyecto = gl.proyecto_asignado(estado, eq)
+        for cid in estado["mazos"][eq]:
+            existe_imagen(gl.ruta_carta("actividad", cid, proyecto))
+        for pid in estado["proyectos"][eq]:
+            existe_imagen(gl.ruta_carta("paquete", pid, proyecto))
+        for eid in estado["entregables"][eq]:
+            existe_imagen(gl.ruta_carta("entregable", eid, proyecto))
+        for pid in estado["proyectos_finales"][eq]:
+            existe_imagen(gl.ruta_carta("proyecto", pid, None))
+
+
+def _medir(reruns):
+    preparar_entorno()
+    import game_logic as gl
+
+    t0 = time.perf_counter()
+    _instrumentar()
+    gl.cargar_estructura_proyecto()
+    arranque = dict(_CONTADORES)
+    arranque_s = time.perf_counter() - t0
+
+    estado = _estado_de_ejemplo(gl)
+    _CONTADORES.clear()
+    t0 = time.perf_counter()
+    for _ in range(reruns):
+        _rerun(gl, estado)
+    rerun_s = (time.perf_counter() - t0) / reruns
+    por_rerun = {k: v / reruns for k, v in _CONTADORES.items()}
+
+    return {
+        "arranque": {"syscalls": arranque, "total": sum(arranque.values()), "ms": round(arranque_s * 1000, 3)},
+        "rerun": {"syscalls": por_rerun, "total": sum(por_rerun.values()), "ms": round(rerun_s * 1000, 3)},
+    }
+
+
+def _lanzar(activos_dir, reruns):
+    env = dict(os.environ, BIVRA_ACTIVOS_DIR=activos_dir)
+    salida = subprocess.run(
+        [sys.executable, __file__, "--medir", str(reruns)],
+        env=env, cwd=RAIZ, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(salida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--json", dest="salida_json")
+    parser.add_argument("--medir", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(_medir(args.medir)))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bivra_activos_") as vacio, \
+            tempfile.TemporaryDirectory(prefix="bivra_activos_") as con_manifiesto:
+        subprocess.run(
+            [sys.executable, "activos.py", "--sin-objetos"],
+            env=dict(os.environ, BIVRA_ACTIVOS_DIR=con_manifiesto), cwd=RAIZ, check=True, capture_output=True,
+        )
+        res = {
+            "antes": _lanzar(vacio, args.reruns),
+            "despues": _lanzar(con_manifiesto, args.reruns),
+        }
+
+    print(json.dumps(res, indent=2))
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
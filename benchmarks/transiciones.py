@@ -0,0 +1,96 @@
+# benchmarks/transiciones.py
+"""
+Coste de una acción (fusión, entregable, proyecto) según lo avanzada que
+está la partida: ronda 10, 100 y 1000.
+
+Compara las transiciones actuales (solo se copian las zonas del equipo que
+cambia; el resto del estado se comparte) con copiar el estado entero con
+copy.deepcopy antes de cada acción, que es lo que se hacía antes.
+
+Mide por acción la latencia (mediana) y la memoria reservada (pico de
+tracemalloc durante la llamada). Para el peor caso el historial no se acota,
+como antes de las pilas de robo.
+
+    python benchmarks/transiciones.py
+    python benchmarks/transiciones.py --rondas 10 100 1000 --repeticiones 200 --json transiciones.json
+"""
+import argparse
+import copy
+import json
+import statistics
+import time
+import tracemalloc
+
+from _entorno import preparar_entorno
+
+
+def _estado_en_ronda(gl, estructura, rondas):
+    """Partida tras `rondas` rondas, con el equipo 1 listo para las tres acciones."""
+    estado = gl.inicializar_juego(semilla=rondas)
+    estado["proyectos_asignados"] = {"1": "1", "2": "3"}
+    for _ in range(rondas):
+        estado, _ = gl.siguiente_ronda(estado, estructura, None)
+
+    entregables = gl.PROYECTOS[1]
+    paquetes = sorted(gl.ENTREGABLES[entregables[0]])
+    estado["mazos"]["1"] = estado["mazos"]["1"] + list(gl.FUSIONES_PAQUETES[paquetes[0]])
+    estado["proyectos"] = {"1": paquetes, "2": []}
+    estado["entregables"] = {"1": list(entregables), "2": []}
+    acciones = {
+        "fusion": lambda e: gl.ejecutar_fusion(e, "1", paquetes[0]),
+        "entregable": lambda e: gl.ejecutar_entregable(e, "1", entregables[0]),
+        "proyecto": lambda e: gl.ejecutar_proyecto(e, "1", 1),
+    }
+    return estado, acciones
+
+
+def _medir(accion, estado, repeticiones):
+    latencias = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        _, ok = accion(estado)
+        latencias.append(time.perf_counter() - t0)
+        assert ok
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    antes = tracemalloc.get_traced_memory()[0]
+    accion(estado)
+    pico = tracemalloc.get_traced_memory()[1] - antes
+    tracemalloc.stop()
+
+    return {"latencia_us": round(statistics.median(latencias) * 1e6, 1), "memoria_kb": round(pico / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rondas", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--json", dest="salida_json", help="Escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    preparar_entorno()
+    import game_logic as gl
+
+    gl.HISTORIAL_MAX = 10 ** 9  # historial sin acotar (peor caso)
+    estructura = gl.cargar_estructura_proyecto()
+
+    res = []
+    for rondas in args.rondas:
+        estado, acciones = _estado_en_ronda(gl, estructura, rondas)
+        fila = {"ronda": rondas, "bytes_estado": len(json.dumps(estado))}
+        for nombre, accion in acciones.items():
+            fila[nombre] = {
+                "compartido": _medir(accion, estado, args.repeticiones),
+                "deepcopy": _medir(lambda e, a=accion: a(copy.deepcopy(e)), estado, args.repeticiones),
+            }
+        res.append(fila)
+
+    print(json.dumps(res, indent=2, ensure_ascii=False))
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# catalogo.py
+"""
+Índice del catálogo de cartas (actividades) de cada proyecto, para buscar y
+paginar sin recorrer todas las cartas en cada rerun.
+
+    indice = indice_proyecto(3)              # se construye una vez por proceso
+    busqueda = indice.buscar("7")            # prefijo: 7, 70-79, 700-799...
+    busqueda = indice.buscar("10-50")        # rango numérico (inclusive)
+    busqueda.total, busqueda.paginas(24)
+    ids = busqueda.pagina(2, 24)             # IDs de la página 2, en orden numérico
+
+Los IDs están ordenados una vez; un prefijo es la unión de unos pocos rangos
+numéricos (uno por número de cifras), así que buscar cuesta O(log n) con
+bisect y pagina() solo toca las cartas de la página: el coste no depende de
+si el proyecto tiene 20 cartas o 2.000.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+_RANGO = re.compile(r"^\s*(\d+)\s*-\s*(\d+)\s*$")
+
+
+class Busqueda:
+    """Resultado de una búsqueda: tramos [inicio, fin) de la lista ordenada de IDs."""
+
+    __slots__ = ("_ids", "_tramos", "total")
+
+    def __init__(self, ids: List[int], tramos: List[Tuple[int, int]]):
+        self._ids = ids
+        self._tramos = [(a, b) for a, b in tramos if b > a]
+        self.total = sum(b - a for a, b in self._tramos)
+
+    def paginas(self, por_pagina: int) -> int:
+        return max(1, -(-self.total // por_pagina))
+
+    def pagina(self, numero: int, por_pagina: int) -> List[int]:
+        """IDs de la página `numero` (desde 1)."""
+        saltar = (max(1, numero) - 1) * por_pagina
+        res: List[int] = []
+        for a, b in self._tramos:
+            if saltar >= b - a:
+                saltar -= b - a
+                continue
+            inicio = a + saltar
+            saltar = 0
+            res.extend(self._ids[inicio:min(b, inicio + por_pagina - len(res))])
+            if len(res) == por_pagina:
+                break
+        return res
+
+
+class IndiceCatalogo:
+    """IDs ordenados de un proyecto y su ruta de imagen."""
+
+    __slots__ = ("proyecto", "rutas", "ids")
+
+    def __init__(self, proyecto, rutas: Dict[int, str]):
+        self.proyecto = proyecto
+        self.rutas = rutas
+        self.ids = sorted(rutas)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def ruta(self, cid) -> Optional[str]:
+        return self.rutas.get(int(cid))
+
+    def _tramo(self, desde: int, hasta: int) -> Tuple[int, int]:
+        """Posiciones [inicio, fin) de los IDs en [desde, hasta]."""
+        return bisect_left(self.ids, desde), bisect_right(self.ids, hasta)
+
+    def buscar(self, consulta: str = "") -> Busqueda:
+        """
+        "" -> todas; "79" -> IDs que empiezan por 79; "10-50" -> rango numérico.
+        Cualquier otra cosa no encuentra nada.
+        """
+        consulta = (consulta or "").strip()
+        if not consulta:
+            return Busqueda(self.ids, [(0, len(self.ids))])
+
+        m = _RANGO.match(consulta)
+        if m:
+            desde, hasta = sorted((int(m.group(1)), int(m.group(2))))
+            return Busqueda(self.ids, [self._tramo(desde, hasta)])
+
+        if not consulta.isdigit():
+            return Busqueda(self.ids, [])
+        prefijo = int(consulta)
+        if consulta.startswith("0"):
+            # Ningún ID tiene ceros a la izquierda: solo "0" exacto
+            return Busqueda(self.ids, [self._tramo(0, 0)] if prefijo == 0 and consulta == "0" else [])
+
+        # 7 -> [7, 7], [70, 79], [700, 799]... hasta pasar del ID más alto
+        tramos = []
+        desde, ancho = prefijo, 1
+        maximo = self.ids[-1] if self.ids else -1
+        while desde <= maximo:
+            tramos.append(self._tramo(desde, desde + ancho - 1))
+            desde, ancho = desde * 10, ancho * 10
+        return Busqueda(self.ids, tramos)
+
+
+@lru_cache(maxsize=64)
+def _indice(proyecto: str) -> IndiceCatalogo:
+    # Importado aquí: game_logic no depende de este módulo
+    from game_logic import catalogo_actividades_proyecto
+
+    return IndiceCatalogo(proyecto, dict(catalogo_actividades_proyecto(proyecto)))
+
+
+def indice_proyecto(proyecto) -> IndiceCatalogo:
+    """Índice del catálogo del proyecto (uno por proceso; las cartas no cambian en ejecución)."""
+    return _indice(str(proyecto))
@@ -0,0 +1,190 @@
+# cliente.py
+"""
+Cliente del servidor de partidas (servidor.py).
+
+Con BIVRA_SERVIDOR=http://host:8765 obtener_almacen() devuelve un
+ClientePartidas en vez del almacén local: cargar_partida, existe_partida,
+crear_partida_si_no_existe y el vigilante de notificaciones.py leen del
+servidor, y Motor.aplicar le envía las jugadas. Así las réplicas de la app
+no guardan nada en disco y se pueden poner detrás de un balanceador.
+
+    cliente = ClientePartidas("http://127.0.0.1:8765")
+    cliente.crear_si_no_existe("ABC123")
+    res = cliente.aplicar("ABC123", SiguienteRonda())   # motor.Resultado
+
+Cada hilo reutiliza su conexión HTTP (keep-alive); si el servidor la ha
+cerrado, solo se repiten los GET (una jugada nunca se envía dos veces).
+cargar() manda la versión que ya tiene (If-None-Match) y, si la partida no
+ha cambiado, el servidor contesta 304 sin cuerpo y se devuelve el estado ya
+parseado.
+
+    BIVRA_SERVIDOR=http://...      URL del servidor de partidas
+    BIVRA_SERVIDOR_CLAVE=...       clave compartida (si el servidor la pide)
+"""
+import http.client
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from almacen import AlmacenPartidas, normalizar_codigo
+from inmutable import congelar
+
+URL = os.environ.get("BIVRA_SERVIDOR", "").strip()
+CLAVE = os.environ.get("BIVRA_SERVIDOR_CLAVE") or None
+TIMEOUT_S = 10.0
+# Las peticiones que no son GET no se repiten: no van por una conexión que lleve
+# más de esto sin usarse (el servidor cierra las inactivas a los 30 s)
+REUTILIZAR_S = 5.0
+
+
+class ErrorServidor(Exception):
+    """El servidor de partidas ha contestado con un error (4xx/5xx)."""
+
+    def __init__(self, estado_http: int, mensaje: str):
+        super().__init__(f"Servidor de partidas: {estado_http} {mensaje}")
+        self.estado_http = estado_http
+        self.mensaje = mensaje
+
+
+class ClientePartidas(AlmacenPartidas):
+    def __init__(self, url: str = URL, clave: Optional[str] = CLAVE, timeout_s: float = TIMEOUT_S):
+        partes = urlsplit(url)
+        if partes.scheme not in ("http", "https") or not partes.hostname:
+            raise ValueError(f"URL del servidor de partidas no válida: {url!r}")
+        self.url = url.rstrip("/")
+        self._https = partes.scheme == "https"
+        self._host = partes.hostname
+        self._puerto = partes.port
+        self._prefijo = partes.path.rstrip("/")
+        self._cabeceras = {"Content-Type": "application/json"}
+        if clave:
+            self._cabeceras["Authorization"] = f"Bearer {clave}"
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+        # codigo -> (version, estado congelado): para contestar los 304
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------
+    # HTTP
+    # ------------------------------
+
+    def _conexion(self, idempotente: bool = True) -> Tuple[http.client.HTTPConnection, bool]:
+        """Conexión de este hilo y si ya se había usado antes."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and not idempotente and time.monotonic() - self._local.usada > REUTILIZAR_S:
+            conn.close()
+            conn = self._local.conn = None
+        if conn is not None:
+            return conn, True
+        clase = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        conn = clase(self._host, self._puerto, timeout=self.timeout_s)
+        self._local.conn = conn
+        return conn, False
+
+    def _pedir(self, metodo: str, ruta: str, datos: Any = None, cabeceras: Optional[Dict[str, str]] = None):
+        """(estado_http, cuerpo JSON o None, cabeceras de la respuesta)."""
+        cuerpo = None if datos is None else json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        todas = dict(self._cabeceras, **(cabeceras or {}))
+        idempotente = metodo == "GET"
+        while True:
+            conn, reutilizada = self._conexion(idempotente)
+            try:
+                conn.request(metodo, self._prefijo + ruta, body=cuerpo, headers=todas)
+                resp = conn.getresponse()
+                leido = resp.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # El servidor cerró la conexión inactiva: un GET se repite una vez. Una jugada
+                # no, porque puede que el servidor ya la haya aplicado y se haría dos veces
+                conn.close()
+                self._local.conn = None
+                if not (reutilizada and idempotente):
+                    raise
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                self._local.conn = None
+                raise
+
+        if resp.getheader("Connection", "").lower() == "close":
+            conn.close()
+            self._local.conn = None
+        else:
+            self._local.usada = time.monotonic()
+        respuesta = json.loads(leido) if leido else None
+        if resp.status >= 400 and resp.status != 404:
+            raise ErrorServidor(resp.status, (respuesta or {}).get("error", resp.reason))
+        return resp.status, respuesta, resp
+
+    def _ruta(self, codigo: str, operacion: str = "") -> str:
+        ruta = f"/partidas/{quote(normalizar_codigo(codigo))}"
+        return f"{ruta}/{operacion}" if operacion else ruta
+
+    def _recordar(self, codigo: str, estado: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        codigo = normalizar_codigo(codigo)
+        with self._lock:
+            if estado is None:
+                self._cache.pop(codigo, None)
+                return None
+            estado = congelar(estado)
+            self._cache[codigo] = (int(estado.get("version", 0)), estado)
+        return estado
+
+    # ------------------------------
+    # Interfaz de almacén
+    # ------------------------------
+
+    def cargar(self, codigo: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            previa = self._cache.get(normalizar_codigo(codigo))
+        cabeceras = {"If-None-Match": f'"{previa[0]}"'} if previa else None
+        estado_http, datos, _ = self._pedir("GET", self._ruta(codigo), cabeceras=cabeceras)
+        if estado_http == 304 and previa is not None:
+            return previa[1]
+        return self._recordar(codigo, datos if estado_http == 200 else None)
+
+    def guardar(self, codigo: str, estado: Dict[str, Any]) -> int:
+        raise RuntimeError("Con BIVRA_SERVIDOR las jugadas las hace el servidor (Motor.aplicar)")
+
+    def volcar(self, codigo: str, estado: Dict[str, Any], esperada: Optional[int]) -> int:
+        raise RuntimeError("Con BIVRA_SERVIDOR el servidor es quien escribe las partidas")
+
+    def existe(self, codigo: str) -> bool:
+        return self.token(codigo) is not None
+
+    def token(self, codigo: str) -> Any:
+        estado_http, datos, _ = self._pedir("GET", self._ruta(codigo, "token"))
+        return datos["version"] if estado_http == 200 else None
+
+    def codigos(self) -> List[str]:
+        return self._pedir("GET", "/partidas")[1]["codigos"]
+
+    def crear_si_no_existe(
+        self, codigo: str, estado_inicial: Optional[Callable[[], Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """El estado inicial lo crea el servidor (`estado_inicial` se ignora)."""
+        return self._recordar(codigo, self._pedir("POST", self._ruta(codigo, "crear"), {})[1])
+
+    # ------------------------------
+    # Jugadas
+    # ------------------------------
+
+    def unirse(self, codigo: str, equipo) -> Optional[Dict[str, Any]]:
+        """Estado de la partida para jugar con `equipo`, o None si no existe."""
+        estado_http, datos, _ = self._pedir("POST", self._ruta(codigo, "unirse"), {"equipo": str(equipo)})
+        return self._recordar(codigo, datos if estado_http == 200 else None)
+
+    def aplicar(self, codigo: str, accion):
+        """Ejecuta la acción en el servidor. Devuelve un motor.Resultado."""
+        from motor import Resultado, a_peticion
+
+        t0 = time.perf_counter()
+        operacion, datos = a_peticion(accion)
+        estado_http, res, _ = self._pedir("POST", self._ruta(codigo, operacion), datos)
+        if estado_http == 404:
+            return Resultado(False, f"La partida {codigo} no existe.", None, accion, time.perf_counter() - t0)
+        estado = self._recordar(codigo, res["estado"])
+        return Resultado(res["ok"], res["msg"], estado, accion, time.perf_counter() - t0, res.get("eventos", []))
@@ -0,0 +1,117 @@
+# deshacer.py
+"""
+Deshacer / rehacer jugadas de una partida.
+
+Cada jugada guardada con game_logic.actualizar_partida apunta en el propio
+estado (clave "deshacer") la diferencia INVERSA, con el formato de
+diario.diferencia:
+
+    "deshacer": {"atras":    [{"ops": [...], "msg": "..."}, ...],   # más reciente al final
+                 "adelante": [{"ops": [...], "msg": "..."}, ...]}
+
+Así se guarda con la partida (JSON o SQLite) y cualquier equipo puede volver
+atrás. Cada pila guarda como mucho PROFUNDIDAD jugadas:
+
+    BIVRA_DESHACER_PROFUNDIDAD=20    (0 = desactivado)
+
+Las diferencias comparten estructura con el estado: las listas que no cambian
+no se copian ni se guardan. Con la pila llena, cada jugada quita la más
+antigua y añade una nueva, y en el diario queda solo eso (ops "q" + "a").
+"""
+import os
+from typing import Any, Dict, List, Tuple
+
+import diario
+
+PROFUNDIDAD = int(os.environ.get("BIVRA_DESHACER_PROFUNDIDAD", "20"))
+CLAVE = "deshacer"
+# Claves que no forman parte de la jugada (las gestiona el almacén o este módulo)
+_CONTROL = ("version", CLAVE)
+
+
+def _sin_control(estado: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in estado.items() if k not in _CONTROL}
+
+
+def _pilas(estado: Dict[str, Any]) -> Tuple[List[dict], List[dict]]:
+    pilas = estado.get(CLAVE) or {}
+    return list(pilas.get("atras", [])), list(pilas.get("adelante", []))
+
+
+def _aplicar(estado: Dict[str, Any], ops: List[list]) -> Dict[str, Any]:
+    """Como diario.aplicar, pero copiando solo los contenedores del camino (no modifica `estado`)."""
+    for op in ops:
+        tipo, ruta = op[0], op[1]
+        if not ruta:
+            estado = op[2]
+            continue
+        estado = nuevo = dict(estado)
+        for k in ruta[:-1]:
+            hijo = nuevo[k]
+            hijo = dict(hijo) if isinstance(hijo, dict) else list(hijo)
+            nuevo[k] = hijo
+            nuevo = hijo
+        ultima = ruta[-1]
+        if tipo == "s":
+            nuevo[ultima] = op[2]
+        elif tipo == "d":
+            nuevo.pop(ultima, None)
+        elif tipo == "a":
+            nuevo[ultima] = list(nuevo[ultima]) + list(op[2])
+        elif tipo == "t":
+            nuevo[ultima] = nuevo[ultima][:op[2]]
+        elif tipo == "q":
+            nuevo[ultima] = nuevo[ultima][op[2]:]
+    return estado
+
+
+def registrar(anterior: Dict[str, Any], nuevo: Dict[str, Any], msg: str = "",
+              profundidad: int = PROFUNDIDAD) -> Dict[str, Any]:
+    """`nuevo` con la jugada anterior -> nuevo apuntada para deshacer (y sin rehacer pendiente)."""
+    nuevo = dict(nuevo)
+    atras, _ = _pilas(anterior)
+    if profundidad <= 0:
+        nuevo.pop(CLAVE, None)
+        return nuevo
+    ops = diario.diferencia(_sin_control(nuevo), _sin_control(anterior))
+    if ops:
+        atras = (atras + [{"ops": ops, "msg": msg}])[-profundidad:]
+    nuevo[CLAVE] = {"atras": atras, "adelante": []}
+    return nuevo
+
+
+def _mover(estado: Dict[str, Any], pasos: int, hacia_atras: bool, profundidad: int):
+    atras, adelante = _pilas(estado)
+    origen, destino = (atras, adelante) if hacia_atras else (adelante, atras)
+    if pasos < 1 or len(origen) < pasos:
+        que = "deshacer" if hacia_atras else "rehacer"
+        return estado, False, f"No hay {pasos} jugada(s) que {que} (hay {len(origen)})."
+
+    actual = _sin_control(estado)
+    msgs = []
+    for _ in range(pasos):
+        jugada = origen.pop()
+        previo = _aplicar(actual, jugada["ops"])
+        destino.append({"ops": diario.diferencia(previo, actual), "msg": jugada["msg"]})
+        actual = previo
+        msgs.append(jugada["msg"])
+
+    actual[CLAVE] = {"atras": atras[-profundidad:], "adelante": adelante[-profundidad:]}
+    verbo = "Deshecho" if hacia_atras else "Rehecho"
+    return actual, True, f"{verbo}: " + " · ".join(m or "jugada" for m in msgs)
+
+
+def deshacer(estado: Dict[str, Any], pasos: int = 1, profundidad: int = PROFUNDIDAD):
+    """Vuelve `pasos` jugadas atrás. Devuelve (nuevo_estado, ok, msg)."""
+    return _mover(estado, pasos, True, profundidad)
+
+
+def rehacer(estado: Dict[str, Any], pasos: int = 1, profundidad: int = PROFUNDIDAD):
+    """Repite `pasos` jugadas deshechas. Devuelve (nuevo_estado, ok, msg)."""
+    return _mover(estado, pasos, False, profundidad)
+
+
+def linea_temporal(estado: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(jugadas que se pueden deshacer, jugadas que se pueden rehacer), la más antigua primero."""
+    atras, adelante = _pilas(estado)
+    return [j["msg"] for j in atras], [j["msg"] for j in reversed(adelante)]
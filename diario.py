@@ -0,0 +1,286 @@
+# diario.py
+"""
+Diario de acciones (append-only) para las partidas guardadas.
+
+En vez de reescribir todo el JSON en cada acción, cada guardado añade una
+línea con la diferencia respecto al estado anterior:
+
+    partidas/<CODIGO>.json           -> instantánea completa (formato de siempre)
+    partidas/<CODIGO>.diario.jsonl   -> {"n": <secuencia>, "ops": [...]} por línea
+
+Cada COMPACTAR_CADA registros (o si el diario ya pesa más que la instantánea)
+se escribe una instantánea nueva y se vacía el diario.
+
+Las funciones de este módulo NO bloquean: quien llama debe tener el lock
+de la partida (ver game_logic.guardar_partida).
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import metricas
+
+COMPACTAR_CADA = 64
+# El diario puede crecer al menos hasta este tamaño aunque la instantánea sea pequeña
+DIARIO_MIN_BYTES = 16 * 1024
+
+# Como mucho se buscan tantos elementos quitados del principio de una lista
+# (pilas de deshacer llenas: se va la jugada más antigua y entra una nueva)
+QUITAR_MAX = 8
+
+# Clave interna de la instantánea: último nº de registro ya incluido en ella
+_CLAVE_SEQ = "_diario_seq"
+
+# Último estado conocido por partida (para calcular diferencias sin releer), LRU de
+# como mucho ULTIMO_MAX partidas (las mismas que guarda la caché de lecturas):
+# {ruta_instantanea: (token, seq, registros, fin_valido, estado_normalizado)}
+ULTIMO_MAX = int(os.environ.get("BIVRA_CACHE_PARTIDAS", "256"))
+_ULTIMO: "OrderedDict[str, Tuple[tuple, int, int, int, Dict[str, Any]]]" = OrderedDict()
+_ULTIMO_LOCK = threading.Lock()
+
+
+# ==============================
+# Diferencias
+# ==============================
+
+def diferencia(antes: Any, despues: Any, ruta: tuple = ()) -> List[list]:
+    """
+    Calcula las operaciones para pasar de `antes` a `despues`:
+    - ["s", ruta, valor]  -> asignar
+    - ["d", ruta]         -> borrar clave
+    - ["a", ruta, items]  -> añadir al final de una lista (mazos, jugadas...)
+    - ["t", ruta, n]      -> dejar los n primeros elementos de una lista (deshacer jugadas)
+    - ["q", ruta, n]      -> quitar los n primeros elementos de una lista (va con un "a")
+    """
+    if antes is despues:
+        # Estructura compartida entre estados (ver game_logic._con_zonas): sin cambios
+        return []
+    if isinstance(antes, dict) and isinstance(despues, dict):
+        ops = []
+        for k in antes:
+            if k not in despues:
+                ops.append(["d", [*ruta, k]])
+        for k, v in despues.items():
+            if k not in antes:
+                ops.append(["s", [*ruta, k], v])
+            else:
+                ops.extend(diferencia(antes[k], v, (*ruta, k)))
+        return ops
+
+    if isinstance(antes, list) and isinstance(despues, list):
+        n = len(antes)
+        if len(despues) >= n and despues[:n] == antes:
+            return [["a", list(ruta), despues[n:]]] if len(despues) > n else []
+        if len(despues) < n and antes[:len(despues)] == despues:
+            return [["t", list(ruta), len(despues)]]
+        k = _quitados(antes, despues)
+        if k:
+            ops = [["q", list(ruta), k]]
+            if len(despues) > n - k:
+                ops.append(["a", list(ruta), despues[n - k:]])
+            return ops
+        return [["s", list(ruta), despues]]
+
+    if type(antes) is not type(despues) or antes != despues:
+        return [["s", list(ruta), despues]]
+    return []
+
+
+def _quitados(antes: list, despues: list) -> int:
+    """k si `despues` es `antes` sin sus k primeros elementos (y quizá otros al final); si no, 0."""
+    if not despues:
+        return 0
+    n = len(antes)
+    for k in range(1, min(n, QUITAR_MAX + 1)):
+        if antes[k] == despues[0] and despues[:n - k] == antes[k:]:
+            return k
+    return 0
+
+
+def aplicar(estado: Any, ops: List[list]) -> Any:
+    """Aplica las operaciones de `diferencia` (modifica `estado`) y lo devuelve."""
+    for op in ops:
+        tipo, ruta = op[0], op[1]
+        if not ruta:
+            # Reemplazo completo (p. ej. "Reiniciar partida")
+            estado = op[2]
+            continue
+
+        padre = estado
+        for k in ruta[:-1]:
+            padre = padre[k]
+        ultima = ruta[-1]
+
+        if tipo == "s":
+            padre[ultima] = op[2]
+        elif tipo == "d":
+            padre.pop(ultima, None)
+        elif tipo == "a":
+            padre[ultima].extend(op[2])
+        elif tipo == "t":
+            del padre[ultima][op[2]:]
+        elif tipo == "q":
+            del padre[ultima][:op[2]]
+    return estado
+
+
+# ==============================
+# Lectura
+# ==============================
+
+def token(path_snap: Path, path_diario: Path) -> tuple:
+    """Identifica la versión en disco (mtime/tamaño) sin leer los archivos."""
+    try:
+        st_snap = path_snap.stat()
+    except FileNotFoundError:
+        return (None,)
+    try:
+        tam_diario = path_diario.stat().st_size
+    except FileNotFoundError:
+        tam_diario = 0
+    return (st_snap.st_mtime_ns, st_snap.st_size, tam_diario)
+
+
+def _leer(path_snap: Path, path_diario: Path) -> Optional[Tuple[Dict[str, Any], int, int, int]]:
+    """
+    Devuelve (estado, seq, registros_en_diario, fin_valido) o None si no hay instantánea.
+    `fin_valido` es el nº de bytes del diario que se pudieron leer enteros
+    (una última línea cortada por un corte de luz se ignora).
+    """
+    if not path_snap.exists():
+        return None
+    texto = path_snap.read_text(encoding="utf-8")
+    metricas.sumar("archivo.lecturas")
+    metricas.sumar("archivo.bytes_leidos", len(texto))
+    estado = json.loads(texto)
+    seq = int(estado.pop(_CLAVE_SEQ, 0))
+
+    registros = 0
+    fin_valido = 0
+    if path_diario.exists():
+        with path_diario.open("rb") as f:
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break
+                try:
+                    reg = json.loads(linea)
+                except ValueError:
+                    break
+                fin_valido += len(linea)
+                metricas.sumar("archivo.bytes_leidos", len(linea))
+                if reg["n"] <= seq:
+                    # Ya incluido en la instantánea (compactación interrumpida)
+                    continue
+                estado = aplicar(estado, reg["ops"])
+                seq = reg["n"]
+                registros += 1
+
+    return estado, seq, registros, fin_valido
+
+
+def cargar(path_snap: Path, path_diario: Path) -> Optional[Dict[str, Any]]:
+    """Reconstruye el estado: última instantánea + cola del diario."""
+    leido = _leer(path_snap, path_diario)
+    if leido is None:
+        return None
+    return leido[0]
+
+
+# ==============================
+# Escritura
+# ==============================
+
+def _escribir_instantanea(path_snap: Path, path_diario: Path, estado: Dict[str, Any], seq: int) -> None:
+    datos = dict(estado)
+    datos[_CLAVE_SEQ] = seq
+    tmp = path_snap.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+        metricas.sumar("archivo.escrituras")
+        metricas.sumar("archivo.bytes_escritos", f.tell())
+    tmp.replace(path_snap)  # escritura atómica
+
+    # Si se corta aquí, los registros del diario tienen n <= seq y se ignoran
+    with path_diario.open("wb"):
+        pass
+
+
+def _ultimo(path_snap: Path, path_diario: Path) -> Optional[Tuple[tuple, int, int, int, Dict[str, Any]]]:
+    """(token, seq, registros, fin_valido, estado) del último guardado, o None si no hay partida."""
+    clave = str(path_snap)
+    actual = token(path_snap, path_diario)
+    with _ULTIMO_LOCK:
+        memo = _ULTIMO.get(clave)
+        if memo is not None and memo[0] == actual:
+            _ULTIMO.move_to_end(clave)
+            return memo
+
+    leido = _leer(path_snap, path_diario)
+    if leido is None:
+        with _ULTIMO_LOCK:
+            _ULTIMO.pop(clave, None)
+        return None
+    estado, seq, registros, fin_valido = leido
+    memo = (actual, seq, registros, fin_valido, estado)
+    _recordar(clave, memo)
+    return memo
+
+
+def _recordar(clave: str, memo: Tuple[tuple, int, int, int, Dict[str, Any]]) -> None:
+    """Guarda el memo de una partida y olvida las menos usadas por encima de ULTIMO_MAX."""
+    with _ULTIMO_LOCK:
+        _ULTIMO[clave] = memo
+        _ULTIMO.move_to_end(clave)
+        while len(_ULTIMO) > ULTIMO_MAX:
+            _ULTIMO.popitem(last=False)
+
+
+def leer_ultimo(path_snap: Path, path_diario: Path) -> Optional[Dict[str, Any]]:
+    """Último estado guardado (sin releer disco si no ha cambiado). No modificar."""
+    memo = _ultimo(path_snap, path_diario)
+    return None if memo is None else memo[4]
+
+
+def guardar(path_snap: Path, path_diario: Path, estado: Dict[str, Any]) -> None:
+    """Añade al diario la diferencia con el último estado guardado (o compacta)."""
+    clave = str(path_snap)
+    nuevo = json.loads(json.dumps(estado, ensure_ascii=False))  # claves/tipos como en disco
+
+    memo = _ultimo(path_snap, path_diario)
+    if memo is None:
+        _escribir_instantanea(path_snap, path_diario, nuevo, 0)
+        _recordar(clave, (token(path_snap, path_diario), 0, 0, 0, nuevo))
+        return
+    token_previo, seq, registros, fin_valido, anterior = memo
+
+    ops = diferencia(anterior, nuevo)
+    if not ops:
+        return
+
+    seq += 1
+    linea = json.dumps({"n": seq, "ops": ops}, ensure_ascii=False, separators=(",", ":")) + "\n"
+    datos = linea.encode("utf-8")
+
+    if registros + 1 >= COMPACTAR_CADA or fin_valido + len(datos) > max(token_previo[1], DIARIO_MIN_BYTES):
+        _escribir_instantanea(path_snap, path_diario, nuevo, seq)
+        _recordar(clave, (token(path_snap, path_diario), seq, 0, 0, nuevo))
+        return
+
+    with path_diario.open("ab") as f:
+        if f.tell() != fin_valido:
+            # Quita una línea a medias de un guardado interrumpido
+            f.truncate(fin_valido)
+            f.seek(fin_valido)
+        f.write(datos)
+        f.flush()
+        os.fsync(f.fileno())
+    metricas.sumar("archivo.escrituras")
+    metricas.sumar("archivo.bytes_escritos", len(datos))
+
+    _recordar(clave, (token(path_snap, path_diario), seq, registros + 1, fin_valido + len(datos), nuevo))
+
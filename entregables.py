@@ -1,7 +1,7 @@
 # entregables.py
 from pathlib import Path
 
-def cargar_entregables_desde_txt(ruta="relacionesentregables.txt"):
+def cargar_entregables_desde_txt(ruta=Path(__file__).resolve().parent / "relacionesentregables.txt"):
     entregables = {}
     ruta = Path(ruta)
 
@@ -0,0 +1,160 @@
+# estaticos.py
+"""
+Imágenes de cartas servidas como URLs estáticas con cache HTTP.
+
+st.image(ruta) vuelve a subir los bytes de cada carta por el media manager
+de Streamlit en cada rerun. Con BIVRA_ESTATICOS=1 se arranca (una vez por
+proceso) un servidor HTTP mínimo que sirve las miniaturas y las imágenes
+originales con nombre = hash del contenido y
+
+    Cache-Control: public, max-age=31536000, immutable
+
+así el navegador descarga cada carta una sola vez. Si una imagen cambia,
+cambia su hash y por tanto su URL.
+
+    BIVRA_ESTATICOS=1                 activa el modo
+    BIVRA_ESTATICOS_HOST=127.0.0.1    interfaz (0.0.0.0 para servir a otras máquinas)
+    BIVRA_ESTATICOS_PUERTO=8502       puerto del servidor
+    BIVRA_ESTATICOS_URL=http://...    URL pública (si hay proxy delante)
+
+Sin índice de miniaturas (python miniaturas.py) o con el modo desactivado,
+fuente_imagen() devuelve la ruta local de siempre.
+"""
+import os
+import re
+import threading
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+import activos
+import metricas
+import miniaturas
+
+ACTIVO = os.environ.get("BIVRA_ESTATICOS", "0").strip().lower() in ("1", "true", "si", "sí")
+HOST = os.environ.get("BIVRA_ESTATICOS_HOST", "127.0.0.1")
+PUERTO = int(os.environ.get("BIVRA_ESTATICOS_PUERTO", "8502"))
+URL_BASE = (os.environ.get("BIVRA_ESTATICOS_URL") or f"http://localhost:{PUERTO}").rstrip("/")
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+_NOMBRE_VALIDO = re.compile(r"^[0-9a-f]{16}(_\d+)?\.(webp|jpg|jpeg|png)$")
+_TIPOS = {".webp": "image/webp", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+_SERVIDOR: Optional[ThreadingHTTPServer] = None
+_SERVIDOR_INTENTADO = False
+_SERVIDOR_LOCK = threading.Lock()
+# {"<hash>.<ext>" -> ruta original}, para las imágenes sin miniatura
+_ORIGINALES: Optional[Dict[str, Path]] = None
+
+
+def _originales() -> Dict[str, Path]:
+    global _ORIGINALES
+    if _ORIGINALES is None:
+        _ORIGINALES = {
+            f"{h}{Path(rel).suffix.lower()}": miniaturas.BASE_DIR / rel
+            for rel, h in miniaturas.cargar_indice().items()
+        }
+        for _p, _n, _id, rel, _tam, hash_img in activos.cargar_manifiesto().cartas:
+            _ORIGINALES.setdefault(f"{hash_img}{Path(rel).suffix.lower()}", activos.BASE_DIR / rel)
+    return _ORIGINALES
+
+
+def _resolver(nombre: str) -> Optional[Path]:
+    if not _NOMBRE_VALIDO.match(nombre):
+        return None
+    if "_" in nombre:
+        return miniaturas.MINIATURAS_DIR / nombre
+    return _originales().get(nombre)
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._servir(con_cuerpo=True)
+
+    def do_HEAD(self):
+        self._servir(con_cuerpo=False)
+
+    def _servir(self, con_cuerpo: bool) -> None:
+        nombre = self.path.split("?", 1)[0].rsplit("/", 1)[-1]
+        ruta = _resolver(nombre)
+        etag = f'"{nombre}"'
+
+        if ruta is None or not ruta.is_file():
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        # El nombre ya es el hash: si el navegador lo tiene, no ha cambiado
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            self.end_headers()
+            return
+
+        datos = ruta.read_bytes()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", _TIPOS.get(ruta.suffix.lower(), "application/octet-stream"))
+        self.send_header("Content-Length", str(len(datos)))
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if con_cuerpo:
+            self.wfile.write(datos)
+            metricas.sumar("imagenes.servidas")
+            metricas.sumar("imagenes.bytes_servidos", len(datos))
+
+    def log_message(self, *_args):
+        pass
+
+
+def arrancar_servidor(puerto: int = PUERTO, host: str = HOST) -> Optional[ThreadingHTTPServer]:
+    """Arranca el servidor en segundo plano (una vez por proceso)."""
+    global _SERVIDOR, _SERVIDOR_INTENTADO
+    with _SERVIDOR_LOCK:
+        if _SERVIDOR is None and not _SERVIDOR_INTENTADO:
+            _SERVIDOR_INTENTADO = True
+            try:
+                _SERVIDOR = ThreadingHTTPServer((host, puerto), _Manejador)
+            except OSError:
+                # Puerto ocupado: otra réplica en esta máquina ya sirve lo mismo
+                return None
+            _SERVIDOR.daemon_threads = True
+            threading.Thread(target=_SERVIDOR.serve_forever, name="bivra-estaticos", daemon=True).start()
+        return _SERVIDOR
+
+
+def url_carta(ruta, ancho: Optional[int] = None) -> Optional[str]:
+    """URL con hash de la miniatura (o del original si no hay); None si la imagen no está indexada."""
+    hash_img = miniaturas.hash_imagen(ruta)
+    if hash_img is None:
+        return None
+    destino = None if ancho is None else miniaturas.miniatura(ruta, ancho)
+    if destino is None:
+        # Sin miniatura generada: el original, también por hash
+        return f"{URL_BASE}/{hash_img}{Path(str(ruta)).suffix.lower()}"
+    return f"{URL_BASE}/{destino.name}"
+
+
+@lru_cache(maxsize=4096)
+def _tamano(ruta: str) -> int:
+    try:
+        return os.path.getsize(ruta)
+    except OSError:
+        return 0
+
+
+@metricas.medido()
+def fuente_imagen(ruta, ancho: int) -> str:
+    """Lo que hay que pasar a st.image: URL estática si el modo está activo, si no la ruta local."""
+    if ACTIVO and ruta is not None:
+        url = url_carta(ruta, ancho)
+        if url is not None:
+            arrancar_servidor()
+            return url
+    local = miniaturas.ruta_miniatura(ruta, ancho)
+    # Streamlit vuelve a enviar estos bytes en cada rerun (con URL estática los cachea el navegador)
+    metricas.sumar("imagenes.locales")
+    metricas.sumar("imagenes.bytes_locales", _tamano(str(local)))
+    return local
@@ -1,7 +1,7 @@
 # fusiones.py
 import os
 
-RUTA_TXT = "relacionescartas.txt"
+RUTA_TXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "relacionescartas.txt")
 
 def cargar_fusiones_desde_txt():
     fusiones = {}
@@ -3,6 +3,12 @@ import os
 import random
 import re
 import fusiones
+import activos
+import reglas
+import deshacer
+from mazo import Mazo, id_carta
+from metricas import medido
+from entregables import ENTREGABLES
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -13,12 +19,8 @@ IMG_DIR = os.path.join(BASE_DIR, "imagenes")
 # Utilidades
 # ==============================
 def _extraer_id_carta(x):
-    if x is None:
-        return None
-    s = str(x)
-    base = os.path.basename(s)          # "85.jpg" aunque venga ruta completa
-    m = re.search(r"(\d+)", base)       # pilla el número
-    return int(m.group(1)) if m else None
+    # "85.jpg" aunque venga ruta completa; memoizado en mazo.id_carta
+    return id_carta(x)
 
 
 
@@ -46,40 +48,73 @@ def natural_key(text):
     return [int(c) if c.isdigit() else c for c in re.split(r"(\d+)", text)]
 
 
+# Versión del formato del estado guardado:
+#   1 (sin "esquema") -> rutas absolutas de imágenes en mazos/proyectos/entregables/historial
+#   2                 -> solo IDs enteros por zona; las rutas se resuelven al pintar (ruta_carta)
+#   3                 -> + "semilla" de la partida y registro de "jugadas"; sin "historial"
+ESQUEMA = 3
+# Zonas {equipo -> [ids]} del estado
+ZONAS_EQUIPO = ("mazos", "proyectos", "entregables", "proyectos_finales")
+# Zonas donde cada carta aparece una sola vez
+_ZONAS_SIN_DUPLICADOS = ("proyectos", "proyectos_finales")
+
+
+def _a_ids(lista, sin_duplicados=False):
+    ids = [cid for cid in (id_carta(x) for x in lista) if cid is not None]
+    return list(dict.fromkeys(ids)) if sin_duplicados else ids
+
+
 def normalizar_estado(estado):
     estado.setdefault("ronda", 0)
-    estado.setdefault("historial", [])
+    estado.setdefault("pilas", {})
     estado.setdefault("mazos", {"1": [], "2": []})
     estado.setdefault("proyectos", {})
     estado.setdefault("proyectos_asignados", {})
     estado.setdefault("entregables", {"1": [], "2": []})
     estado.setdefault("finalizado", False)
 
-    # ✅ Migración: convertir proyectos a IDs int (por si hay rutas antiguas)
-    proyectos = estado.get("proyectos", {})
-    if isinstance(proyectos, dict):
-        for eq, lista in proyectos.items():
-            if not isinstance(lista, list):
-                continue
-            nueva = []
-            for x in lista:
-                if isinstance(x, int):
-                    nueva.append(x)
-                else:
-                    pid = extraer_id(x)
-                    if pid is not None:
-                        nueva.append(pid)
-            # sin duplicados
-            proyectos[eq] = list(dict.fromkeys(nueva))
+    # ✅ Migración al esquema compacto: rutas -> IDs int en todas las zonas
+    # (se crean dicts/listas nuevos: el estado puede venir de la cache, de solo lectura)
+    if estado.get("esquema") != ESQUEMA:
+        for zona in ZONAS_EQUIPO:
+            por_equipo = estado.get(zona, {})
+            if isinstance(por_equipo, dict):
+                estado[zona] = {
+                    eq: _a_ids(lista, zona in _ZONAS_SIN_DUPLICADOS) if isinstance(lista, list) else lista
+                    for eq, lista in por_equipo.items()
+                }
+        if "historial" in estado:
+            estado["historial"] = _a_ids(estado["historial"])
+        estado["pilas"] = {p: _a_ids(pila) for p, pila in estado["pilas"].items()}
+        # Partidas anteriores a las semillas: tienen una desde ahora, pero sin "jugadas"
+        # no se pueden reproducir desde el principio
+        estado.setdefault("semilla", nueva_semilla())
+        estado["esquema"] = ESQUEMA
 
     return estado
 
 
+def migrar_partidas(simular=False):
+    """
+    Pasa TODAS las partidas guardadas al esquema compacto (una vez, tras actualizar).
+    Devuelve los códigos migrados. Con `simular=True` solo los cuenta.
+    """
+    migradas = []
+    for codigo in obtener_almacen().codigos():
+        estado = cargar_partida(codigo)
+        if estado is None or estado.get("esquema") == ESQUEMA:
+            continue
+        if not simular:
+            actualizar_partida(codigo, lambda e: (normalizar_estado(dict(e)), True, ""), con_deshacer=False)
+        migradas.append(codigo)
+    return migradas
+
+
 
 def cargar_proyectos_desde_txt():
     proyectos = {}
 
-    with open("relacionesproyectos.txt", "r", encoding="utf-8") as f:
+    with open(os.path.join(BASE_DIR, "relacionesproyectos.txt"), "r", encoding="utf-8") as f:
         for linea in f:
             linea = linea.strip()
             if not linea or ":" not in linea:
@@ -102,17 +137,38 @@ def cargar_proyectos_desde_txt():
 PROYECTOS = cargar_proyectos_desde_txt()
 FUSIONES_PAQUETES = _normalizar_fusiones(fusiones.FUSIONES_PAQUETES)
 
+# Grafo de reglas compilado una vez: índices inversos + búsqueda exacta por frozenset
+REGLAS = reglas.GrafoReglas(FUSIONES_PAQUETES, ENTREGABLES, PROYECTOS)
+
 # ==============================
 # Inicialización
 # ==============================
 
-def inicializar_juego():
+def nueva_semilla() -> int:
+    return random.SystemRandom().getrandbits(32)
+
+
+def rng_partida(estado) -> random.Random:
+    """
+    Generador de la partida para la ronda actual: depende solo de la semilla y
+    de la ronda, así que reproducir las mismas jugadas da las mismas cartas
+    (y no hace falta guardar el estado interno del generador).
+    """
+    return random.Random(f"{estado['semilla']}:{estado['ronda']}")
+
+
+def inicializar_juego(semilla=None):
     return {
         "ronda": 0,
-        "historial": [],
+        "esquema": ESQUEMA,
+        "semilla": nueva_semilla() if semilla is None else int(semilla),
+        # Registro compacto de jugadas para reproducir la partida (ver motor.reproducir)
+        "jugadas": [],
+        "pilas": {},
         "mazos": {"1": [], "2": []},
         "proyectos": {},
         "proyectos_asignados": {},
+        "entregables": {"1": [], "2": []},
         "finalizado": False,
     }
 
@@ -121,7 +177,36 @@ def inicializar_juego():
 # Carga estructura
 # ==============================
 
+# {proyecto -> carpeta de paquetes}: se busca en disco una vez por proyecto
+_CARPETAS_PAQUETES = {}
+
+
+def _carpeta_paquetes(proyecto_id) -> str:
+    """Entregables/<carpeta de paquetes>: "Paquete trabajo" o "Paquetes trabajo" según el proyecto."""
+    clave = str(proyecto_id)
+    carpeta = _CARPETAS_PAQUETES.get(clave)
+    if carpeta is not None:
+        return carpeta
+    entregables = os.path.join(IMG_DIR, "Proyectos", clave, "Entregables")
+    carpeta = os.path.join(entregables, "Paquete trabajo")
+    if os.path.isdir(entregables):
+        for nombre in sorted(os.listdir(entregables)):
+            if nombre.lower().startswith("paquete") and os.path.isdir(os.path.join(entregables, nombre)):
+                carpeta = os.path.join(entregables, nombre)
+                break
+    _CARPETAS_PAQUETES[clave] = carpeta
+    return carpeta
+
+
+@medido()
 def cargar_estructura_proyecto():
+    # Con manifiesto (python activos.py) no se recorre el disco
+    if activos.hay_manifiesto():
+        return {
+            str(pid): {"actividades": list(activos.listar(pid, "actividad").values())}
+            for pid in activos.proyectos()
+        }
+
     base_path = os.path.join(IMG_DIR, "Proyectos")
 
     if not os.path.exists(base_path):
@@ -134,12 +219,10 @@ def cargar_estructura_proyecto():
             continue
 
         actividades = []
-        ruta_actividades = os.path.join(
-            ruta_proyecto, "Entregables", "Paquete trabajo", "Actividades"
-        )
+        ruta_actividades = os.path.join(_carpeta_paquetes(pid), "Actividades")
 
         if os.path.exists(ruta_actividades):
-            for f in os.listdir(ruta_actividades):
+            for f in sorted(os.listdir(ruta_actividades)):
                 if f.lower().endswith(".jpg"):
                     actividades.append(os.path.join(ruta_actividades, f))
 
@@ -152,15 +235,12 @@ def cargar_estructura_proyecto():
 
 
 # ==============================
-# Agrupaciones (placeholder)
+# Agrupaciones
 # ==============================
 
 def generar_diccionario_agrupaciones(estructura):
-    return {
-        "actividades_a_paquete": {},
-        "paquetes_a_entregable": {},
-        "entregables_a_proyecto": {},
-    }
+    """Índices inversos del grafo de reglas (id -> recetas de nivel superior que lo usan)."""
+    return REGLAS.agrupaciones()
 
 
 # ==============================
@@ -195,59 +275,112 @@ def fusionar_cartas(mazo, agrupaciones):
 # Ronda
 # ==============================
 
+# Cartas que roba cada equipo por ronda
+CARTAS_POR_RONDA = 4
+# Últimas cartas robadas que se guardan en "historial" (solo para consulta; 0 = no guardar).
+# Con la semilla y las jugadas la partida se puede reconstruir, así que por defecto no se guarda.
+HISTORIAL_MAX = int(os.environ.get("BIVRA_HISTORIAL_MAX", "0"))
+
+
+def _nueva_pila(rng, actividades, excluir=()):
+    """Pila de robo barajada con `rng` (se roba del final) sin las cartas de `excluir`."""
+    excluir = set(excluir)
+    # Ordenada antes de barajar: el orden de `actividades` depende de cómo se cargó la
+    # estructura (os.listdir o manifiesto) y la misma semilla debe dar las mismas cartas
+    pila = sorted(a for a in actividades if a not in excluir)
+    rng.shuffle(pila)
+    return pila
+
+
+def robar(estado, proyecto, actividades, n=CARTAS_POR_RONDA, rng=None):
+    """
+    Roba hasta `n` cartas de la pila del proyecto (estado["pilas"][proyecto]).
+
+    - Cada robo es un pop() del final: O(1) por carta.
+    - Si la pila está vacía al empezar, se vuelve a barajar el proyecto entero
+      (nueva vuelta) y se roba de ella. Si quedan menos de `n`, se roban las
+      que queden y la siguiente ronda baraja.
+    - Partidas antiguas sin pila: se crea con las cartas que no están en el historial.
+
+    Devuelve (robadas, rebarajado). Modifica estado["pilas"] (ya copiado por el llamador).
+    """
+    rng = rng or rng_partida(estado)
+    proyecto = str(proyecto)
+    pilas = estado["pilas"]
+    rebarajado = False
+    if proyecto not in pilas:
+        pilas[proyecto] = _nueva_pila(rng, actividades, estado.get("historial", []))
+    pila = pilas[proyecto] = list(pilas[proyecto])
+    if not pila:
+        pila = pilas[proyecto] = _nueva_pila(rng, actividades)
+        rebarajado = True
+
+    robadas = [pila.pop() for _ in range(min(n, len(pila)))]
+    return robadas, rebarajado
+
+
+@medido()
 def siguiente_ronda(estado, estructura, agrupaciones):
     estado = normalizar_estado(estado.copy())
     eventos = []
+    estado["ronda"] += 1
+    # Todo el azar de la ronda sale del generador de la partida (semilla + ronda)
+    rng = rng_partida(estado)
 
     # Asignar proyectos si no existen
     if not estado["proyectos_asignados"]:
-        proyectos = list(estructura.keys())
+        proyectos = sorted(estructura, key=lambda p: (len(str(p)), str(p)))
         estado["proyectos_asignados"] = {
-            "1": random.choice(proyectos),
-            "2": random.choice(proyectos),
+            "1": rng.choice(proyectos),
+            "2": rng.choice(proyectos),
         }
 
-    estado["ronda"] += 1
+    # Listas nuevas: no se modifica el estado recibido (puede ser de solo lectura)
+    estado["mazos"] = {eq: list(m) for eq, m in estado["mazos"].items()}
+    estado["pilas"] = dict(estado.get("pilas", {}))
+    robadas_ronda = []
 
     for equipo, proyecto in estado["proyectos_asignados"].items():
-        actividades = estructura.get(proyecto, {}).get("actividades", [])
-
-        disponibles = [a for a in actividades if a not in estado["historial"]]
-        if not disponibles:
-            disponibles = actividades.copy()
+        actividades = _a_ids(estructura.get(proyecto, {}).get("actividades", []))
+        if not actividades:
+            continue
 
-        if disponibles:
-            robadas = random.sample(disponibles, min(4, len(disponibles)))
+        # Equipos con el mismo proyecto comparten pila (como antes compartían historial)
+        robadas, rebarajado = robar(estado, proyecto, actividades, rng=rng)
+        if rebarajado:
+            eventos.append(f"Se vuelven a barajar las cartas del proyecto {proyecto}")
+        if robadas:
             estado["mazos"][equipo].extend(robadas)
-            estado["historial"].extend(robadas)
+            robadas_ronda.extend(robadas)
             eventos.append(f"Equipo {equipo} roba {len(robadas)} cartas")
 
+    # Historial: registro acotado de lo robado (ya no se usa para decidir qué robar)
+    if HISTORIAL_MAX > 0:
+        estado["historial"] = (list(estado.get("historial", [])) + robadas_ronda)[-HISTORIAL_MAX:]
+    elif "historial" in estado:
+        estado.pop("historial")
+
     return estado, eventos
 
 
 
 def obtener_id_carta(ruta):
     """
-    Extrae el ID numérico de una carta desde la ruta de la imagen
+    Extrae el ID numérico de una carta desde la ruta de la imagen (o el propio ID)
     """
-    return int(ruta.split("/")[-1].replace(".jpg", ""))
+    return id_carta(ruta)
 
 
+@medido()
 def fusiones_disponibles(mazo):
     """
     Devuelve una lista de paquetes que pueden fusionarse con el mazo actual
     """
-    ids_mazo = {obtener_id_carta(c) for c in mazo}
-    disponibles = []
-
-    for paquete_id, actividades in FUSIONES_PAQUETES.items():
-        if set(actividades).issubset(ids_mazo):
-            disponibles.append({
-                "paquete": paquete_id,
-                "actividades": actividades
-            })
-
-    return disponibles
+    mazo = Mazo.desde_json(mazo)
+    return [
+        {"paquete": paquete_id, "actividades": FUSIONES_PAQUETES[paquete_id]}
+        for paquete_id in REGLAS.disponibles_mascara("paquete", mazo.mascara)
+    ]
 
 
 def proyecto_asignado(estado, equipo):
@@ -255,12 +388,12 @@ def proyecto_asignado(estado, equipo):
 
 
 def ruta_paquete(paquete_id, proyecto_id):
+    # Primero el almacén de activos (cada imagen una sola vez); si no, imagenes/
+    ruta = activos.ruta_activo(proyecto_id, "paquete", paquete_id)
+    if ruta:
+        return ruta
     return os.path.join(
-        IMG_DIR,
-        "Proyectos",
-        str(proyecto_id),
-        "Entregables",
-        "Paquete trabajo",
+        _carpeta_paquetes(proyecto_id),
         f"{int(paquete_id)}.jpg",   # ✅ NO "paquete_{id}.jpg"
     )
 
@@ -275,6 +408,9 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent  # carpeta TFG (donde están los scripts)
 
 def ruta_proyecto(proyecto_id: int) -> str | None:
+    ruta = activos.ruta_activo(proyecto_id, "proyecto", proyecto_id)
+    if ruta:
+        return ruta
     # tus proyectos están aquí: imagenes/Proyectos/<id>/<id>.<ext>
     for ext in ("jpg", "png", "jpeg", "webp"):
         rel = f"imagenes/Proyectos/{proyecto_id}/{proyecto_id}.{ext}"
@@ -283,6 +419,38 @@ def ruta_proyecto(proyecto_id: int) -> str | None:
     return None
 
 
+def ruta_entregable(entregable_id, proyecto_id) -> str:
+    ruta = activos.ruta_activo(proyecto_id, "entregable", entregable_id)
+    if ruta:
+        return ruta
+    return os.path.join(IMG_DIR, "Proyectos", str(proyecto_id), "Entregables", f"{int(entregable_id)}.jpg")
+
+
+def ruta_actividad(actividad_id, proyecto_id) -> str | None:
+    return catalogo_actividades_proyecto(proyecto_id).get(int(actividad_id))
+
+
+@medido()
+def ruta_carta(nivel: str, carta, proyecto_id) -> str | None:
+    """
+    Imagen de una carta del estado (ID; o ruta de partidas antiguas) para pintarla.
+    nivel: "actividad" | "paquete" | "entregable" | "proyecto"
+    """
+    cid = id_carta(carta)
+    if cid is None:
+        return None
+    if nivel == "actividad":
+        return ruta_actividad(cid, proyecto_id)
+    if nivel == "paquete":
+        return ruta_paquete(cid, proyecto_id)
+    if nivel == "entregable":
+        return ruta_entregable(cid, proyecto_id)
+    if nivel == "proyecto":
+        ruta = ruta_proyecto(cid)
+        return str(BASE_DIR / ruta) if ruta else None
+    raise ValueError(f"Nivel desconocido: {nivel}")
+
+
 
 def aplicar_fusion(estado, equipo, paquete_id):
     """
@@ -304,47 +472,44 @@ def aplicar_fusion(estado, equipo, paquete_id):
 
     return estado
 
+def _con_zonas(estado, cambios):
+    """
+    Estado nuevo con `cambios` {(zona, equipo): lista} aplicados. Solo se copian
+    el dict de nivel superior y el de cada zona tocada; el resto (historial,
+    pilas, zonas del otro equipo...) se comparte con `estado`, que no se modifica.
+    Las transiciones nunca modifican listas en sitio, así que compartir es seguro.
+    """
+    nuevo = dict(estado)
+    for (zona, equipo), valor in cambios.items():
+        por_equipo = dict(nuevo.get(zona) or {})
+        por_equipo[equipo] = valor
+        nuevo[zona] = por_equipo
+    return nuevo
+
+
 def ejecutar_fusion(estado, equipo, paquete_id):
     """
     Aplica una fusión válida:
     - elimina del mazo las actividades usadas
-    - añade el paquete completado a estado["proyectos"][equipo] (como RUTA)
+    - añade el paquete completado a estado["proyectos"][equipo] (como ID)
     Devuelve: (nuevo_estado, ok)
     """
-    nuevo_estado = copy.deepcopy(estado)
     equipo = str(equipo)
     paquete_id = int(paquete_id)
 
-    req = FUSIONES_PAQUETES.get(paquete_id)
-    if not req:
+    requisito = REGLAS.mascaras["paquete"].get(paquete_id)
+    if not requisito:
         return estado, False
 
-    # 🔑 Normaliza siempre a ints (evita que no borre cartas)
-    try:
-        actividades_necesarias = {int(x) for x in req}
-    except Exception:
-        actividades_necesarias = set(req)
-
-    nuevo_estado.setdefault("mazos", {})
-    nuevo_estado["mazos"].setdefault(equipo, [])
-
     # 🔑 Borra cartas usadas
-    nuevo_estado["mazos"][equipo] = [
-        c for c in nuevo_estado["mazos"][equipo]
-        if _extraer_id_carta(c) not in actividades_necesarias
-    ]
+    mazo = Mazo(estado.get("mazos", {}).get(equipo, [])).quitar(requisito).a_json()
 
-    # Proyecto asignado (debe existir en tu estado)
-    proyecto_id = proyecto_asignado(estado, equipo)
-    ruta = ruta_paquete(paquete_id, proyecto_id)
+    # Guarda el paquete como ID (la UI resuelve la imagen con ruta_carta)
+    paquetes = list(estado.get("proyectos", {}).get(equipo, []))
+    if paquete_id not in paquetes:
+        paquetes.append(paquete_id)
 
-    # Guarda el paquete como RUTA (tu UI lo muestra directo)
-    nuevo_estado.setdefault("proyectos", {})
-    nuevo_estado["proyectos"].setdefault(equipo, [])
-    if ruta not in nuevo_estado["proyectos"][equipo]:
-        nuevo_estado["proyectos"][equipo].append(ruta)
-
-    return nuevo_estado, True
+    return _con_zonas(estado, {("mazos", equipo): mazo, ("proyectos", equipo): paquetes}), True
 
 
 
@@ -367,57 +532,32 @@ def extraer_id(ruta):
 
 
 
-from entregables import ENTREGABLES
-
+@medido()
 def entregables_disponibles(paquetes_del_equipo):
-    ids_paquetes = {extraer_id_desde_ruta(p) for p in paquetes_del_equipo}
-    posibles = []
-
-    for entregable_id, paquetes_necesarios in ENTREGABLES.items():
-        if paquetes_necesarios.issubset(ids_paquetes):
-            posibles.append(entregable_id)
-
-    return posibles
+    return REGLAS.disponibles_mascara("entregable", Mazo.desde_json(paquetes_del_equipo).mascara)
 
 
 def ejecutar_entregable(estado, equipo, entregable_id):
-    nuevo_estado = copy.deepcopy(estado)
     equipo = str(equipo)
     entregable_id = int(entregable_id)
 
-    paquetes_necesarios = ENTREGABLES.get(entregable_id)
-    if not paquetes_necesarios:
+    requisito = REGLAS.mascaras["entregable"].get(entregable_id)
+    if not requisito:
         return estado, False
 
-    # paquetes del equipo (son rutas)
-    paquetes_equipo = nuevo_estado["proyectos"].get(equipo, [])
-
-    # 🔑 convertir rutas a IDs
-    ids_paquetes_equipo = {extraer_id_desde_ruta(p) for p in paquetes_equipo}
+    # paquetes del equipo (IDs)
+    paquetes_equipo = Mazo(estado.get("proyectos", {}).get(equipo, []))
 
     # comprobar requisitos
-    if not set(paquetes_necesarios).issubset(ids_paquetes_equipo):
+    if not paquetes_equipo.contiene(requisito):
         return estado, False
 
-    # eliminar paquetes usados
-    nuevo_estado["proyectos"][equipo] = [
-        p for p in paquetes_equipo
-        if extraer_id_desde_ruta(p) not in paquetes_necesarios
-    ]
-
-    # añadir entregable
-    proyecto_id = proyecto_asignado(estado, equipo)
-    ruta_entregable = os.path.join(
-        IMG_DIR,
-        "Proyectos",
-        str(proyecto_id),
-        "Entregables",
-        f"{entregable_id}.jpg",
-    )
-
-    nuevo_estado.setdefault("entregables", {}).setdefault(equipo, []).append(ruta_entregable)
-
-    return nuevo_estado, True
+    # eliminar paquetes usados y añadir entregable
+    entregables = list(estado.get("entregables", {}).get(equipo, [])) + [entregable_id]
+    return _con_zonas(estado, {
+        ("proyectos", equipo): paquetes_equipo.quitar(requisito).a_json(),
+        ("entregables", equipo): entregables,
+    }), True
 
 
 
@@ -442,6 +582,7 @@ def extraer_id_desde_ruta(ruta):
     return int(os.path.splitext(nombre)[0])
 
 
+@medido()
 def proyectos_disponibles(entregables_equipo):
     """
     Determina qué proyectos se pueden completar a partir de los entregables del equipo.
@@ -449,48 +590,26 @@ def proyectos_disponibles(entregables_equipo):
     Los entregables almacenan rutas a imágenes (p. ej. imagenes/Proyectos/1/Entregables/3.jpg),
     por lo que primero se extraen los IDs numéricos antes de validar los requisitos.
     """
-    disponibles = []
-
-    ids_entregables = set(
-        extraer_id_desde_ruta(e)
-        for e in entregables_equipo
-    )
-
-    for proyecto_id, necesarios in PROYECTOS.items():
-        if set(necesarios).issubset(ids_entregables):
-            disponibles.append(proyecto_id)
-
-    return disponibles
+    return REGLAS.disponibles_mascara("proyecto", Mazo.desde_json(entregables_equipo).mascara)
 
 def ejecutar_proyecto(estado, equipo, proyecto_id):
-    nuevo_estado = copy.deepcopy(estado)
     equipo = str(equipo)
 
-    necesarios = PROYECTOS.get(proyecto_id)
-    if not necesarios:
+    requisito = REGLAS.mascaras["proyecto"].get(proyecto_id)
+    if not requisito:
         return estado, False
 
-    entregables_equipo = set(
-        extraer_id_desde_ruta(e)
-        for e in nuevo_estado.get("entregables", {}).get(equipo, [])
-    )
-
+    entregables_equipo = Mazo(estado.get("entregables", {}).get(equipo, []))
 
-    if not set(necesarios).issubset(entregables_equipo):
+    if not entregables_equipo.contiene(requisito):
         return estado, False
 
-    # eliminar entregables usados
-    nuevo_estado["entregables"][equipo] = [
-        e
-        for e in nuevo_estado["entregables"][equipo]
-        if extraer_id_desde_ruta(e) not in necesarios
-    ]
-
-    # añadir proyecto final
-    ruta = f"imagenes/Proyectos/{proyecto_id}/{proyecto_id}.jpg"
-
-    nuevo_estado.setdefault("proyectos_finales", {})
-    nuevo_estado["proyectos_finales"].setdefault(str(equipo), []).append(ruta)
+    # eliminar entregables usados y añadir proyecto final
+    finales = list(estado.get("proyectos_finales", {}).get(equipo, [])) + [int(proyecto_id)]
+    nuevo_estado = _con_zonas(estado, {
+        ("entregables", equipo): entregables_equipo.quitar(requisito).a_json(),
+        ("proyectos_finales", equipo): finales,
+    })
 
     if not nuevo_estado.get("finalizado", False) and comprobar_fin_partida(nuevo_estado, equipo):
         finalizar_partida(nuevo_estado, equipo)
@@ -523,83 +642,87 @@ def resetear_fin_partida(estado: dict) -> dict:
     estado.pop("ganador", None)
     return estado
 
-import json
-import os
-import time
-from pathlib import Path
 from typing import Any, Dict, Optional
 
-PARTIDAS_DIR = Path(__file__).resolve().parent / "partidas"
-PARTIDAS_DIR.mkdir(exist_ok=True)
+# El almacenamiento (JSON por archivo o SQLite) vive en almacen.py
+from almacen import PartidaDesactualizada, obtener_almacen
 
-def _path_partida(codigo: str) -> Path:
-    codigo = codigo.strip().upper()
-    return PARTIDAS_DIR / f"{codigo}.json"
 
-def _path_lock(codigo: str) -> Path:
-    codigo = codigo.strip().upper()
-    return PARTIDAS_DIR / f"{codigo}.lock"
+@medido()
+def cargar_partida(codigo: str) -> Optional[Dict[str, Any]]:
+    """
+    Estado de la partida (cacheado entre reruns mientras no cambie en disco).
+    Es de SOLO LECTURA: las acciones devuelven un estado nuevo.
+    """
+    return obtener_almacen().cargar(codigo)
+
+@medido()
+def guardar_partida(codigo: str, estado: Dict[str, Any]) -> int:
+    """
+    Guarda y devuelve la nueva versión. Si `estado` trae "version" y otro equipo
+    ha guardado después, lanza PartidaDesactualizada (no se pisa su jugada).
+    """
+    return obtener_almacen().guardar(codigo, estado)
 
-def _adquirir_lock(codigo: str, timeout_s: float = 3.0) -> None:
-    """Lock simple por archivo (evita escrituras simultáneas)."""
-    lock_path = _path_lock(codigo)
-    inicio = time.time()
-    while True:
+@medido()
+def actualizar_partida(codigo: str, accion, intentos: int = 5, con_deshacer: bool = True):
+    """
+    Lee la partida, aplica `accion(estado) -> (nuevo_estado, ok, msg)` y guarda
+    con compare-and-swap. Si otro equipo guardó entre medias, se vuelve a leer
+    y se repite la acción sobre el estado nuevo (así se fusionan las jugadas).
+    Con `con_deshacer` la jugada queda apuntada para deshacer_partida.
+    Devuelve SIEMPRE: (nuevo_estado, ok, msg)
+    """
+    for _ in range(intentos):
+        estado = cargar_partida(codigo)
+        if estado is None:
+            return None, False, f"La partida {codigo} no existe."
+
+        nuevo_estado, ok, msg = accion(estado)
+        if not ok:
+            return estado, False, msg
+
+        if con_deshacer:
+            nuevo_estado = deshacer.registrar(estado, nuevo_estado, msg)
+        else:
+            nuevo_estado = dict(nuevo_estado)
+            if deshacer.CLAVE in estado:
+                nuevo_estado.setdefault(deshacer.CLAVE, estado[deshacer.CLAVE])
+        nuevo_estado["version"] = estado.get("version", 0)
         try:
-            fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-            os.close(fd)
-            return
-        except FileExistsError:
-            if time.time() - inicio > timeout_s:
-                # si se queda colgado por un lock viejo, lo rompemos
-                try:
-                    lock_path.unlink()
-                except Exception:
-                    pass
-                return
-            time.sleep(0.05)
+            nuevo_estado["version"] = guardar_partida(codigo, nuevo_estado)
+            return nuevo_estado, True, msg
+        except PartidaDesactualizada:
+            continue
 
-def _liberar_lock(codigo: str) -> None:
-    try:
-        _path_lock(codigo).unlink()
-    except Exception:
-        pass
+    return estado, False, "La partida ha cambiado demasiadas veces; vuelve a intentarlo."
 
-def cargar_partida(codigo: str) -> Optional[Dict[str, Any]]:
-    path = _path_partida(codigo)
-    if not path.exists():
-        return None
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return None
+def deshacer_partida(codigo: str, pasos: int = 1):
+    """Deshace las últimas `pasos` jugadas (para todos). Devuelve (estado, ok, msg)."""
+    return actualizar_partida(codigo, lambda e: deshacer.deshacer(e, pasos), con_deshacer=False)
 
-def guardar_partida(codigo: str, estado: Dict[str, Any]) -> None:
-    codigo = codigo.strip().upper()
-    _adquirir_lock(codigo)
-    try:
-        path = _path_partida(codigo)
-        tmp = path.with_suffix(".tmp")
-        tmp.write_text(json.dumps(estado, ensure_ascii=False, indent=2), encoding="utf-8")
-        tmp.replace(path)  # escritura atómica
-    finally:
-        _liberar_lock(codigo)
+def rehacer_partida(codigo: str, pasos: int = 1):
+    """Repite `pasos` jugadas deshechas. Devuelve (estado, ok, msg)."""
+    return actualizar_partida(codigo, lambda e: deshacer.rehacer(e, pasos), con_deshacer=False)
 
+@medido()
 def crear_partida_si_no_existe(codigo: str) -> Dict[str, Any]:
     codigo = codigo.strip().upper()
-    estado = cargar_partida(codigo)
-    if estado is None:
+
+    def _nueva():
         estado = inicializar_juego()  # <-- tu función existente
         # opcional: guarda el código dentro del estado
         estado["codigo_partida"] = codigo
-        guardar_partida(codigo, estado)
-    return estado
+        return estado
+
+    return obtener_almacen().crear_si_no_existe(codigo, _nueva)
 
 def existe_partida(codigo: str) -> bool:
-    return _path_partida(codigo.strip().upper()).exists()
+    return obtener_almacen().existe(codigo)
 
 
 
+@medido()
 def ejecutar_fusion_con_seleccion(estado, equipo, seleccion):
     """
     seleccion: lista de elementos del multiselect (rutas completas o '79.jpg')
@@ -615,28 +738,19 @@ def ejecutar_fusion_con_seleccion(estado, equipo, seleccion):
     if not ids_set:
         return estado, False, "No has seleccionado cartas válidas (no pude extraer IDs)."
 
-    mejor = None  # (score, msg)
-
-    for paquete_id, req in FUSIONES_PAQUETES.items():
-        try:
-            req_set = {int(r) for r in req}
-        except Exception:
-            req_set = set(req)
-
-        if ids_set == req_set:
-            nuevo_estado, ok = ejecutar_fusion(estado, equipo, int(paquete_id))
-            if ok:
-                return nuevo_estado, True, f"Fusión correcta → Paquete {paquete_id} creado."
-            return estado, False, "Encontré la fusión, pero ejecutar_fusion devolvió False."
-
-        faltan = sorted(req_set - ids_set)
-        sobran = sorted(ids_set - req_set)
-        score = len(faltan) + len(sobran)
-        msg = f"No coincide con Paquete {paquete_id}. Faltan: {faltan} | Sobran: {sobran}"
-        if mejor is None or score < mejor[0]:
-            mejor = (score, msg)
+    paquete_id = REGLAS.receta_exacta("paquete", ids_set)
+    if paquete_id is not None:
+        nuevo_estado, ok = ejecutar_fusion(estado, equipo, paquete_id)
+        if ok:
+            return nuevo_estado, True, f"Fusión correcta → Paquete {paquete_id} creado."
+        return estado, False, "Encontré la fusión, pero ejecutar_fusion devolvió False."
 
-    return estado, False, mejor[1] if mejor else "La selección no corresponde a ninguna fusión válida."
+    # Sin coincidencia exacta: diagnóstico con la receta más parecida
+    mejor = REGLAS.mas_cercana("paquete", ids_set)
+    if mejor is None:
+        return estado, False, "La selección no corresponde a ninguna fusión válida."
+    paquete_id, faltan, sobran = mejor
+    return estado, False, f"No coincide con Paquete {paquete_id}. Faltan: {faltan} | Sobran: {sobran}"
 
 
 
@@ -656,6 +770,7 @@ def _extraer_id_paquete(x):
     return int(m.group(1)) if m else None
 
 
+@medido()
 def ejecutar_entregable_con_seleccion(estado, equipo, seleccion_paquetes):
     """
     seleccion_paquetes: lista de ints o strings/rutas.
@@ -674,31 +789,21 @@ def ejecutar_entregable_con_seleccion(estado, equipo, seleccion_paquetes):
     if not ids_set:
         return estado, False, "No has seleccionado paquetes válidos (no pude extraer IDs)."
 
-    mejor_msg = None
-
     # Match exacto con los requisitos de ENTREGABLES
-    for entregable_id, req in ENTREGABLES.items():
-        try:
-            req_set = set(int(x) for x in req)
-        except Exception:
-            req_set = set(req)
-
-        if ids_set == req_set:
-            # Reutiliza tu lógica real (la que elimina paquetes y añade entregable)
-            nuevo_estado, ok = ejecutar_entregable(estado, equipo, int(entregable_id))
-            if ok:
-                return nuevo_estado, True, f"Entregable {entregable_id} creado."
-            return estado, False, "Encontré el entregable, pero ejecutar_entregable devolvió False."
-
-        # Diagnóstico (para mensajes como en fusiones)
-        faltan = sorted(req_set - ids_set)
-        sobran = sorted(ids_set - req_set)
-        score = len(faltan) + len(sobran)
-        msg = f"No coincide con Entregable {entregable_id}. Faltan: {faltan} | Sobran: {sobran}"
-        if mejor_msg is None or score < mejor_msg[0]:
-            mejor_msg = (score, msg)
-
-    return estado, False, mejor_msg[1] if mejor_msg else "La selección no corresponde a ningún entregable válido."
+    entregable_id = REGLAS.receta_exacta("entregable", ids_set)
+    if entregable_id is not None:
+        # Reutiliza tu lógica real (la que elimina paquetes y añade entregable)
+        nuevo_estado, ok = ejecutar_entregable(estado, equipo, entregable_id)
+        if ok:
+            return nuevo_estado, True, f"Entregable {entregable_id} creado."
+        return estado, False, "Encontré el entregable, pero ejecutar_entregable devolvió False."
+
+    # Diagnóstico (para mensajes como en fusiones)
+    mejor = REGLAS.mas_cercana("entregable", ids_set)
+    if mejor is None:
+        return estado, False, "La selección no corresponde a ningún entregable válido."
+    entregable_id, faltan, sobran = mejor
+    return estado, False, f"No coincide con Entregable {entregable_id}. Faltan: {faltan} | Sobran: {sobran}"
 
 
 import copy
@@ -718,6 +823,7 @@ def _extraer_id_item(x):
     return int(m.group(1)) if m else None
 
 
+@medido()
 def ejecutar_proyecto_con_seleccion(estado, equipo, seleccion):
     """
     Selecciona entregables para completar el PROYECTO ASIGNADO a ese equipo.
@@ -736,11 +842,10 @@ def ejecutar_proyecto_con_seleccion(estado, equipo, seleccion):
         return estado, False, f"proyecto_asignado inválido: {proyecto_id}"
 
     # 2) Requisitos (entregables necesarios para ese proyecto)
-    if proyecto_id not in PROYECTOS:
+    req_set = REGLAS.requisitos["proyecto"].get(proyecto_id)
+    if req_set is None:
         return estado, False, f"No existe el proyecto {proyecto_id} en PROYECTOS."
 
-    req_set = set(int(x) for x in PROYECTOS[proyecto_id])
-
     # 3) Normaliza selección a ids
     ids = []
     for item in (seleccion or []):
@@ -759,23 +864,15 @@ def ejecutar_proyecto_con_seleccion(estado, equipo, seleccion):
         return estado, False, f"No coincide con el proyecto {proyecto_id}. Faltan: {faltan} | Sobran: {sobran}"
 
     # 5) OK -> actualiza estado: elimina entregables usados + guarda proyecto final + finaliza partida
-    nuevo = copy.deepcopy(estado)
-    nuevo.setdefault("entregables", {})
-    nuevo["entregables"].setdefault(equipo, [])
-
-    def to_id(x):
-        cid = _extraer_id_item(x)
-        return cid
-
-    nuevo["entregables"][equipo] = [
-        x for x in nuevo["entregables"][equipo]
-        if to_id(x) not in req_set
+    entregables = [
+        x for x in estado.get("entregables", {}).get(equipo, [])
+        if _extraer_id_item(x) not in req_set
     ]
+    finales = list(estado.get("proyectos_finales", {}).get(equipo, []))
+    if proyecto_id not in finales:
+        finales.append(proyecto_id)
 
-    nuevo.setdefault("proyectos_finales", {})
-    nuevo["proyectos_finales"].setdefault(equipo, [])
-    if proyecto_id not in nuevo["proyectos_finales"][equipo]:
-        nuevo["proyectos_finales"][equipo].append(proyecto_id)
+    nuevo = _con_zonas(estado, {("entregables", equipo): entregables, ("proyectos_finales", equipo): finales})
 
     # Si quieres que al completar el primer proyecto se acabe la partida:
     nuevo["finalizado"] = True
@@ -785,6 +882,8 @@ def ejecutar_proyecto_con_seleccion(estado, equipo, seleccion):
 
 def listar_proyectos_imagenes():
     """Devuelve [1,2,3,...] según las carpetas en imagenes/Proyectos/"""
+    if activos.hay_manifiesto():
+        return activos.proyectos()
     base = os.path.join(IMG_DIR, "Proyectos")
     if not os.path.exists(base):
         return []
@@ -799,18 +898,22 @@ def listar_proyectos_imagenes():
     return sorted(out)
 
 
+# {proyecto -> catálogo} cuando no hay manifiesto (evita listdir en cada carta pintada)
+_CATALOGOS = {}
+
+
+@medido()
 def catalogo_actividades_proyecto(proyecto_id):
     """
     Devuelve dict {id:int -> ruta:str} para Actividades del proyecto seleccionado.
     """
-    ruta_acts = os.path.join(
-        IMG_DIR,
-        "Proyectos",
-        str(proyecto_id),
-        "Entregables",
-        "Paquete trabajo",
-        "Actividades",
-    )
+    desde_activos = activos.listar(proyecto_id, "actividad")
+    if desde_activos:
+        return desde_activos
+    if str(proyecto_id) in _CATALOGOS:
+        return _CATALOGOS[str(proyecto_id)]
+
+    ruta_acts = os.path.join(_carpeta_paquetes(proyecto_id), "Actividades")
     catalogo = {}
     if not os.path.exists(ruta_acts):
         return catalogo
@@ -822,4 +925,5 @@ def catalogo_actividades_proyecto(proyecto_id):
             if cid is not None:
                 catalogo[int(cid)] = ruta
 
-    return dict(sorted(catalogo.items(), key=lambda kv: kv[0]))
+    catalogo = _CATALOGOS[str(proyecto_id)] = dict(sorted(catalogo.items(), key=lambda kv: kv[0]))
+    return catalogo
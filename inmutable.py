@@ -0,0 +1,59 @@
+# inmutable.py
+"""
+Estados de solo lectura.
+
+cargar_partida devuelve estados compartidos entre sesiones (cache), así que
+no se pueden modificar in-place. DictCongelado / ListaCongelada se comportan
+como dict / list (json.dumps, ==, isinstance...) pero fallan al mutarlos.
+copy.deepcopy(...) devuelve una copia normal, modificable.
+"""
+import copy
+
+
+def _solo_lectura(*_args, **_kwargs):
+    raise TypeError("Estado de solo lectura: haz copy.deepcopy(estado) o crea uno nuevo antes de modificarlo")
+
+
+class DictCongelado(dict):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _solo_lectura
+    setdefault = pop = popitem = clear = update = _solo_lectura
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {k: copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        return (DictCongelado, (dict(self),))
+
+
+class ListaCongelada(list):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _solo_lectura
+    append = extend = insert = pop = remove = clear = sort = reverse = _solo_lectura
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in self]
+
+    def __reduce__(self):
+        return (ListaCongelada, (list(self),))
+
+
+def congelar(obj):
+    """Convierte (recursivamente) dicts y listas en sus versiones de solo lectura."""
+    if isinstance(obj, dict):
+        if isinstance(obj, DictCongelado):
+            return obj
+        return DictCongelado((k, congelar(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        if isinstance(obj, ListaCongelada):
+            return obj
+        return ListaCongelada(congelar(v) for v in obj)
+    return obj
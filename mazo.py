@@ -0,0 +1,93 @@
+# mazo.py
+"""
+Mazo compacto: las cartas tal cual se guardan en el JSON + sus IDs como
+array('H') y como máscara de bits (bit i = hay carta con ID i).
+
+Con las recetas precompiladas como máscaras (reglas.GrafoReglas), saber si
+un mazo completa una receta es `(mazo.mascara & receta) == receta`, sin
+volver a parsear rutas ni construir sets.
+
+El JSON no cambia: Mazo(lista).a_json() devuelve la misma lista.
+"""
+import os
+import re
+from array import array
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional
+
+_NUMERO = re.compile(r"(\d+)")
+
+
+@lru_cache(maxsize=4096)
+def _id_de_texto(s: str) -> Optional[int]:
+    m = _NUMERO.search(os.path.basename(s))
+    return int(m.group(1)) if m else None
+
+
+def id_carta(x) -> Optional[int]:
+    """ID de una carta: int, '85.jpg' o ruta completa (memoizado para rutas)."""
+    if x is None:
+        return None
+    if isinstance(x, int):
+        return x
+    return _id_de_texto(str(x))
+
+
+def mascara(ids: Iterable[int]) -> int:
+    m = 0
+    for i in set(ids):
+        m |= 1 << i
+    return m
+
+
+def ids_de_mascara(m: int) -> List[int]:
+    out = []
+    while m:
+        bajo = m & -m
+        out.append(bajo.bit_length() - 1)
+        m ^= bajo
+    return out
+
+
+class Mazo:
+    """Lista de cartas con sus IDs y la máscara precalculados."""
+
+    __slots__ = ("cartas", "ids", "mascara")
+
+    def __init__(self, cartas: Iterable = ()):
+        self.cartas = list(cartas)
+        ids = [c if type(c) is int else id_carta(c) for c in self.cartas]
+        self.ids = array("H", [i for i in ids if i is not None])
+        self.mascara = mascara(self.ids)
+
+    @classmethod
+    def desde_json(cls, datos) -> "Mazo":
+        return datos if isinstance(datos, Mazo) else cls(datos or [])
+
+    def a_json(self) -> List:
+        return list(self.cartas)
+
+    def contiene(self, requisito: int) -> bool:
+        """True si el mazo tiene todas las cartas de la máscara `requisito`."""
+        return (self.mascara & requisito) == requisito
+
+    def quitar(self, requisito: int) -> "Mazo":
+        """Mazo nuevo sin las cartas cuyo ID está en la máscara `requisito`."""
+        fuera = set(ids_de_mascara(requisito))
+        quedan = Mazo()
+        for c in self.cartas:
+            cid = c if type(c) is int else id_carta(c)
+            if cid is None:
+                quedan.cartas.append(c)
+            elif cid not in fuera:
+                quedan.cartas.append(c)
+                quedan.ids.append(cid)
+        # Se quitan TODAS las cartas con ID en `requisito`: la máscara es exacta
+        quedan.mascara = self.mascara & ~requisito
+        return quedan
+
+    def __iter__(self) -> Iterator:
+        return iter(self.cartas)
+
+    def __len__(self) -> int:
+        return len(self.cartas)
@@ -0,0 +1,190 @@
+# metricas.py
+"""
+Instrumentación de los caminos calientes: dónde se va el tiempo de un rerun.
+
+  - tramos: duración de cada llamada medida (funciones de game_logic,
+    paneles mostrar_* de la app, el rerun entero...),
+  - contadores: lecturas/escrituras de archivos, bytes de imágenes servidas...
+
+Todo se apunta en las métricas del proceso (METRICAS) y, si la sesión de
+Streamlit ha llamado a activar(), también en las de esa sesión. De cada tramo
+se guardan las últimas VENTANA duraciones (resumen deslizante: p50, p95,
+máximo) y los totales desde que arrancó.
+
+    @medido("game_logic.cargar_partida")
+    def cargar_partida(...): ...
+
+    with tramo("panel.mostrar_equipo"):
+        ...
+
+    sumar("archivo.lecturas")
+
+    METRICAS.exportar(".cache/metricas/bivra.prom")   # texto de Prometheus
+    METRICAS.exportar(".cache/metricas/bivra.json")
+
+    BIVRA_METRICAS=0      desactiva la instrumentación (medido() no envuelve nada)
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ACTIVAS = os.environ.get("BIVRA_METRICAS", "1") != "0"
+# Duraciones que se guardan de cada tramo para el resumen deslizante
+VENTANA = 500
+METRICAS_DIR = Path(os.environ.get("BIVRA_METRICAS_DIR") or Path(__file__).resolve().parent / ".cache" / "metricas")
+
+
+def _percentil(ordenadas, p: float) -> float:
+    return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+
+class Metricas:
+    """Tramos (ventana deslizante + totales) y contadores. Segura entre hilos."""
+
+    def __init__(self, ventana: int = VENTANA):
+        self.ventana = ventana
+        self.desde = time.time()
+        self._tramos: Dict[str, deque] = {}
+        self._totales: Dict[str, list] = {}     # nombre -> [llamadas, segundos]
+        self._contadores: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre: str, segundos: float) -> None:
+        with self._lock:
+            ventana = self._tramos.get(nombre)
+            if ventana is None:
+                ventana = self._tramos[nombre] = deque(maxlen=self.ventana)
+                self._totales[nombre] = [0, 0.0]
+            ventana.append(segundos)
+            total = self._totales[nombre]
+            total[0] += 1
+            total[1] += segundos
+
+    def sumar(self, nombre: str, n: float = 1) -> None:
+        with self._lock:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + n
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._tramos.clear()
+            self._totales.clear()
+            self._contadores.clear()
+            self.desde = time.time()
+
+    def resumen(self) -> Dict[str, Any]:
+        """Tramos ordenados por tiempo total (ms) y contadores."""
+        with self._lock:
+            tramos = {n: (sorted(v), list(self._totales[n])) for n, v in self._tramos.items()}
+            contadores = dict(self._contadores)
+        filas = {}
+        for nombre, (ordenadas, (llamadas, segundos)) in sorted(tramos.items(), key=lambda kv: -kv[1][1][1]):
+            filas[nombre] = {
+                "llamadas": llamadas,
+                "total_ms": round(segundos * 1000, 2),
+                "media_ms": round(segundos * 1000 / llamadas, 3),
+                "p50_ms": round(_percentil(ordenadas, 0.50) * 1000, 3),
+                "p95_ms": round(_percentil(ordenadas, 0.95) * 1000, 3),
+                "max_ms": round(ordenadas[-1] * 1000, 3),
+            }
+        return {"desde": self.desde, "tramos": filas, "contadores": dict(sorted(contadores.items()))}
+
+    def prometheus(self, prefijo: str = "bivra") -> str:
+        """Resumen en formato de texto de Prometheus."""
+        res = self.resumen()
+        with self._lock:
+            totales = {n: list(t) for n, t in self._totales.items()}
+        lineas = [
+            f"# HELP {prefijo}_tramo_segundos Duración de los tramos instrumentados (cuantiles de las últimas {self.ventana}).",
+            f"# TYPE {prefijo}_tramo_segundos summary",
+        ]
+        for nombre, t in res["tramos"].items():
+            etiqueta = f'tramo="{nombre}"'
+            for q, clave in (("0.5", "p50_ms"), ("0.95", "p95_ms")):
+                lineas.append(f'{prefijo}_tramo_segundos{{{etiqueta},quantile="{q}"}} {t[clave] / 1000:.6f}')
+            llamadas, segundos = totales.get(nombre, (t["llamadas"], t["total_ms"] / 1000))
+            lineas.append(f"{prefijo}_tramo_segundos_sum{{{etiqueta}}} {segundos:.9f}")
+            lineas.append(f"{prefijo}_tramo_segundos_count{{{etiqueta}}} {llamadas}")
+        lineas += [
+            f"# HELP {prefijo}_contador_total Contadores (lecturas/escrituras de archivos, bytes de imágenes...).",
+            f"# TYPE {prefijo}_contador_total counter",
+        ]
+        for nombre, valor in res["contadores"].items():
+            lineas.append(f'{prefijo}_contador_total{{contador="{nombre}"}} {valor}')
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, ruta) -> Path:
+        """Escribe el resumen en `ruta`: JSON si acaba en .json, si no texto de Prometheus."""
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        if ruta.suffix == ".json":
+            texto = json.dumps(self.resumen(), indent=2, ensure_ascii=False)
+        else:
+            texto = self.prometheus()
+        tmp = ruta.with_suffix(ruta.suffix + ".tmp")
+        tmp.write_text(texto, encoding="utf-8")
+        tmp.replace(ruta)
+        return ruta
+
+
+# Métricas del proceso (todas las sesiones)
+METRICAS = Metricas()
+# Métricas de la sesión de Streamlit que se está ejecutando en este hilo (si hay)
+_SESION: contextvars.ContextVar[Optional[Metricas]] = contextvars.ContextVar("bivra_metricas_sesion", default=None)
+
+
+def activar(sesion: Optional[Metricas]) -> None:
+    """Lo que se mida a partir de ahora en este hilo se apunta también en `sesion`."""
+    _SESION.set(sesion)
+
+
+def registrar(nombre: str, segundos: float) -> None:
+    METRICAS.registrar(nombre, segundos)
+    sesion = _SESION.get()
+    if sesion is not None:
+        sesion.registrar(nombre, segundos)
+
+
+def sumar(nombre: str, n: float = 1) -> None:
+    if not ACTIVAS:
+        return
+    METRICAS.sumar(nombre, n)
+    sesion = _SESION.get()
+    if sesion is not None:
+        sesion.sumar(nombre, n)
+
+
+@contextmanager
+def tramo(nombre: str):
+    if not ACTIVAS:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nombre, time.perf_counter() - t0)
+
+
+def medido(nombre: Optional[str] = None):
+    """Decorador: cada llamada a la función es un tramo `nombre` (por defecto modulo.funcion)."""
+    def decorador(fn):
+        if not ACTIVAS:
+            return fn
+        etiqueta = nombre or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registrar(etiqueta, time.perf_counter() - t0)
+        return envoltura
+    return decorador
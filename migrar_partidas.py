@@ -0,0 +1,21 @@
+# migrar_partidas.py
+"""
+Pasa todas las partidas guardadas al esquema actual (solo IDs y semilla, ver
+game_logic.ESQUEMA). Se ejecuta una vez tras actualizar:
+
+    python migrar_partidas.py            # migra
+    python migrar_partidas.py --simular  # solo dice cuántas faltan
+
+Las partidas que no se migren se convierten igualmente al abrirlas en la app.
+"""
+import argparse
+
+from game_logic import migrar_partidas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra las partidas guardadas al esquema de IDs")
+    parser.add_argument("--simular", action="store_true", help="No guarda nada, solo lista las partidas a migrar")
+    args = parser.parse_args()
+    migradas = migrar_partidas(simular=args.simular)
+    accion = "a migrar" if args.simular else "migradas"
+    print(f"{len(migradas)} partidas {accion}: {', '.join(migradas) if migradas else '-'}")
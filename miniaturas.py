@@ -0,0 +1,175 @@
+# miniaturas.py
+"""
+Miniaturas de las cartas.
+
+Paso de build (una vez, o cuando cambien las imágenes):
+
+    python miniaturas.py            # genera lo que falte
+    python miniaturas.py --forzar   # regenera todo
+
+Genera .cache/miniaturas/<hash>_<ancho>.<formato> para cada imagen de
+imagenes/Proyectos (ANCHOS x FORMATOS) y un indice.json {ruta relativa -> hash}.
+El hash es del contenido, así que si una imagen cambia su miniatura cambia.
+
+En ejecución, ruta_miniatura(ruta, ancho) devuelve la miniatura más pequeña
+que cubre ese ancho, o la imagen original si no hay miniatura.
+"""
+import argparse
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Solo hace falta para generar, no para servirlas
+    Image = None
+
+import activos
+from activos import hash_archivo
+
+BASE_DIR = Path(__file__).resolve().parent
+IMG_DIR = BASE_DIR / "imagenes" / "Proyectos"
+MINIATURAS_DIR = Path(os.environ.get("BIVRA_MINIATURAS_DIR") or BASE_DIR / ".cache" / "miniaturas")
+
+ANCHOS = (160, 220, 320)
+FORMATOS = ("webp", "jpeg")
+FORMATO = os.environ.get("BIVRA_MINIATURAS_FORMATO", "webp")
+_EXT = {"webp": "webp", "jpeg": "jpg"}
+
+# {ruta relativa a BASE_DIR -> hash}; se carga una vez
+_INDICE: Optional[Dict[str, str]] = None
+# Hashes que tienen miniaturas generadas (valores de _INDICE)
+_CON_MINIATURA: Optional[frozenset] = None
+
+
+def nombre_miniatura(hash_img: str, ancho: int, formato: str = FORMATO) -> str:
+    return f"{hash_img}_{ancho}.{_EXT[formato]}"
+
+
+def ruta_relativa(ruta) -> str:
+    p = Path(ruta)
+    if p.is_absolute():
+        try:
+            p = p.relative_to(BASE_DIR)
+        except ValueError:
+            return p.as_posix()
+    return p.as_posix()
+
+
+# ==============================
+# Build
+# ==============================
+
+def _generar(origen: Path, hash_img: str, forzar: bool) -> int:
+    creadas = 0
+    with Image.open(origen) as img:
+        img = img.convert("RGB")
+        for ancho in ANCHOS:
+            alto = max(1, round(img.height * ancho / img.width))
+            reducida = None
+            for formato in FORMATOS:
+                destino = MINIATURAS_DIR / nombre_miniatura(hash_img, ancho, formato)
+                if destino.exists() and not forzar:
+                    continue
+                if reducida is None:
+                    reducida = img if img.width <= ancho else img.resize((ancho, alto), Image.LANCZOS)
+                tmp = destino.with_suffix(destino.suffix + ".tmp")
+                if formato == "webp":
+                    reducida.save(tmp, format="WEBP", quality=82, method=6)
+                else:
+                    reducida.save(tmp, format="JPEG", quality=82, optimize=True, progressive=True)
+                tmp.replace(destino)
+                creadas += 1
+    return creadas
+
+
+def construir(forzar: bool = False) -> Dict[str, str]:
+    """Genera las miniaturas que falten y reescribe el índice."""
+    if Image is None:
+        raise RuntimeError("Hace falta Pillow para generar miniaturas (pip install pillow)")
+
+    MINIATURAS_DIR.mkdir(parents=True, exist_ok=True)
+    indice = {}
+    creadas = 0
+    for raiz, _dirs, archivos in os.walk(IMG_DIR):
+        for f in archivos:
+            if not f.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
+                continue
+            origen = Path(raiz) / f
+            hash_img = hash_archivo(origen)
+            indice[ruta_relativa(origen)] = hash_img
+            creadas += _generar(origen, hash_img, forzar)
+
+    tmp = MINIATURAS_DIR / "indice.json.tmp"
+    tmp.write_text(json.dumps(indice, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    tmp.replace(MINIATURAS_DIR / "indice.json")
+
+    global _INDICE, _CON_MINIATURA
+    _INDICE = indice
+    _CON_MINIATURA = None
+    _existe.cache_clear()
+    print(f"{len(indice)} imágenes, {creadas} miniaturas nuevas en {MINIATURAS_DIR}")
+    return indice
+
+
+# ==============================
+# Runtime
+# ==============================
+
+def cargar_indice() -> Dict[str, str]:
+    global _INDICE
+    if _INDICE is None:
+        try:
+            _INDICE = json.loads((MINIATURAS_DIR / "indice.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            _INDICE = {}
+    return _INDICE
+
+
+def hash_imagen(ruta) -> Optional[str]:
+    """Hash del contenido: del índice, o del propio nombre si es un objeto de activos.py."""
+    return cargar_indice().get(ruta_relativa(ruta)) or activos.hash_de_ruta(ruta)
+
+
+def _con_miniatura() -> frozenset:
+    global _CON_MINIATURA
+    if _CON_MINIATURA is None:
+        _CON_MINIATURA = frozenset(cargar_indice().values())
+    return _CON_MINIATURA
+
+
+@lru_cache(maxsize=16384)
+def _existe(ruta: Path) -> bool:
+    return ruta.is_file()
+
+
+def miniatura(ruta, ancho: int, formato: str = FORMATO) -> Optional[Path]:
+    """
+    Miniatura más pequeña con ancho >= `ancho` (o la mayor si ninguna llega),
+    o None si esa imagen no tiene miniaturas generadas.
+    """
+    if ruta is None:
+        return None
+    hash_img = hash_imagen(ruta)
+    if hash_img is None or hash_img not in _con_miniatura():
+        return None
+    elegido = next((a for a in ANCHOS if a >= ancho), ANCHOS[-1])
+    destino = MINIATURAS_DIR / nombre_miniatura(hash_img, elegido, formato)
+    return destino if _existe(destino) else None
+
+
+def ruta_miniatura(ruta, ancho: int, formato: str = FORMATO) -> str:
+    """Ruta de miniatura() o, si no hay miniatura generada, la ruta original."""
+    if ruta is None:
+        return ruta
+    destino = miniatura(ruta, ancho, formato)
+    return str(ruta) if destino is None else str(destino)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera las miniaturas de las cartas")
+    parser.add_argument("--forzar", action="store_true", help="Regenera aunque ya existan")
+    args = parser.parse_args()
+    construir(forzar=args.forzar)
@@ -0,0 +1,326 @@
+# motor.py
+"""
+Motor de juego sin Streamlit.
+
+Envuelve las reglas de game_logic en acciones tipadas para poder jugar una
+partida desde bots, simuladores o pruebas de carga:
+
+    motor = Motor()                                  # partida en memoria
+    motor = Motor(codigo="ABC123")                   # partida guardada (almacen.py)
+
+    res = motor.aplicar(SiguienteRonda())
+    res = motor.aplicar(Fusionar("1", (101, 102, 103, 104)))
+    for accion in motor.acciones_validas("1"):
+        ...
+
+Cada aplicar() devuelve un Resultado (ok, msg, estado, duracion_s). Con
+`codigo` las acciones se guardan con actualizar_partida (compare-and-swap,
+deshacer); sin él el estado vive solo en el objeto.
+
+Con la partida finalizada solo se permiten Reiniciar, Deshacer y Rehacer.
+
+Cada jugada que cambia la partida se apunta en estado["jugadas"] en forma
+compacta (["R"], ["F", "1", [101, 102, ...]], ...). Como el azar sale de
+estado["semilla"] (game_logic.rng_partida), la partida se reconstruye igual:
+
+    estado = reproducir(semilla, jugadas)
+    ok, diferencias = verificar(estado_guardado)
+
+Deshacer quita la jugada del registro (forma parte del estado) y Reiniciar
+empieza una partida nueva con otra semilla y el registro vacío.
+
+Con BIVRA_SERVIDOR (ver servidor.py) las partidas viven en el servidor de
+partidas: aplicar() le envía la acción (a_peticion) y el servidor la ejecuta
+con su propio Motor.
+"""
+import time
+from dataclasses import asdict, astuple, dataclass, field, fields
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import cliente
+import deshacer
+import diario
+import game_logic as gl
+from almacen import obtener_almacen
+from mazo import Mazo, id_carta, mascara
+
+
+# ==============================
+# Acciones
+# ==============================
+
+@dataclass(frozen=True)
+class SiguienteRonda:
+    pass
+
+
+@dataclass(frozen=True)
+class Fusionar:
+    equipo: str
+    actividades: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class CrearEntregable:
+    equipo: str
+    paquetes: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class CrearProyecto:
+    equipo: str
+    entregables: Tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class Reiniciar:
+    pass
+
+
+@dataclass(frozen=True)
+class Deshacer:
+    pasos: int = 1
+
+
+@dataclass(frozen=True)
+class Rehacer:
+    pasos: int = 1
+
+
+Accion = Union[SiguienteRonda, Fusionar, CrearEntregable, CrearProyecto, Reiniciar, Deshacer, Rehacer]
+
+# Acciones que se pueden hacer con la partida finalizada
+_TRAS_FINALIZAR = (Reiniciar, Deshacer, Rehacer)
+
+# Registro de jugadas: código de cada acción que se apunta en estado["jugadas"]
+_CODIGOS = {SiguienteRonda: "R", Fusionar: "F", CrearEntregable: "E", CrearProyecto: "P"}
+_ACCIONES = {c: tipo for tipo, c in _CODIGOS.items()}
+# Claves que no salen de las jugadas (control, deshacer, consulta)
+_NO_REPRODUCIBLES = ("version", deshacer.CLAVE, "historial", "codigo_partida")
+
+
+def a_jugada(accion: Accion) -> list:
+    """Acción -> entrada compacta del registro de jugadas (JSON)."""
+    codigo = _CODIGOS[type(accion)]
+    if isinstance(accion, SiguienteRonda):
+        return [codigo]
+    equipo, cartas = astuple(accion)
+    return [codigo, equipo, list(cartas)]
+
+
+def de_jugada(jugada: list) -> Accion:
+    tipo = _ACCIONES[jugada[0]]
+    if tipo is SiguienteRonda:
+        return SiguienteRonda()
+    return tipo(str(jugada[1]), tuple(jugada[2]))
+
+
+# Servidor de partidas: operación (POST /partidas/<codigo>/<operacion>) de cada acción
+OPERACIONES = {
+    SiguienteRonda: "siguiente_ronda",
+    Fusionar: "fusion",
+    CrearEntregable: "entregable",
+    CrearProyecto: "proyecto",
+    Reiniciar: "reiniciar",
+    Deshacer: "deshacer",
+    Rehacer: "rehacer",
+}
+_POR_OPERACION = {op: tipo for tipo, op in OPERACIONES.items()}
+
+
+def a_peticion(accion: Accion) -> Tuple[str, Dict[str, Any]]:
+    """Acción -> (operación, cuerpo JSON) para el servidor de partidas."""
+    return OPERACIONES[type(accion)], asdict(accion)
+
+
+def de_peticion(operacion: str, datos: Dict[str, Any]) -> Accion:
+    """Lo contrario de a_peticion. KeyError si la operación no existe; ValueError/TypeError si el cuerpo no vale."""
+    tipo = _POR_OPERACION[operacion]
+    if tipo in (Deshacer, Rehacer):
+        return tipo(int(datos.get("pasos", 1)))
+    if tipo in (SiguienteRonda, Reiniciar):
+        return tipo()
+    equipo, cartas = (datos[f.name] for f in fields(tipo))
+    return tipo(str(equipo), tuple(int(c) for c in cartas))
+
+
+# Zona del equipo de donde salen las cartas de cada jugada
+_ZONA_CARTAS = {Fusionar: "mazos", CrearEntregable: "proyectos", CrearProyecto: "entregables"}
+
+
+def _faltan(estado: Dict[str, Any], equipo: str, zona: str, cartas) -> Optional[List[int]]:
+    """IDs de `cartas` que el equipo no tiene en `zona` (None si el equipo no existe)."""
+    if str(equipo) not in estado.get("mazos", {}):
+        return None
+    mazo = Mazo.desde_json(estado.get(zona, {}).get(str(equipo), []))
+    pedidas = [c for c in (id_carta(x) for x in cartas) if c is not None]
+    if mazo.contiene(mascara(pedidas)):
+        return []
+    return sorted(set(pedidas) - set(mazo.ids))
+
+
+@dataclass
+class Resultado:
+    ok: bool
+    msg: str
+    estado: Dict[str, Any]
+    accion: Accion
+    duracion_s: float = 0.0
+    eventos: List[str] = field(default_factory=list)
+
+
+# ==============================
+# Motor
+# ==============================
+
+class Motor:
+    def __init__(self, estado: Optional[Dict[str, Any]] = None, codigo: Optional[str] = None,
+                 estructura: Optional[Dict[str, Any]] = None, crear: bool = True):
+        self.codigo = codigo
+        self._estructura = estructura
+        self._eventos: List[str] = []
+        if codigo is not None:
+            if crear:
+                gl.crear_partida_si_no_existe(codigo)
+            self._estado = None
+        else:
+            self._estado = gl.normalizar_estado(dict(estado) if estado is not None else gl.inicializar_juego())
+
+    @property
+    def estructura(self) -> Dict[str, Any]:
+        if self._estructura is None:
+            self._estructura = gl.cargar_estructura_proyecto()
+        return self._estructura
+
+    @property
+    def estado(self) -> Dict[str, Any]:
+        """Estado actual (de SOLO LECTURA si la partida está guardada)."""
+        if self.codigo is not None:
+            return gl.cargar_partida(self.codigo)
+        return self._estado
+
+    @property
+    def finalizado(self) -> bool:
+        return bool(self.estado.get("finalizado", False))
+
+    # ------------------------------
+    # Reglas
+    # ------------------------------
+
+    def _transicion(self, accion: Accion, estado: Dict[str, Any]):
+        """(nuevo_estado, ok, msg) de aplicar `accion` a `estado` (no lo modifica)."""
+        nuevo, ok, msg = self._reglas(accion, estado)
+        if ok and type(accion) in _CODIGOS and "jugadas" in estado:
+            nuevo = dict(nuevo)
+            nuevo["jugadas"] = estado["jugadas"] + [a_jugada(accion)]
+        return nuevo, ok, msg
+
+    def _reglas(self, accion: Accion, estado: Dict[str, Any]):
+        if estado.get("finalizado", False) and not isinstance(accion, _TRAS_FINALIZAR):
+            return estado, False, "La partida ha terminado."
+
+        if isinstance(accion, SiguienteRonda):
+            nuevo, eventos = gl.siguiente_ronda(estado, self.estructura, None)
+            self._eventos = eventos
+            return nuevo, True, f"Ronda {nuevo['ronda']}: " + " · ".join(eventos)
+        if type(accion) in _ZONA_CARTAS:
+            # Solo se puede jugar con cartas que el equipo tiene en la zona correspondiente
+            zona = _ZONA_CARTAS[type(accion)]
+            equipo, cartas = astuple(accion)
+            faltan = _faltan(estado, equipo, zona, cartas)
+            if faltan is None:
+                return estado, False, f"El equipo {equipo} no existe."
+            if faltan:
+                return estado, False, f"El equipo {equipo} no tiene esas cartas en {zona}: {faltan}"
+        if isinstance(accion, Fusionar):
+            return gl.ejecutar_fusion_con_seleccion(estado, accion.equipo, list(accion.actividades))
+        if isinstance(accion, CrearEntregable):
+            return gl.ejecutar_entregable_con_seleccion(estado, accion.equipo, list(accion.paquetes))
+        if isinstance(accion, CrearProyecto):
+            return gl.ejecutar_proyecto_con_seleccion(estado, accion.equipo, list(accion.entregables))
+        if isinstance(accion, Reiniciar):
+            nuevo = gl.inicializar_juego()
+            if self.codigo is not None:
+                nuevo["codigo_partida"] = self.codigo
+            return nuevo, True, "Partida reiniciada."
+        if isinstance(accion, Deshacer):
+            return deshacer.deshacer(estado, accion.pasos)
+        if isinstance(accion, Rehacer):
+            return deshacer.rehacer(estado, accion.pasos)
+        raise TypeError(f"Acción desconocida: {accion!r}")
+
+    def aplicar(self, accion: Accion) -> Resultado:
+        t0 = time.perf_counter()
+        self._eventos = []
+        con_deshacer = not isinstance(accion, (Deshacer, Rehacer))
+
+        if self.codigo is not None:
+            almacen = obtener_almacen()
+            if isinstance(almacen, cliente.ClientePartidas):
+                return almacen.aplicar(self.codigo, accion)
+
+            estado, ok, msg = gl.actualizar_partida(
+                self.codigo, lambda e: self._transicion(accion, e), con_deshacer=con_deshacer
+            )
+        else:
+            anterior = self._estado
+            estado, ok, msg = self._transicion(accion, anterior)
+            if ok:
+                if con_deshacer:
+                    estado = deshacer.registrar(anterior, estado, msg)
+                self._estado = estado
+            else:
+                estado = anterior
+
+        return Resultado(ok, msg, estado, accion, time.perf_counter() - t0, list(self._eventos) if ok else [])
+
+    def acciones_validas(self, equipo) -> List[Accion]:
+        """Acciones que el equipo puede hacer ahora mismo (sin contar Deshacer/Rehacer)."""
+        estado = self.estado
+        if estado.get("finalizado", False):
+            return [Reiniciar()]
+
+        equipo = str(equipo)
+        acciones: List[Accion] = [SiguienteRonda()]
+        for f in gl.fusiones_disponibles(estado.get("mazos", {}).get(equipo, [])):
+            acciones.append(Fusionar(equipo, tuple(f["actividades"])))
+        for entregable_id in gl.entregables_disponibles(estado.get("proyectos", {}).get(equipo, [])):
+            acciones.append(CrearEntregable(equipo, tuple(sorted(gl.REGLAS.requisitos["entregable"][entregable_id]))))
+
+        asignado = estado.get("proyectos_asignados", {}).get(equipo)
+        if asignado is not None and int(asignado) in gl.proyectos_disponibles(estado.get("entregables", {}).get(equipo, [])):
+            acciones.append(CrearProyecto(equipo, tuple(sorted(gl.REGLAS.requisitos["proyecto"][int(asignado)]))))
+        return acciones
+
+
+# ==============================
+# Reproducción
+# ==============================
+
+def reproducir(semilla: int, jugadas: List[list], estructura: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Reconstruye la partida desde cero con su semilla y su registro de jugadas."""
+    motor = Motor(gl.inicializar_juego(semilla), estructura=estructura)
+    estado = motor.estado
+    for n, jugada in enumerate(jugadas, 1):
+        estado, ok, msg = motor._transicion(de_jugada(jugada), estado)
+        if not ok:
+            raise ValueError(f"La jugada {n} ({jugada}) no se puede reproducir: {msg}")
+    return estado
+
+
+def _reproducible(estado: Dict[str, Any]) -> Dict[str, Any]:
+    # Normalizado: las zonas que faltan en partidas antiguas no cuentan como diferencia
+    estado = gl.normalizar_estado(dict(estado))
+    return {k: v for k, v in estado.items() if k not in _NO_REPRODUCIBLES}
+
+
+def verificar(estado: Dict[str, Any], estructura: Optional[Dict[str, Any]] = None) -> Tuple[bool, List[list]]:
+    """
+    Reproduce la partida guardada y la compara con `estado`.
+    Devuelve (coincide, diferencias en formato de diario.diferencia).
+    """
+    if "jugadas" not in estado:
+        raise ValueError("La partida no tiene registro de jugadas (es anterior a las semillas).")
+    reconstruido = reproducir(estado["semilla"], estado["jugadas"], estructura)
+    diferencias = diario.diferencia(_reproducible(estado), _reproducible(reconstruido))
+    return not diferencias, diferencias
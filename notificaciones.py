@@ -0,0 +1,134 @@
+# notificaciones.py
+"""
+Avisos de cambios entre equipos.
+
+Un único hilo por proceso (Vigilante) consulta cada INTERVALO segundos el
+token de las partidas que alguien está viendo (stat() del JSON o versión en
+SQLite, ver almacen.token). Las sesiones solo comparan en memoria su token
+con el del vigilante, y hacen rerun únicamente si SU partida ha cambiado.
+
+Estadísticas: comprobaciones de las sesiones y cuántas encontraron su
+partida cambiada (las únicas que pueden acabar en rerun). Se guardan con
+marca de tiempo para calcular ritmos por minuto.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from almacen import normalizar_codigo, obtener_almacen
+
+INTERVALO_S = float(os.environ.get("BIVRA_REFRESCO_S", "1.0"))
+# Partidas que nadie consulta en este tiempo dejan de vigilarse
+OLVIDAR_TRAS_S = 300.0
+
+
+class EstadisticasRefresco:
+    """Comprobaciones y reruns de las sesiones (ventana deslizante de 1 minuto)."""
+
+    def __init__(self, ventana_s: float = 60.0):
+        self.ventana_s = ventana_s
+        self.comprobaciones = 0
+        self.reruns = 0
+        self._eventos: deque = deque()  # (instante, hubo_rerun)
+        self._lock = threading.Lock()
+
+    def registrar(self, rerun: bool) -> None:
+        ahora = time.monotonic()
+        with self._lock:
+            self.comprobaciones += 1
+            self.reruns += int(rerun)
+            self._eventos.append((ahora, rerun))
+            self._recortar(ahora)
+
+    def _recortar(self, ahora: float) -> None:
+        while self._eventos and ahora - self._eventos[0][0] > self.ventana_s:
+            self._eventos.popleft()
+
+    def resumen(self) -> Dict[str, float]:
+        with self._lock:
+            self._recortar(time.monotonic())
+            por_min = 60.0 / self.ventana_s
+            comprobaciones = len(self._eventos)
+            reruns = sum(1 for _, r in self._eventos if r)
+        return {
+            "comprobaciones_por_min": round(comprobaciones * por_min, 1),
+            "reruns_por_min": round(reruns * por_min, 1),
+            "comprobaciones_sin_cambio_por_min": round((comprobaciones - reruns) * por_min, 1),
+            "comprobaciones_total": self.comprobaciones,
+            "reruns_total": self.reruns,
+        }
+
+
+class Vigilante:
+    """Hilo que sondea el almacén y guarda el último token de cada partida vigilada."""
+
+    def __init__(self, almacen=None, intervalo_s: float = INTERVALO_S):
+        self.almacen = almacen or obtener_almacen()
+        self.intervalo_s = intervalo_s
+        self.estadisticas = EstadisticasRefresco()
+        self._tokens: Dict[str, Any] = {}
+        self._ultimo_uso: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+
+    def _arrancar(self) -> None:
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, name="bivra-vigilante", daemon=True)
+            self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            time.sleep(self.intervalo_s)
+            ahora = time.monotonic()
+            with self._lock:
+                for codigo, uso in list(self._ultimo_uso.items()):
+                    if ahora - uso > OLVIDAR_TRAS_S:
+                        self._ultimo_uso.pop(codigo, None)
+                        self._tokens.pop(codigo, None)
+                codigos = list(self._ultimo_uso)
+            for codigo in codigos:
+                try:
+                    token = self.almacen.token(codigo)
+                except Exception:
+                    continue
+                with self._lock:
+                    if codigo in self._ultimo_uso:
+                        self._tokens[codigo] = token
+
+    def actualizar(self, codigo: str) -> Any:
+        """Consulta ya el token de la partida (al pintar la página entera) y la vigila."""
+        codigo = normalizar_codigo(codigo)
+        token = self.almacen.token(codigo)
+        with self._lock:
+            self._tokens[codigo] = token
+            self._ultimo_uso[codigo] = time.monotonic()
+        self._arrancar()
+        return token
+
+    def token(self, codigo: str) -> Any:
+        """Último token visto por el hilo (sin tocar disco)."""
+        codigo = normalizar_codigo(codigo)
+        with self._lock:
+            self._ultimo_uso[codigo] = time.monotonic()
+            return self._tokens.get(codigo)
+
+    def ha_cambiado(self, codigo: str, token_visto: Any) -> bool:
+        """True si la partida cambió desde `token_visto`; registra la comprobación."""
+        cambiado = self.token(codigo) != token_visto
+        self.estadisticas.registrar(rerun=cambiado)
+        return cambiado
+
+
+_VIGILANTE: Optional[Vigilante] = None
+_VIGILANTE_LOCK = threading.Lock()
+
+
+def obtener_vigilante() -> Vigilante:
+    """Vigilante del proceso (compartido por todas las sesiones)."""
+    global _VIGILANTE
+    with _VIGILANTE_LOCK:
+        if _VIGILANTE is None:
+            _VIGILANTE = Vigilante()
+        return _VIGILANTE
@@ -0,0 +1,84 @@
+# reglas.py
+"""
+Grafo de reglas compilado: actividad -> paquete -> entregable -> proyecto.
+
+Se construye una vez con las recetas de relacionescartas.txt,
+relacionesentregables.txt y relacionesproyectos.txt y ofrece:
+
+- requisitos[nivel][id]       -> frozenset de ids necesarios
+- padres[nivel_hijo][id]      -> recetas de nivel superior que usan ese id
+- exacto[nivel][frozenset]    -> id de la receta que completa EXACTAMENTE esa selección (O(1))
+- mascaras[nivel][id]         -> requisitos como máscara de bits (ver mazo.py)
+
+Niveles de receta: "paquete" (de actividades), "entregable" (de paquetes)
+y "proyecto" (de entregables).
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mazo import mascara
+
+# nivel de la receta -> nivel de sus ingredientes
+INGREDIENTE = {
+    "paquete": "actividad",
+    "entregable": "paquete",
+    "proyecto": "entregable",
+}
+
+
+class GrafoReglas:
+    def __init__(self, paquetes: Dict[int, Iterable[int]], entregables: Dict[int, Iterable[int]],
+                 proyectos: Dict[int, Iterable[int]]):
+        self.requisitos: Dict[str, Dict[int, frozenset]] = {}
+        self.padres: Dict[str, Dict[int, List[int]]] = {}
+        self.exacto: Dict[str, Dict[frozenset, int]] = {}
+        # Recetas como máscaras, en el orden de los .txt
+        self.mascaras: Dict[str, Dict[int, int]] = {}
+
+        for nivel, recetas in (("paquete", paquetes), ("entregable", entregables), ("proyecto", proyectos)):
+            requisitos = {int(rid): frozenset(int(x) for x in req) for rid, req in recetas.items()}
+            padres: Dict[int, List[int]] = {}
+            exacto: Dict[frozenset, int] = {}
+            for rid, req in requisitos.items():
+                exacto.setdefault(req, rid)  # si dos recetas coinciden, gana la primera
+                for ing in req:
+                    padres.setdefault(ing, []).append(rid)
+
+            self.requisitos[nivel] = requisitos
+            self.padres[INGREDIENTE[nivel]] = padres
+            self.exacto[nivel] = exacto
+            self.mascaras[nivel] = {rid: mascara(req) for rid, req in requisitos.items()}
+
+    def receta_exacta(self, nivel: str, ids: Iterable[int]) -> Optional[int]:
+        """Receta de `nivel` cuyos requisitos son exactamente `ids` (o None)."""
+        return self.exacto[nivel].get(frozenset(ids))
+
+    def disponibles(self, nivel: str, ids: Iterable[int]) -> List[int]:
+        """Recetas de `nivel` que se pueden completar con `ids` (requisitos ⊆ ids)."""
+        return self.disponibles_mascara(nivel, mascara(ids))
+
+    def disponibles_mascara(self, nivel: str, m: int) -> List[int]:
+        """Como disponibles(), con los ids ya como máscara: un AND por receta."""
+        return [rid for rid, req in self.mascaras[nivel].items() if (m & req) == req]
+
+    def mas_cercana(self, nivel: str, ids: Iterable[int]) -> Optional[Tuple[int, List[int], List[int]]]:
+        """
+        Para diagnósticos: (receta, faltan, sobran) con menos diferencias con `ids`
+        (empates: la primera del .txt). Solo se usa cuando no hay coincidencia exacta.
+        """
+        ids = set(ids)
+        mejor = None
+        for rid, req in self.requisitos[nivel].items():
+            faltan = req - ids
+            sobran = ids - req
+            score = len(faltan) + len(sobran)
+            if mejor is None or score < mejor[0]:
+                mejor = (score, rid, sorted(faltan), sorted(sobran))
+        return None if mejor is None else mejor[1:]
+
+    def agrupaciones(self) -> Dict[str, Dict[int, List[int]]]:
+        """Índices inversos con los nombres de generar_diccionario_agrupaciones."""
+        return {
+            "actividades_a_paquete": {k: list(v) for k, v in self.padres["actividad"].items()},
+            "paquetes_a_entregable": {k: list(v) for k, v in self.padres["paquete"].items()},
+            "entregables_a_proyecto": {k: list(v) for k, v in self.padres["entregable"].items()},
+        }
@@ -0,0 +1,44 @@
+# reproducir_partida.py
+"""
+Reproduce una partida guardada desde su semilla y su registro de jugadas y
+comprueba que se llega exactamente al mismo estado (para revisar un
+resultado discutido):
+
+    python reproducir_partida.py ABC123
+    python reproducir_partida.py ABC123 --jugadas     # lista las jugadas
+
+Solo las partidas creadas con semilla (game_logic.ESQUEMA >= 3) tienen
+registro desde el principio.
+"""
+import argparse
+import json
+import sys
+
+import game_logic as gl
+from motor import verificar
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproduce y verifica una partida guardada")
+    parser.add_argument("codigo")
+    parser.add_argument("--jugadas", action="store_true", help="Muestra el registro de jugadas")
+    args = parser.parse_args()
+
+    estado = gl.cargar_partida(args.codigo.strip().upper())
+    if estado is None:
+        sys.exit(f"La partida {args.codigo} no existe.")
+    if "jugadas" not in estado:
+        sys.exit(f"La partida {args.codigo} no tiene registro de jugadas (es anterior a las semillas).")
+
+    if args.jugadas:
+        for n, jugada in enumerate(estado["jugadas"], 1):
+            print(n, json.dumps(jugada))
+
+    coincide, diferencias = verificar(estado)
+    print(f"Semilla {estado['semilla']}, {len(estado['jugadas'])} jugadas, ronda {estado['ronda']}")
+    if coincide:
+        print("✅ La reproducción coincide con la partida guardada.")
+    else:
+        print("❌ La reproducción NO coincide:")
+        for op in diferencias:
+            print("  ", json.dumps(op, ensure_ascii=False))
+        sys.exit(1)
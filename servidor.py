@@ -0,0 +1,268 @@
+# servidor.py
+"""
+Servidor de partidas (JSON sobre HTTP, asyncio, solo biblioteca estándar).
+
+Varias réplicas de la app detrás de un balanceador necesitan compartir las
+partidas. En vez de compartir la carpeta partidas/ (y pelearse por los
+.lock), un único proceso es el dueño de las partidas: las tiene en memoria
+(almacen.RegistroPartidas, con escritura diferida al almacén de siempre) y
+ejecuta las jugadas con el Motor. Las réplicas usan cliente.ClientePartidas
+(BIVRA_SERVIDOR=http://host:8765) y no guardan nada.
+
+    python servidor.py                                 # 127.0.0.1:8765
+    python servidor.py --host 0.0.0.0 --clave secreto  # accesible desde otros nodos
+    BIVRA_SERVIDOR=http://127.0.0.1:8765 streamlit run app.py
+
+Endpoints (cuerpo y respuesta en JSON):
+
+    GET  /salud                           {"ok": true}
+    GET  /metricas                        texto de Prometheus (metricas.py)
+    GET  /partidas                        {"codigos": [...]}
+    GET  /partidas/<codigo>               estado (ETag = versión; 304 si If-None-Match coincide)
+    GET  /partidas/<codigo>/token         {"version": n}
+    POST /partidas/<codigo>/crear         estado (la crea si no existe)
+    POST /partidas/<codigo>/unirse        {"equipo": "1"} -> estado, 404 si no existe
+    POST /partidas/<codigo>/siguiente_ronda
+    POST /partidas/<codigo>/fusion        {"equipo": "1", "actividades": [101, 102, ...]}
+    POST /partidas/<codigo>/entregable    {"equipo": "1", "paquetes": [...]}
+    POST /partidas/<codigo>/proyecto      {"equipo": "1", "entregables": [...]}
+    POST /partidas/<codigo>/reiniciar | deshacer | rehacer   ({"pasos": n})
+
+Las jugadas contestan {"ok", "msg", "estado", "eventos"}; una jugada que las
+reglas no permiten es ok=false con 200, no un error HTTP.
+
+Con --clave (o BIVRA_SERVIDOR_CLAVE) se exige "Authorization: Bearer <clave>".
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+# Este proceso es el dueño de las partidas: registro en memoria, nunca cliente de otro servidor
+os.environ.setdefault("BIVRA_REGISTRO", "1")
+os.environ.pop("BIVRA_SERVIDOR", None)
+
+import game_logic as gl
+import metricas
+from almacen import normalizar_codigo, obtener_almacen
+from motor import OPERACIONES, Motor, de_peticion
+
+PUERTO = int(os.environ.get("BIVRA_SERVIDOR_PUERTO", "8765"))
+# Cuerpo máximo de una petición y tiempo que se mantiene abierta una conexión sin peticiones
+MAX_CUERPO = 1024 * 1024
+INACTIVIDAD_S = 30.0
+
+_JUGADAS = frozenset(OPERACIONES.values())
+log = logging.getLogger("bivra.servidor")
+
+
+class ErrorPeticion(Exception):
+    def __init__(self, estado_http: HTTPStatus, mensaje: str = ""):
+        super().__init__(mensaje or estado_http.phrase)
+        self.estado_http = estado_http
+        self.mensaje = mensaje or estado_http.phrase
+
+
+def _respuesta(estado_http: HTTPStatus, cuerpo: bytes = b"", cabeceras: Optional[Dict[str, str]] = None) -> bytes:
+    lineas = [f"HTTP/1.1 {estado_http.value} {estado_http.phrase}", f"Content-Length: {len(cuerpo)}"]
+    lineas += [f"{k}: {v}" for k, v in (cabeceras or {}).items()]
+    return ("\r\n".join(lineas) + "\r\n\r\n").encode("latin-1") + cuerpo
+
+
+def _json(datos: Any) -> bytes:
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ServidorPartidas:
+    """Atiende las peticiones; las jugadas se ejecutan en un pool de hilos (el registro tiene un lock por partida)."""
+
+    def __init__(self, clave: Optional[str] = None, hilos: int = 8):
+        self.clave = clave
+        self.almacen = obtener_almacen()
+        self.estructura = gl.cargar_estructura_proyecto()
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="bivra-servidor")
+        self._conexiones: Set[asyncio.StreamWriter] = set()
+
+    # ------------------------------
+    # Partidas
+    # ------------------------------
+
+    def _partida(self, codigo: str) -> Dict[str, Any]:
+        estado = gl.cargar_partida(codigo)
+        if estado is None:
+            raise ErrorPeticion(HTTPStatus.NOT_FOUND, f"La partida {codigo} no existe.")
+        # Partida guardada con rutas (esquema antiguo): se pasa a IDs una vez
+        if estado.get("esquema") != gl.ESQUEMA:
+            estado, _, _ = gl.actualizar_partida(
+                codigo, lambda e: (gl.normalizar_estado(dict(e)), True, ""), con_deshacer=False
+            )
+        return estado
+
+    def atender(
+        self, metodo: str, ruta: str, cabeceras: Dict[str, str], cuerpo: bytes
+    ) -> Tuple[HTTPStatus, bytes, Dict[str, str]]:
+        """(estado HTTP, cuerpo, cabeceras) de una petición. Se ejecuta en el pool."""
+        if self.clave and not hmac.compare_digest(cabeceras.get("authorization", ""), f"Bearer {self.clave}"):
+            raise ErrorPeticion(HTTPStatus.UNAUTHORIZED)
+
+        partes = [unquote(p) for p in urlsplit(ruta).path.strip("/").split("/") if p]
+        tipo_json = {"Content-Type": "application/json"}
+
+        if metodo == "GET" and partes == ["salud"]:
+            return HTTPStatus.OK, _json({"ok": True}), tipo_json
+        if metodo == "GET" and partes == ["metricas"]:
+            texto = metricas.METRICAS.prometheus().encode("utf-8")
+            return HTTPStatus.OK, texto, {"Content-Type": "text/plain; version=0.0.4"}
+        if metodo == "GET" and partes == ["partidas"]:
+            return HTTPStatus.OK, _json({"codigos": self.almacen.codigos()}), tipo_json
+        if len(partes) not in (2, 3) or partes[0] != "partidas":
+            raise ErrorPeticion(HTTPStatus.NOT_FOUND)
+
+        codigo = normalizar_codigo(partes[1])
+        operacion = partes[2] if len(partes) == 3 else None
+
+        if metodo == "GET" and operacion is None:
+            estado = self._partida(codigo)
+            etag = f'"{estado.get("version", 0)}"'
+            if cabeceras.get("if-none-match") == etag:
+                return HTTPStatus.NOT_MODIFIED, b"", {"ETag": etag}
+            return HTTPStatus.OK, _json(estado), dict(tipo_json, ETag=etag)
+        if metodo == "GET" and operacion == "token":
+            token = self.almacen.token(codigo)
+            if token is None:
+                raise ErrorPeticion(HTTPStatus.NOT_FOUND, f"La partida {codigo} no existe.")
+            return HTTPStatus.OK, _json({"version": token}), tipo_json
+        if metodo != "POST" or operacion is None:
+            raise ErrorPeticion(HTTPStatus.NOT_FOUND)
+
+        try:
+            datos = json.loads(cuerpo) if cuerpo else {}
+        except ValueError:
+            raise ErrorPeticion(HTTPStatus.BAD_REQUEST, "El cuerpo no es JSON válido.")
+        if not isinstance(datos, dict):
+            raise ErrorPeticion(HTTPStatus.BAD_REQUEST, "El cuerpo tiene que ser un objeto JSON.")
+
+        if operacion == "crear":
+            gl.crear_partida_si_no_existe(codigo)
+            return HTTPStatus.OK, _json(self._partida(codigo)), tipo_json
+        if operacion == "unirse":
+            if str(datos.get("equipo", "1")) not in ("1", "2"):
+                raise ErrorPeticion(HTTPStatus.BAD_REQUEST, "El equipo tiene que ser 1 o 2.")
+            return HTTPStatus.OK, _json(self._partida(codigo)), tipo_json
+        if operacion not in _JUGADAS:
+            raise ErrorPeticion(HTTPStatus.NOT_FOUND)
+
+        try:
+            accion = de_peticion(operacion, datos)
+        except (KeyError, ValueError, TypeError) as e:
+            raise ErrorPeticion(HTTPStatus.BAD_REQUEST, f"Cuerpo no válido para {operacion}: {e}")
+        self._partida(codigo)
+        with metricas.tramo(f"servidor.{operacion}"):
+            res = Motor(codigo=codigo, estructura=self.estructura, crear=False).aplicar(accion)
+        respuesta = {"ok": res.ok, "msg": res.msg, "estado": res.estado, "eventos": res.eventos}
+        return HTTPStatus.OK, _json(respuesta), tipo_json
+
+    # ------------------------------
+    # HTTP/1.1 (keep-alive)
+    # ------------------------------
+
+    async def _conexion(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        self._conexiones.add(writer)
+        try:
+            while True:
+                try:
+                    linea = await asyncio.wait_for(reader.readline(), INACTIVIDAD_S)
+                except asyncio.TimeoutError:
+                    break
+                if not linea.strip():
+                    break
+                try:
+                    metodo, ruta, _version = linea.decode("latin-1").split()
+                except ValueError:
+                    writer.write(_respuesta(HTTPStatus.BAD_REQUEST, cabeceras={"Connection": "close"}))
+                    break
+
+                cabeceras: Dict[str, str] = {}
+                while True:
+                    linea = await reader.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+
+                largo = int(cabeceras.get("content-length") or 0)
+                if largo > MAX_CUERPO:
+                    writer.write(_respuesta(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, cabeceras={"Connection": "close"}))
+                    break
+                cuerpo = await reader.readexactly(largo) if largo else b""
+
+                try:
+                    estado_http, datos, extra = await loop.run_in_executor(
+                        self._pool, self.atender, metodo.upper(), ruta, cabeceras, cuerpo
+                    )
+                except ErrorPeticion as e:
+                    estado_http, datos = e.estado_http, _json({"error": e.mensaje})
+                    extra = {"Content-Type": "application/json"}
+                except Exception:
+                    log.exception("Error atendiendo %s %s", metodo, ruta)
+                    estado_http, datos = HTTPStatus.INTERNAL_SERVER_ERROR, _json({"error": "Error interno"})
+                    extra = {"Content-Type": "application/json"}
+                metricas.sumar(f"servidor.respuestas_{estado_http.value}")
+
+                cerrar = cabeceras.get("connection", "").lower() == "close"
+                if cerrar:
+                    extra = dict(extra, Connection="close")
+                writer.write(_respuesta(estado_http, datos, extra))
+                await writer.drain()
+                if cerrar:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._conexiones.discard(writer)
+            writer.close()
+
+    async def servir(self, host: str, puerto: int) -> None:
+        servidor = await asyncio.start_server(self._conexion, host, puerto)
+        direccion = servidor.sockets[0].getsockname()
+        print(f"Servidor de partidas en http://{direccion[0]}:{direccion[1]}", flush=True)
+
+        parar = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for senal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(senal, parar.set)
+            except (NotImplementedError, RuntimeError):  # Windows
+                pass
+        async with servidor:
+            await parar.wait()
+            # Las conexiones abiertas (keep-alive) se cierran; las jugadas en curso terminan en el pool
+            servidor.close()
+            for writer in list(self._conexiones):
+                writer.close()
+            await asyncio.sleep(0.1)
+        self._pool.shutdown(wait=True)
+        # Lo pendiente del registro se escribe antes de salir
+        cerrar = getattr(self.almacen, "cerrar", None)
+        if cerrar is not None:
+            cerrar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de partidas (JSON sobre HTTP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO, help="0 = uno libre cualquiera")
+    parser.add_argument("--hilos", type=int, default=8, help="Hilos que ejecutan las jugadas")
+    parser.add_argument("--clave", default=os.environ.get("BIVRA_SERVIDOR_CLAVE"), help="Clave compartida con los clientes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(ServidorPartidas(clave=args.clave, hilos=args.hilos).servir(args.host, args.puerto))
@@ -0,0 +1,199 @@
+# simulador.py
+"""
+Simulador Monte Carlo: juega muchas partidas con semilla y política voraz
+para ajustar mazos y recetas (relacionescartas.txt, relacionesentregables.txt,
+relacionesproyectos.txt) sin jugar a mano.
+
+Política de cada equipo en cada ronda (tras siguiente_ronda):
+  1. todas las fusiones posibles,
+  2. todos los entregables posibles,
+  3. el proyecto asignado si ya se puede (gana la partida).
+
+Las partidas se reparten en lotes entre procesos (ProcessPoolExecutor, uno
+por núcleo). Cada proceso devuelve solo contadores agregados, así que el
+coste de comunicación no crece con el número de partidas.
+
+    python simulador.py --partidas 100000
+    python simulador.py --partidas 1000000 --procesos 16 --json resultados.json
+
+Informa: distribución de rondas hasta ganar, agotamiento de la pila de robo
+(partidas que tuvieron que volver a barajar) y % de victorias por proyecto.
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Sin instrumentación (metricas.py): en partidas en bucle cuesta ~15% del tiempo
+os.environ.setdefault("BIVRA_METRICAS", "0")
+import game_logic as gl  # noqa: E402
+
+MAX_RONDAS = 500
+LOTE = 500
+
+# Estructura del juego (una vez por proceso)
+_ESTRUCTURA: Optional[Dict[str, Any]] = None
+
+
+def _iniciar_trabajador() -> None:
+    global _ESTRUCTURA
+    _ESTRUCTURA = gl.cargar_estructura_proyecto()
+
+
+def _turno(estado, equipo):
+    """Política voraz de un equipo. Devuelve el estado tras sus jugadas."""
+    for f in gl.fusiones_disponibles(estado["mazos"].get(equipo, [])):
+        estado, _ = gl.ejecutar_fusion(estado, equipo, f["paquete"])
+    for entregable_id in gl.entregables_disponibles(estado["proyectos"].get(equipo, [])):
+        estado, _ = gl.ejecutar_entregable(estado, equipo, entregable_id)
+
+    asignado = int(estado["proyectos_asignados"][equipo])
+    if asignado in gl.proyectos_disponibles(estado["entregables"].get(equipo, [])):
+        estado, _ = gl.ejecutar_proyecto(estado, equipo, asignado)
+    return estado
+
+
+def jugar_partida(semilla: int, estructura: Dict[str, Any], max_rondas: int = MAX_RONDAS) -> Dict[str, Any]:
+    """Una partida completa. Devuelve ronda final, ganador, proyectos y si se agotó la pila."""
+    estado = gl.inicializar_juego(semilla)
+    rebarajadas = 0
+    while estado["ronda"] < max_rondas:
+        estado, eventos = gl.siguiente_ronda(estado, estructura, None)
+        rebarajadas += sum(1 for ev in eventos if ev.startswith("Se vuelven a barajar"))
+        for equipo in ("1", "2"):
+            estado = _turno(estado, equipo)
+            if estado.get("finalizado"):
+                break
+        if estado.get("finalizado"):
+            break
+
+    return {
+        "rondas": estado["ronda"],
+        "ganador": estado.get("ganador"),
+        "asignados": dict(estado["proyectos_asignados"]),
+        "rebarajadas": rebarajadas,
+    }
+
+
+def _vacio() -> Dict[str, Any]:
+    return {
+        "partidas": 0,
+        "sin_ganador": 0,
+        "rondas": Counter(),
+        "con_rebarajado": 0,
+        "rebarajadas": 0,
+        "asignado": Counter(),       # proyecto -> veces asignado
+        "victorias": Counter(),      # proyecto -> victorias
+        "victorias_equipo": Counter(),
+    }
+
+
+def _sumar(total: Dict[str, Any], parcial: Dict[str, Any]) -> None:
+    for k, v in parcial.items():
+        total[k] = total[k] + v  # ints y Counters
+
+
+def simular_lote(semilla_inicial: int, n: int, max_rondas: int = MAX_RONDAS) -> Dict[str, Any]:
+    """Juega las partidas con semillas [semilla_inicial, semilla_inicial + n)."""
+    if _ESTRUCTURA is None:
+        _iniciar_trabajador()
+    res = _vacio()
+    for semilla in range(semilla_inicial, semilla_inicial + n):
+        p = jugar_partida(semilla, _ESTRUCTURA, max_rondas)
+        res["partidas"] += 1
+        res["rebarajadas"] += p["rebarajadas"]
+        res["con_rebarajado"] += int(p["rebarajadas"] > 0)
+        for proyecto in p["asignados"].values():
+            res["asignado"][int(proyecto)] += 1
+        if p["ganador"] is None:
+            res["sin_ganador"] += 1
+            continue
+        res["rondas"][p["rondas"]] += 1
+        res["victorias_equipo"][p["ganador"]] += 1
+        res["victorias"][int(p["asignados"][p["ganador"]])] += 1
+    return res
+
+
+def _percentil(hist: Counter, p: float) -> Optional[int]:
+    total = sum(hist.values())
+    if not total:
+        return None
+    objetivo = p * total
+    acumulado = 0
+    for valor in sorted(hist):
+        acumulado += hist[valor]
+        if acumulado >= objetivo:
+            return valor
+    return max(hist)
+
+
+def resumen(res: Dict[str, Any], segundos: float, procesos: int) -> Dict[str, Any]:
+    rondas: Counter = res["rondas"]
+    ganadas = sum(rondas.values())
+    return {
+        "partidas": res["partidas"],
+        "procesos": procesos,
+        "segundos": round(segundos, 2),
+        "partidas_por_s": round(res["partidas"] / segundos, 1) if segundos else None,
+        "sin_ganador": res["sin_ganador"],
+        "rondas_hasta_ganar": {
+            "media": round(sum(r * n for r, n in rondas.items()) / ganadas, 2) if ganadas else None,
+            "min": min(rondas) if rondas else None,
+            "p50": _percentil(rondas, 0.50),
+            "p90": _percentil(rondas, 0.90),
+            "p99": _percentil(rondas, 0.99),
+            "max": max(rondas) if rondas else None,
+            "histograma": {str(r): rondas[r] for r in sorted(rondas)},
+        },
+        "agotamiento_pila": {
+            "partidas_con_rebarajado_pct": round(100 * res["con_rebarajado"] / res["partidas"], 2),
+            "rebarajadas_por_partida": round(res["rebarajadas"] / res["partidas"], 3),
+        },
+        "victorias_por_proyecto_pct": {
+            str(p): round(100 * res["victorias"][p] / res["asignado"][p], 2)
+            for p in sorted(res["asignado"])
+        },
+        "victorias_por_equipo_pct": {
+            eq: round(100 * n / ganadas, 2) for eq, n in sorted(res["victorias_equipo"].items())
+        },
+    }
+
+
+def simular(partidas: int, semilla: int = 0, procesos: Optional[int] = None, lote: int = LOTE,
+            max_rondas: int = MAX_RONDAS) -> Dict[str, Any]:
+    procesos = procesos or os.cpu_count() or 1
+    lotes: List[tuple] = []
+    for inicio in range(0, partidas, lote):
+        lotes.append((semilla + inicio, min(lote, partidas - inicio), max_rondas))
+
+    total = _vacio()
+    t0 = time.perf_counter()
+    if procesos == 1:
+        for args in lotes:
+            _sumar(total, simular_lote(*args))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador) as pool:
+            for parcial in pool.map(simular_lote, *zip(*lotes)):
+                _sumar(total, parcial)
+    return resumen(total, time.perf_counter() - t0, procesos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulador Monte Carlo de partidas")
+    parser.add_argument("--partidas", type=int, default=10000)
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de la primera partida (las demás, consecutivas)")
+    parser.add_argument("--procesos", type=int, default=None, help="Por defecto, uno por núcleo")
+    parser.add_argument("--lote", type=int, default=LOTE, help="Partidas por tarea enviada a cada proceso")
+    parser.add_argument("--max-rondas", type=int, default=MAX_RONDAS)
+    parser.add_argument("--json", dest="salida_json", help="Escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    res = simular(args.partidas, args.semilla, args.procesos, args.lote, args.max_rondas)
+    res_sin_hist = {**res, "rondas_hasta_ganar": {k: v for k, v in res["rondas_hasta_ganar"].items() if k != "histograma"}}
+    print(json.dumps(res_sin_hist, indent=2, ensure_ascii=False))
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,255 @@
+# simulador_lotes.py
+"""
+Simulador por lotes con NumPy: avanza miles de partidas a la vez para
+barrer variantes de las reglas (cartas robadas por ronda, tamaño de las
+recetas) mucho más rápido que simulador.py, que juega partida a partida.
+
+Mismas reglas y misma política voraz que simulador.py:
+  - cada proyecto tiene su pila barajada (los equipos con el mismo proyecto
+    la comparten); si está vacía al robar se vuelve a barajar entera,
+  - cada equipo fusiona todo lo que puede, luego crea entregables y después
+    el proyecto asignado (gana; el equipo 1 juega antes que el 2).
+
+Representación (B partidas, A actividades, P proyectos):
+  pilas      (B, P, N)  permutación de las actividades de cada proyecto + puntero
+  manos      (B, 2, A)  bool, cartas de cada equipo
+  paquetes   (B, 2, Q)  bool;  entregables (B, 2, E) bool
+  recetas    matrices de incidencia (Q, A), (E, Q), (P', E)
+
+Una receta está completa si mano @ incidencia.T == tamaño de la receta. En
+el juego cada actividad está en un solo paquete y cada paquete en un solo
+entregable, así que todas las recetas completas se pueden aplicar a la vez.
+Quitar de la mano TODAS las copias de las cartas usadas (como Mazo.quitar)
+hace que una matriz booleana sea exacta aunque se repitan cartas.
+
+    python simulador_lotes.py --partidas 100000
+    python simulador_lotes.py --partidas 100000 --robo 3 4 5 6
+    python simulador_lotes.py --actividades-por-paquete 3 --json variante.json
+
+Necesita numpy (en requirements.txt).
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Solo hace falta para este simulador
+    np = None
+
+import game_logic as gl
+import simulador
+
+MAX_RONDAS = simulador.MAX_RONDAS
+LOTE = 20000
+
+
+class Reglas:
+    """Recetas y pilas del juego como matrices (una vez por variante de reglas)."""
+
+    def __init__(self, estructura: Dict[str, Any], paquetes: Dict[int, List[int]],
+                 entregables: Dict[int, Any], proyectos: Dict[int, List[int]]):
+        # Proyectos jugables: los que tienen cartas y receta (siguiente_ronda elige entre las claves de estructura)
+        self.proyectos = [int(p) for p in estructura]
+        acts_por_proyecto = [[gl.id_carta(a) for a in estructura[str(p)]["actividades"]] for p in self.proyectos]
+
+        ids_actividad = sorted({a for acts in acts_por_proyecto for a in acts}
+                               | {a for req in paquetes.values() for a in req})
+        self.col_actividad = {a: i for i, a in enumerate(ids_actividad)}
+        self.ids_paquete = list(paquetes)
+        self.ids_entregable = list(entregables)
+        col_paquete = {p: i for i, p in enumerate(self.ids_paquete)}
+        col_entregable = {e: i for i, e in enumerate(self.ids_entregable)}
+
+        A, Q, E, P = len(ids_actividad), len(self.ids_paquete), len(self.ids_entregable), len(self.proyectos)
+
+        self.R_paq = np.zeros((Q, A), dtype=np.float32)
+        for q, req in enumerate(paquetes.values()):
+            self.R_paq[q, [self.col_actividad[a] for a in req]] = 1
+        self.R_ent = np.zeros((E, Q), dtype=np.float32)
+        for e, req in enumerate(entregables.values()):
+            self.R_ent[e, [col_paquete[p] for p in req if p in col_paquete]] = 1
+        # Solo se comprueba el proyecto asignado: una fila por proyecto jugable
+        self.R_proy = np.zeros((P, E), dtype=np.float32)
+        for i, p in enumerate(self.proyectos):
+            self.R_proy[i, [col_entregable[e] for e in proyectos.get(p, []) if e in col_entregable]] = 1
+        self.tam_paq = self.R_paq.sum(axis=1)
+        self.tam_ent = self.R_ent.sum(axis=1)
+        self.tam_proy = self.R_proy.sum(axis=1)
+        # Paquetes vacíos (receta recortada a 0) o proyectos sin receta nunca se completan
+        self.tam_paq[self.tam_paq == 0] = np.inf
+        self.tam_ent[self.tam_ent == 0] = np.inf
+        self.tam_proy[self.tam_proy == 0] = np.inf
+
+        # Pila de cada proyecto: posiciones locales -> columna de actividad (relleno -1)
+        self.n_cartas = np.array([len(acts) for acts in acts_por_proyecto])
+        N = int(self.n_cartas.max())
+        self.cartas_proyecto = np.full((P, N), -1, dtype=np.int64)
+        for i, acts in enumerate(acts_por_proyecto):
+            self.cartas_proyecto[i, :len(acts)] = [self.col_actividad[a] for a in acts]
+
+    @property
+    def dimensiones(self):
+        return self.R_paq.shape[1], self.R_paq.shape[0], self.R_ent.shape[0], len(self.proyectos)
+
+
+def _barajar(rng, n_cartas: "np.ndarray", N: int) -> "np.ndarray":
+    """Una permutación de las posiciones 0..n-1 por cada n de `n_cartas` (relleno al final)."""
+    claves = rng.random((*n_cartas.shape, N))
+    claves[np.arange(N) >= n_cartas[..., None]] = 2.0
+    return np.argsort(claves, axis=-1)
+
+
+def simular_lote(reglas: Reglas, B: int, robo: int = 4, semilla: int = 0,
+                 max_rondas: int = MAX_RONDAS) -> Dict[str, Any]:
+    rng = np.random.default_rng(semilla)
+    A, Q, E, P = reglas.dimensiones
+    N = reglas.cartas_proyecto.shape[1]
+
+    asignado_total = rng.integers(0, P, size=(B, 2))
+    # Resultados por partida (índice original)
+    ronda = np.zeros(B, dtype=np.int64)
+    ganador = np.full(B, -1, dtype=np.int64)
+    rebarajadas_total = np.zeros(B, dtype=np.int64)
+
+    # Estado de las partidas que siguen en juego (se compacta al terminar partidas)
+    orig = np.arange(B)
+    asignado = asignado_total
+    pilas = _barajar(rng, np.broadcast_to(reglas.n_cartas, (B, P)), N)   # (B, P, N)
+    puntero = np.zeros((B, P), dtype=np.int64)
+    manos = np.zeros((B, 2, A), dtype=bool)
+    paquetes = np.zeros((B, 2, Q), dtype=bool)
+    entregables = np.zeros((B, 2, E), dtype=bool)
+    rebarajadas = np.zeros(B, dtype=np.int64)
+    desplaz = np.arange(robo)
+
+    for r in range(1, max_rondas + 1):
+        n = len(orig)
+        if n == 0:
+            break
+        filas = np.arange(n)
+        activa = np.ones(n, dtype=bool)
+        ronda[orig] = r
+
+        # --- siguiente_ronda: cada equipo roba de la pila de su proyecto (1 y luego 2) ---
+        for t in range(2):
+            p = asignado[:, t]
+            n_p = reglas.n_cartas[p]
+            vacia = puntero[filas, p] >= n_p
+            if vacia.any():
+                idx = np.flatnonzero(vacia)
+                pilas[idx, p[idx]] = _barajar(rng, n_p[idx], N)
+                puntero[idx, p[idx]] = 0
+                rebarajadas[idx] += 1
+
+            pos = puntero[filas, p][:, None] + desplaz[None, :]            # (n, robo)
+            valida = pos < n_p[:, None]
+            locales = np.take_along_axis(pilas[filas, p], np.minimum(pos, N - 1), axis=1)
+            cols = reglas.cartas_proyecto[p[:, None], locales]
+            b_idx, k_idx = np.nonzero(valida)
+            manos[b_idx, t, cols[b_idx, k_idx]] = True
+            puntero[filas, p] += valida.sum(axis=1)
+
+        # --- turnos: fusiones -> entregables -> proyecto asignado ---
+        for t in range(2):
+            completas = (manos[:, t].astype(np.float32) @ reglas.R_paq.T) >= reglas.tam_paq
+            completas &= activa[:, None]
+            paquetes[:, t] |= completas
+            manos[:, t] &= ~((completas.astype(np.float32) @ reglas.R_paq) > 0)
+
+            completos = (paquetes[:, t].astype(np.float32) @ reglas.R_ent.T) >= reglas.tam_ent
+            completos &= activa[:, None]
+            entregables[:, t] |= completos
+            paquetes[:, t] &= ~((completos.astype(np.float32) @ reglas.R_ent) > 0)
+
+            tiene = entregables[:, t].astype(np.float32) @ reglas.R_proy.T   # (n, P)
+            gana = activa & (tiene[filas, asignado[:, t]] >= reglas.tam_proy[asignado[:, t]])
+            ganador[orig[gana]] = t
+            activa &= ~gana
+
+        # Partidas terminadas: se guardan sus contadores y se sacan del lote
+        if not activa.all():
+            fin = ~activa
+            rebarajadas_total[orig[fin]] = rebarajadas[fin]
+            orig, asignado, pilas, puntero = orig[activa], asignado[activa], pilas[activa], puntero[activa]
+            manos, paquetes, entregables = manos[activa], paquetes[activa], entregables[activa]
+            rebarajadas = rebarajadas[activa]
+
+    rebarajadas_total[orig] = rebarajadas
+    asignado = asignado_total
+    rebarajadas = rebarajadas_total
+
+    res = simulador._vacio()
+    res["partidas"] = B
+    res["rebarajadas"] = int(rebarajadas.sum())
+    res["con_rebarajado"] = int((rebarajadas > 0).sum())
+    for i, p in enumerate(reglas.proyectos):
+        res["asignado"][p] = int((asignado == i).sum())
+    terminadas = ganador >= 0
+    res["sin_ganador"] = int((~terminadas).sum())
+    res["rondas"] = Counter({int(k): int(v) for k, v in zip(*np.unique(ronda[terminadas], return_counts=True))})
+    gan_proy = asignado[np.flatnonzero(terminadas), ganador[terminadas]]
+    for i, p in enumerate(reglas.proyectos):
+        n = int((gan_proy == i).sum())
+        if n:
+            res["victorias"][p] = n
+    for t in range(2):
+        n = int((ganador == t).sum())
+        if n:
+            res["victorias_equipo"][str(t + 1)] = n
+    return res
+
+
+def recortar_paquetes(paquetes: Dict[int, List[int]], k: int) -> Dict[int, List[int]]:
+    """Variante de reglas: cada paquete pide solo sus `k` primeras actividades."""
+    return {p: list(req)[:k] for p, req in paquetes.items()}
+
+
+def simular(partidas: int, robo: int = 4, semilla: int = 0, lote: int = LOTE,
+            max_rondas: int = MAX_RONDAS, paquetes: Optional[Dict[int, List[int]]] = None,
+            entregables: Optional[Dict[int, Any]] = None, proyectos: Optional[Dict[int, List[int]]] = None,
+            estructura: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    if np is None:
+        raise RuntimeError("Hace falta numpy para el simulador por lotes (pip install numpy)")
+    reglas = Reglas(
+        estructura or gl.cargar_estructura_proyecto(),
+        paquetes or gl.FUSIONES_PAQUETES,
+        entregables or gl.ENTREGABLES,
+        proyectos or gl.PROYECTOS,
+    )
+    total = simulador._vacio()
+    t0 = time.perf_counter()
+    for i, inicio in enumerate(range(0, partidas, lote)):
+        simulador._sumar(total, simular_lote(reglas, min(lote, partidas - inicio), robo, semilla + i, max_rondas))
+    res = simulador.resumen(total, time.perf_counter() - t0, 1)
+    res["robo"] = robo
+    return res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulador por lotes (NumPy) para barrer variantes de reglas")
+    parser.add_argument("--partidas", type=int, default=100000)
+    parser.add_argument("--robo", type=int, nargs="+", default=[4], help="Cartas robadas por ronda (una o varias)")
+    parser.add_argument("--actividades-por-paquete", type=int, default=None,
+                        help="Variante: cada paquete pide solo sus K primeras actividades")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--lote", type=int, default=LOTE, help="Partidas avanzadas a la vez")
+    parser.add_argument("--max-rondas", type=int, default=MAX_RONDAS)
+    parser.add_argument("--json", dest="salida_json", help="Escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    paquetes = None
+    if args.actividades_por_paquete is not None:
+        paquetes = recortar_paquetes(gl.FUSIONES_PAQUETES, args.actividades_por_paquete)
+
+    resultados = []
+    for robo in args.robo:
+        res = simular(args.partidas, robo, args.semilla, args.lote, args.max_rondas, paquetes=paquetes)
+        resultados.append(res)
+        corto = {k: v for k, v in res["rondas_hasta_ganar"].items() if k != "histograma"}
+        print(json.dumps({**res, "rondas_hasta_ganar": corto}, ensure_ascii=False))
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,17 @@
+# tests/conftest.py
+"""
+Entorno de los tests: la raíz del repo en sys.path y las partidas en una
+carpeta temporal (nunca en partidas/ del repo), sin métricas ni servidor.
+"""
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+os.environ["BIVRA_PARTIDAS_DIR"] = tempfile.mkdtemp(prefix="bivra_tests_")
+os.environ["BIVRA_METRICAS"] = "0"
+for variable in ("BIVRA_SERVIDOR", "BIVRA_REGISTRO", "BIVRA_SQLITE", "BIVRA_ALMACEN"):
+    os.environ.pop(variable, None)
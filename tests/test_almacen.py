@@ -0,0 +1,89 @@
+# tests/test_almacen.py
+import os
+import subprocess
+import sys
+import threading
+from multiprocessing import get_context
+
+import pytest
+
+import game_logic as gl
+from almacen import AlmacenJSON, PartidaDesactualizada
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _sumar_ronda(estado):
+    return dict(estado, ronda=estado["ronda"] + 1), True, ""
+
+
+def _sumar_en_proceso(directorio, veces):
+    almacen = AlmacenJSON(directorio)
+    for _ in range(veces):
+        while True:
+            estado = almacen.cargar("PROC")
+            try:
+                almacen.guardar("PROC", dict(estado, ronda=estado["ronda"] + 1))
+                break
+            except PartidaDesactualizada:
+                continue
+
+
+def _morir_con_el_lock(directorio):
+    with AlmacenJSON(directorio)._bloqueo("LOCK"):
+        os._exit(0)
+
+
+def test_version_desactualizada(tmp_path):
+    almacen = AlmacenJSON(tmp_path)
+    almacen.guardar("CAS", {"ronda": 0})
+    leido = almacen.cargar("CAS")
+    almacen.guardar("CAS", dict(leido, ronda=1))
+    with pytest.raises(PartidaDesactualizada):
+        almacen.guardar("CAS", dict(leido, ronda=2))
+    assert almacen.cargar("CAS") == {"ronda": 1, "version": 2}
+
+
+def test_actualizar_partida_reintenta_sobre_el_estado_nuevo():
+    gl.crear_partida_si_no_existe("HILOS")
+    inicial = gl.cargar_partida("HILOS")["ronda"]
+
+    def jugar():
+        for _ in range(25):
+            _, ok, _ = gl.actualizar_partida("HILOS", _sumar_ronda, intentos=1000, con_deshacer=False)
+            assert ok
+
+    hilos = [threading.Thread(target=jugar) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert gl.cargar_partida("HILOS")["ronda"] == inicial + 100
+
+
+def test_procesos_sin_jugadas_perdidas(tmp_path):
+    AlmacenJSON(tmp_path).guardar("PROC", {"ronda": 0})
+    ctx = get_context("fork")
+    procesos = [ctx.Process(target=_sumar_en_proceso, args=(str(tmp_path), 20)) for _ in range(4)]
+    for p in procesos:
+        p.start()
+    for p in procesos:
+        p.join(60)
+        assert p.exitcode == 0
+    assert AlmacenJSON(tmp_path).cargar("PROC")["ronda"] == 80
+
+
+def test_el_lock_se_suelta_si_el_proceso_muere(tmp_path):
+    p = get_context("fork").Process(target=_morir_con_el_lock, args=(str(tmp_path),))
+    p.start()
+    p.join(30)
+    # Con el lock de antes (archivo O_EXCL) la partida se quedaba bloqueada
+    assert AlmacenJSON(tmp_path).guardar("LOCK", {"ronda": 0}) == 1
+
+
+def test_relaciones_sin_depender_del_directorio_actual(tmp_path):
+    codigo = "import game_logic as gl; print(len(gl.PROYECTOS), len(gl.ENTREGABLES), len(gl.FUSIONES_PAQUETES))"
+    entorno = dict(os.environ, PYTHONPATH=RAIZ)
+    fuera = subprocess.run([sys.executable, "-c", codigo], cwd=tmp_path, env=entorno,
+                           capture_output=True, text=True, check=True)
+    assert fuera.stdout.split() == [str(len(gl.PROYECTOS)), str(len(gl.ENTREGABLES)), str(len(gl.FUSIONES_PAQUETES))]
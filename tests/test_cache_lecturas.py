@@ -0,0 +1,81 @@
+# tests/test_cache_lecturas.py
+import copy
+
+import pytest
+
+from almacen import AlmacenJSON, AlmacenSQLite, CacheLecturas
+
+
+class _Contado:
+    """Envuelve un almacén y cuenta las lecturas completas."""
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self.lecturas = 0
+
+    def __getattr__(self, nombre):
+        return getattr(self.almacen, nombre)
+
+    def cargar(self, codigo):
+        self.lecturas += 1
+        return self.almacen.cargar(codigo)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def crear(request, tmp_path):
+    """Crea almacenes sobre los mismos datos (como varios procesos)."""
+    if request.param == "json":
+        return lambda: AlmacenJSON(tmp_path)
+    return lambda: AlmacenSQLite(tmp_path / "partidas.db")
+
+
+def test_sin_cambios_no_se_relee(crear):
+    base = _Contado(crear())
+    base.guardar("CACHE", {"ronda": 0, "mazos": {"1": [1, 2]}})
+    cache = CacheLecturas(base)
+    primero = cache.cargar("CACHE")
+    assert cache.cargar("cache") is primero
+    assert base.lecturas == 1
+
+
+def test_se_invalida_cuando_otro_proceso_guarda(crear):
+    cache = CacheLecturas(crear())
+    cache.guardar("CACHE", {"ronda": 0})
+    viejo = cache.cargar("CACHE")
+
+    otro = crear()
+    otro.guardar("CACHE", dict(otro.cargar("CACHE"), ronda=1))
+    nuevo = cache.cargar("CACHE")
+    assert nuevo is not viejo
+    assert nuevo["ronda"] == 1
+
+
+def test_estado_de_solo_lectura(crear):
+    cache = CacheLecturas(crear())
+    cache.guardar("CACHE", {"ronda": 0, "mazos": {"1": [1]}})
+    estado = cache.cargar("CACHE")
+    with pytest.raises(TypeError):
+        estado["ronda"] = 5
+    with pytest.raises(TypeError):
+        estado["mazos"]["1"].append(2)
+    copia = copy.deepcopy(estado)
+    copia["mazos"]["1"].append(2)
+    assert cache.cargar("CACHE")["mazos"]["1"] == [1]
+
+
+def test_lru_acotado(crear):
+    base = _Contado(crear())
+    cache = CacheLecturas(base, maximo=2)
+    for codigo in ("A", "B", "C"):
+        base.guardar(codigo, {"ronda": 0})
+        cache.cargar(codigo)
+    assert list(cache._entradas) == ["B", "C"]
+    lecturas = base.lecturas
+    cache.cargar("A")
+    assert base.lecturas == lecturas + 1
+
+
+def test_partida_inexistente(crear):
+    cache = CacheLecturas(crear())
+    assert cache.cargar("NADA") is None
+    assert "NADA" not in cache._entradas
@@ -0,0 +1,47 @@
+# tests/test_catalogo.py
+from catalogo import IndiceCatalogo, indice_proyecto
+
+IDS = [1, 2, 7, 9, 10, 15, 70, 75, 79, 80, 100, 700, 799]
+
+
+def _indice():
+    return IndiceCatalogo("x", {cid: f"{cid}.jpg" for cid in IDS})
+
+
+def _todos(busqueda):
+    return busqueda.pagina(1, len(IDS))
+
+
+def test_sin_consulta_estan_todas():
+    busqueda = _indice().buscar("")
+    assert busqueda.total == len(IDS)
+    assert _todos(busqueda) == IDS
+
+
+def test_prefijo():
+    assert _todos(_indice().buscar("7")) == [7, 70, 75, 79, 700, 799]
+    assert _todos(_indice().buscar("10")) == [10, 100]
+    assert _todos(_indice().buscar("07")) == []
+
+
+def test_rango_y_consultas_no_validas():
+    assert _todos(_indice().buscar("9-70")) == [9, 10, 15, 70]
+    assert _todos(_indice().buscar("70-9")) == [9, 10, 15, 70]
+    assert _indice().buscar("abc").total == 0
+
+
+def test_paginas():
+    busqueda = _indice().buscar("7")
+    assert busqueda.paginas(4) == 2
+    assert busqueda.pagina(1, 4) == [7, 70, 75, 79]
+    assert busqueda.pagina(2, 4) == [700, 799]
+    assert busqueda.pagina(3, 4) == []
+    assert _indice().buscar("abc").paginas(4) == 1
+
+
+def test_indice_de_un_proyecto_real():
+    indice = indice_proyecto(3)
+    assert len(indice) > 0
+    assert indice is indice_proyecto("3")
+    primera = indice.ids[0]
+    assert indice.ruta(primera).endswith(f"{primera}.jpg")
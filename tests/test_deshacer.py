@@ -0,0 +1,82 @@
+# tests/test_deshacer.py
+import copy
+import json
+
+import deshacer
+import diario
+from almacen import AlmacenJSON
+
+
+def _jugar(estado, rondas, profundidad):
+    for _ in range(rondas):
+        nuevo = dict(estado, ronda=estado["ronda"] + 1, mazo=estado["mazo"] + [estado["ronda"]])
+        estado = deshacer.registrar(estado, nuevo, f"ronda {nuevo['ronda']}", profundidad)
+    return estado
+
+
+def test_deshacer_y_rehacer_una_jugada():
+    estado = _jugar({"ronda": 0, "mazo": []}, 1, 5)
+    atras, ok, msg = deshacer.deshacer(estado, 1, 5)
+    assert ok and msg == "Deshecho: ronda 1"
+    assert (atras["ronda"], atras["mazo"]) == (0, [])
+    adelante, ok, _ = deshacer.rehacer(atras, 1, 5)
+    assert ok
+    assert (adelante["ronda"], adelante["mazo"]) == (1, [0])
+
+
+def test_mas_alla_de_la_profundidad():
+    profundidad = 3
+    final = _jugar({"ronda": 0, "mazo": []}, 10, profundidad)
+    assert deshacer.linea_temporal(final) == (["ronda 8", "ronda 9", "ronda 10"], [])
+
+    atras, ok, _ = deshacer.deshacer(final, profundidad, profundidad)
+    assert ok
+    assert (atras["ronda"], atras["mazo"]) == (7, list(range(7)))
+    # Las jugadas anteriores a la pila ya no se pueden deshacer
+    _, ok, msg = deshacer.deshacer(atras, 1, profundidad)
+    assert not ok and "hay 0" in msg
+
+    adelante, ok, _ = deshacer.rehacer(atras, profundidad, profundidad)
+    assert ok
+    assert (adelante["ronda"], adelante["mazo"]) == (10, list(range(10)))
+
+
+def test_jugada_nueva_borra_lo_que_se_podia_rehacer():
+    estado = _jugar({"ronda": 0, "mazo": []}, 3, 5)
+    atras, _, _ = deshacer.deshacer(estado, 2, 5)
+    assert len(deshacer.linea_temporal(atras)[1]) == 2
+    nuevo = _jugar(atras, 1, 5)
+    assert deshacer.linea_temporal(nuevo) == (["ronda 1", "ronda 2"], [])
+
+
+def test_profundidad_cero_desactiva():
+    estado = _jugar({"ronda": 0, "mazo": []}, 2, 0)
+    assert deshacer.CLAVE not in estado
+    _, ok, _ = deshacer.deshacer(estado, 1, 0)
+    assert not ok
+
+
+def test_pila_llena_en_el_diario_solo_quita_y_anade():
+    antes = {"pila": [{"n": i} for i in range(20)]}
+    despues = {"pila": antes["pila"][1:] + [{"n": 20}]}
+    ops = diario.diferencia(antes, despues)
+    assert ops == [["q", ["pila"], 1], ["a", ["pila"], [{"n": 20}]]]
+    assert diario.aplicar(copy.deepcopy(antes), ops) == despues
+    assert deshacer._aplicar(antes, ops) == despues
+
+
+def test_registros_pequenos_con_la_pila_llena(tmp_path):
+    almacen = AlmacenJSON(tmp_path)
+    estado = {"ronda": 0, "mazo": []}
+    version = almacen.guardar("PILA", estado)
+    for _ in range(3 * deshacer.PROFUNDIDAD):
+        estado = dict(_jugar(estado, 1, deshacer.PROFUNDIDAD), version=version)
+        version = almacen.guardar("PILA", estado)
+        estado["version"] = version
+
+    ultimo = (tmp_path / "PILA.diario.jsonl").read_bytes().splitlines()[-1]
+    assert ["q", ["deshacer", "atras"], 1] in json.loads(ultimo)["ops"]
+    # Solo la jugada nueva, no las PROFUNDIDAD de la pila
+    assert len(ultimo) < 1024
+    diario._ULTIMO.clear()
+    assert almacen.cargar("PILA") == estado
@@ -0,0 +1,91 @@
+# tests/test_diario.py
+import copy
+import json
+
+import diario
+from almacen import AlmacenJSON
+
+
+def _ida_y_vuelta(antes, despues):
+    ops = diario.diferencia(antes, despues)
+    return ops, diario.aplicar(copy.deepcopy(antes), ops)
+
+
+def test_diferencia_y_aplicar_son_inversas():
+    antes = {"ronda": 1, "mazos": {"1": [1, 2, 3], "2": [4]}, "borrar": True, "pilas": {"a": [5, 6]}}
+    despues = {"ronda": 2, "mazos": {"1": [1, 2, 3, 7], "2": []}, "pilas": {"a": [9]}, "nueva": {"x": 1}}
+    ops, resultado = _ida_y_vuelta(antes, despues)
+    assert resultado == despues
+    assert ["a", ["mazos", "1"], [7]] in ops
+    assert ["t", ["mazos", "2"], 0] in ops
+    assert ["d", ["borrar"]] in ops
+
+
+def test_sin_cambios_no_hay_operaciones():
+    estado = {"mazos": {"1": [1, 2]}}
+    assert diario.diferencia(estado, copy.deepcopy(estado)) == []
+    assert diario.diferencia(estado, estado) == []
+
+
+def _partida(n):
+    return {"ronda": n, "mazos": {"1": list(range(n)), "2": [n]}, "historial": list(range(0, n, 2))}
+
+
+def test_guardar_y_cargar_reconstruye_el_estado(tmp_path):
+    almacen = AlmacenJSON(tmp_path)
+    version = almacen.guardar("DIARIO", _partida(0))
+    for n in range(1, 30):
+        version = almacen.guardar("DIARIO", dict(_partida(n), version=version))
+
+    # Sin la memoria del proceso: instantánea + diario desde disco
+    diario._ULTIMO.clear()
+    assert almacen.cargar("DIARIO") == dict(_partida(29), version=version)
+
+
+def test_cada_guardado_solo_anade_la_diferencia(tmp_path):
+    almacen = AlmacenJSON(tmp_path)
+    version = almacen.guardar("APPEND", _partida(0))
+    tam_instantanea = (tmp_path / "APPEND.json").stat().st_size
+    version = almacen.guardar("APPEND", dict(_partida(1), version=version))
+
+    assert (tmp_path / "APPEND.json").stat().st_size == tam_instantanea
+    lineas = (tmp_path / "APPEND.diario.jsonl").read_bytes().splitlines()
+    assert len(lineas) == 1
+    assert json.loads(lineas[0])["n"] == 1
+
+
+def test_compacta_cada_cierto_numero_de_registros(tmp_path):
+    almacen = AlmacenJSON(tmp_path)
+    version = almacen.guardar("COMPACTA", _partida(0))
+    for n in range(1, diario.COMPACTAR_CADA + 1):
+        version = almacen.guardar("COMPACTA", dict(_partida(n % 3), version=version))
+    assert (tmp_path / "COMPACTA.diario.jsonl").stat().st_size == 0
+    diario._ULTIMO.clear()
+    assert almacen.cargar("COMPACTA")["version"] == version
+
+
+def test_linea_cortada_se_ignora(tmp_path):
+    almacen = AlmacenJSON(tmp_path)
+    version = almacen.guardar("CORTE", {"ronda": 0})
+    almacen.guardar("CORTE", {"ronda": 1, "version": version})
+    with (tmp_path / "CORTE.diario.jsonl").open("ab") as f:
+        f.write(b'{"n":99,"ops":[["s",["ronda"],')
+    diario._ULTIMO.clear()
+    assert almacen.cargar("CORTE")["ronda"] == 1
+
+
+def test_memoria_de_partidas_acotada(tmp_path, monkeypatch):
+    monkeypatch.setattr(diario, "ULTIMO_MAX", 3)
+    diario._ULTIMO.clear()
+
+    def rutas(i):
+        return tmp_path / f"LRU{i}.json", tmp_path / f"LRU{i}.diario.jsonl"
+
+    for i in range(5):
+        diario.guardar(*rutas(i), _partida(i))
+    diario.leer_ultimo(*rutas(2))  # la más usada no se olvida
+    diario.guardar(*rutas(5), _partida(5))
+
+    assert list(diario._ULTIMO) == [str(rutas(i)[0]) for i in (4, 2, 5)]
+    # Lo olvidado se relee de disco
+    assert diario.leer_ultimo(*rutas(0)) == _partida(0)
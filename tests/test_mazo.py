@@ -0,0 +1,33 @@
+# tests/test_mazo.py
+from mazo import Mazo, id_carta, ids_de_mascara, mascara
+
+
+def test_id_carta():
+    assert id_carta(85) == 85
+    assert id_carta("85.jpg") == 85
+    assert id_carta("imagenes/Proyectos/3/Entregables/12.jpg") == 12
+    assert id_carta(None) is None
+
+
+def test_mascara_ida_y_vuelta():
+    assert ids_de_mascara(mascara([5, 1, 64, 5])) == [1, 5, 64]
+    assert mascara([]) == 0
+
+
+def test_contiene_y_quitar():
+    mazo = Mazo([3, 7, 7, "12.jpg"])
+    assert mazo.contiene(mascara([3, 12]))
+    assert not mazo.contiene(mascara([3, 4]))
+
+    quedan = mazo.quitar(mascara([7]))
+    assert quedan.a_json() == [3, "12.jpg"]
+    assert list(quedan.ids) == [3, 12]
+    assert quedan.mascara == mascara([3, 12])
+    # El original no cambia
+    assert mazo.a_json() == [3, 7, 7, "12.jpg"]
+
+
+def test_json_sin_cambios():
+    datos = [1, "2.jpg", 3]
+    assert Mazo.desde_json(datos).a_json() == datos
+    assert Mazo.desde_json(None).a_json() == []
@@ -0,0 +1,60 @@
+# tests/test_migracion.py
+import json
+import os
+
+import game_logic as gl
+from almacen import obtener_almacen
+
+RUTA = "imagenes/Proyectos/3/Entregables/Paquete trabajo/Actividades"
+
+
+def _antigua():
+    """Partida guardada con el esquema de rutas (sin semilla ni esquema)."""
+    return {
+        "ronda": 2,
+        "mazos": {"1": [f"{RUTA}/85.jpg", "86.jpg", 87], "2": []},
+        "proyectos": {"1": ["12.jpg", "12.jpg", "/x/13.jpg"]},
+        "entregables": {"1": ["9.jpg"], "2": []},
+        "proyectos_asignados": {"1": "3", "2": "3"},
+        "historial": [f"{RUTA}/85.jpg", "basura"],
+        "finalizado": False,
+    }
+
+
+def test_normalizar_pasa_rutas_a_ids():
+    estado = gl.normalizar_estado(_antigua())
+    assert estado["esquema"] == gl.ESQUEMA
+    assert estado["mazos"]["1"] == [85, 86, 87]
+    assert estado["proyectos"]["1"] == [12, 13]   # sin duplicados
+    assert estado["entregables"]["1"] == [9]
+    assert estado["historial"] == [85]
+    assert isinstance(estado["semilla"], int)
+    # Ya migrada: no cambia
+    assert gl.normalizar_estado(json.loads(json.dumps(estado))) == estado
+
+
+def test_migrar_partidas_guardadas():
+    almacen = obtener_almacen()
+    almacen.guardar("MIGRA1", _antigua())
+    almacen.guardar("MIGRA2", _antigua())
+    gl.crear_partida_si_no_existe("ACTUAL")
+
+    simuladas = gl.migrar_partidas(simular=True)
+    assert {"MIGRA1", "MIGRA2"} <= set(simuladas) and "ACTUAL" not in simuladas
+    assert "esquema" not in gl.cargar_partida("MIGRA1")
+
+    migradas = gl.migrar_partidas()
+    assert set(migradas) == set(simuladas)
+    estado = gl.cargar_partida("MIGRA1")
+    assert estado["esquema"] == gl.ESQUEMA
+    assert estado["mazos"]["1"] == [85, 86, 87]
+    assert estado["version"] == 2
+    assert gl.migrar_partidas() == []
+
+
+def test_rutas_solo_al_pintar():
+    estado = gl.normalizar_estado(_antigua())
+    ruta = gl.ruta_carta("entregable", estado["entregables"]["1"][0], 3)
+    assert ruta and os.path.exists(ruta)
+    assert gl.ruta_carta("proyecto", 3, None).endswith("3.jpg")
+    assert gl.ruta_carta("actividad", "basura", 3) is None
@@ -0,0 +1,60 @@
+# tests/test_motor.py
+import pytest
+
+import game_logic as gl
+import motor
+from motor import CrearEntregable, CrearProyecto, Fusionar, Motor, Reiniciar, SiguienteRonda
+
+
+def test_jugada_legal():
+    m = Motor(gl.inicializar_juego(1))
+    fusiones = []
+    for _ in range(40):
+        m.aplicar(SiguienteRonda())
+        fusiones = [a for a in m.acciones_validas("1") if isinstance(a, Fusionar)]
+        if fusiones:
+            break
+    assert fusiones
+    mazo_antes = list(m.estado["mazos"]["1"])
+    res = m.aplicar(fusiones[0])
+    assert res.ok, res.msg
+    assert res.estado["jugadas"][-1] == motor.a_jugada(fusiones[0])
+    assert len(res.estado["mazos"]["1"]) <= len(mazo_antes) - len(fusiones[0].actividades)
+    assert res.estado["proyectos"]["1"]
+
+
+@pytest.mark.parametrize("accion, zona", [
+    (Fusionar("1", (1, 2, 3)), "mazos"),
+    (CrearEntregable("1", (1, 2)), "proyectos"),
+    (CrearProyecto("1", tuple(gl.PROYECTOS[1])), "entregables"),
+])
+def test_rechaza_cartas_que_el_equipo_no_tiene(accion, zona):
+    m = Motor(gl.inicializar_juego(7))
+    antes = m.estado
+    res = m.aplicar(accion)
+    assert not res.ok
+    assert zona in res.msg
+    assert m.estado is antes
+    assert m.estado["jugadas"] == []
+
+
+def test_rechaza_equipo_inexistente():
+    m = Motor(gl.inicializar_juego(7))
+    res = m.aplicar(Fusionar("9", (1,)))
+    assert not res.ok and "no existe" in res.msg
+
+
+def test_no_se_juega_tras_finalizar():
+    estado = dict(gl.inicializar_juego(7), finalizado=True)
+    m = Motor(estado)
+    assert not m.aplicar(SiguienteRonda()).ok
+    assert m.aplicar(Reiniciar()).ok
+
+
+def test_partida_guardada():
+    m = Motor(codigo="MOTOR")
+    ronda = m.estado["ronda"]
+    res = m.aplicar(SiguienteRonda())
+    assert res.ok and res.eventos
+    assert Motor(codigo="motor", crear=False).estado["ronda"] == ronda + 1
+    assert not Motor(codigo="NOEXISTE", crear=False).aplicar(SiguienteRonda()).ok
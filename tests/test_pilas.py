@@ -0,0 +1,64 @@
+# tests/test_pilas.py
+import random
+
+import game_logic as gl
+from inmutable import congelar
+
+ACTIVIDADES = list(range(1, 11))
+ESTRUCTURA = {"1": {"actividades": ACTIVIDADES}, "2": {"actividades": [20, 21, 22]}}
+
+
+def _estado(asignados=None):
+    return dict(gl.inicializar_juego(7), proyectos_asignados=asignados or {"1": "1", "2": "2"})
+
+
+def test_una_vuelta_sin_repetir_cartas():
+    estado = _estado()
+    estado["pilas"] = {}
+    vistas = []
+    for _ in range(2):
+        robadas, rebarajado = gl.robar(estado, "1", ACTIVIDADES, n=4, rng=random.Random(1))
+        assert not rebarajado
+        vistas += robadas
+    robadas, _ = gl.robar(estado, "1", ACTIVIDADES, n=4, rng=random.Random(1))
+    # Quedaban 2: se roban esas y la siguiente vez se baraja
+    assert len(robadas) == 2
+    assert sorted(vistas + robadas) == ACTIVIDADES
+    _, rebarajado = gl.robar(estado, "1", ACTIVIDADES, n=4, rng=random.Random(1))
+    assert rebarajado
+
+
+def test_partida_antigua_sin_pila_excluye_el_historial():
+    estado = _estado()
+    estado["pilas"] = {}
+    estado["historial"] = [1, 2, 3]
+    robadas, _ = gl.robar(estado, "1", ACTIVIDADES, n=10, rng=random.Random(1))
+    assert sorted(robadas) == list(range(4, 11))
+
+
+def test_siguiente_ronda_roba_de_la_pila_sin_modificar_el_estado():
+    estado = congelar(_estado())
+    nuevo, eventos = gl.siguiente_ronda(estado, ESTRUCTURA, None)
+    assert estado["pilas"] == {} and estado["mazos"]["1"] == []
+    assert len(nuevo["mazos"]["1"]) == gl.CARTAS_POR_RONDA
+    assert len(nuevo["pilas"]["1"]) == len(ACTIVIDADES) - gl.CARTAS_POR_RONDA
+    assert set(nuevo["mazos"]["1"]).isdisjoint(nuevo["pilas"]["1"])
+    assert nuevo["mazos"]["2"] and len(nuevo["pilas"]["2"]) == 0
+    assert "Equipo 1 roba 4 cartas" in eventos
+
+
+def test_equipos_con_el_mismo_proyecto_comparten_pila():
+    estado = _estado({"1": "1", "2": "1"})
+    estado, _ = gl.siguiente_ronda(estado, ESTRUCTURA, None)
+    assert set(estado["mazos"]["1"]).isdisjoint(estado["mazos"]["2"])
+    assert len(estado["pilas"]["1"]) == len(ACTIVIDADES) - 2 * gl.CARTAS_POR_RONDA
+
+
+def test_historial_acotado(monkeypatch):
+    monkeypatch.setattr(gl, "HISTORIAL_MAX", 0)
+    estado, _ = gl.siguiente_ronda(dict(_estado(), historial=[1]), ESTRUCTURA, None)
+    assert "historial" not in estado
+
+    monkeypatch.setattr(gl, "HISTORIAL_MAX", 3)
+    estado, _ = gl.siguiente_ronda(_estado(), ESTRUCTURA, None)
+    assert len(estado["historial"]) == 3
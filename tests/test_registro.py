@@ -0,0 +1,100 @@
+# tests/test_registro.py
+import threading
+
+import pytest
+
+from almacen import AlmacenJSON, PartidaDesactualizada, RegistroPartidas
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    base = AlmacenJSON(tmp_path)
+    base.guardar("REG", {"ronda": 0})
+    return base
+
+
+def _registro(tmp_path, volcado_s):
+    # Un almacén propio por registro, como dos procesos sobre la misma carpeta
+    registro = RegistroPartidas(AlmacenJSON(tmp_path), volcado_s=volcado_s)
+    registro.cargar("REG")
+    return registro
+
+
+def _jugar(registro, ronda):
+    estado = registro.cargar("REG")
+    return registro.guardar("REG", dict(estado, ronda=ronda))
+
+
+def test_registro_escritura_diferida(tmp_path, almacen):
+    registro = _registro(tmp_path, 3600)
+    for ronda in range(1, 6):
+        _jugar(registro, ronda)
+    assert almacen.cargar("REG")["ronda"] == 0
+    assert registro.pendientes() == ["REG"]
+    assert registro.volcar_pendientes() == 1
+    assert almacen.cargar("REG")["ronda"] == 5
+    assert registro.pendientes() == []
+    registro.cerrar()
+
+
+def test_registro_conflicto_gana_el_almacen(tmp_path, almacen):
+    a = _registro(tmp_path, 3600)
+    b = _registro(tmp_path, 3600)
+    _jugar(a, 1)
+    _jugar(b, 10)
+
+    assert a.volcar_pendientes() == 1
+    # El volcado de B no pisa la jugada de A: se descarta y B relee
+    assert b.volcar_pendientes() == 0
+    assert almacen.cargar("REG")["ronda"] == 1
+    assert b.cargar("REG")["ronda"] == 1
+    assert b.pendientes() == []
+
+    # Y B sigue jugando sobre el estado bueno
+    _jugar(b, 2)
+    b.volcar_pendientes()
+    assert almacen.cargar("REG")["ronda"] == 2
+    a.cerrar()
+    b.cerrar()
+
+
+def test_registro_inmediato_detecta_otro_proceso(tmp_path, almacen):
+    registro = _registro(tmp_path, 0)
+    viejo = registro.cargar("REG")
+    almacen.guardar("REG", dict(almacen.cargar("REG"), ronda=7))
+
+    with pytest.raises(PartidaDesactualizada):
+        registro.guardar("REG", dict(viejo, ronda=1))
+    assert almacen.cargar("REG")["ronda"] == 7
+    assert registro.cargar("REG")["ronda"] == 7
+
+    _jugar(registro, 8)
+    assert almacen.cargar("REG")["ronda"] == 8
+    registro.cerrar()
+
+
+def test_sesiones_comparten_la_partida_en_memoria(tmp_path, almacen):
+    registro = _registro(tmp_path, 3600)
+
+    def sesion():
+        for _ in range(50):
+            while True:
+                estado = registro.cargar("REG")
+                try:
+                    registro.guardar("REG", dict(estado, ronda=estado["ronda"] + 1))
+                    break
+                except PartidaDesactualizada:
+                    continue
+
+    hilos = [threading.Thread(target=sesion) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert registro.cargar("REG")["ronda"] == 200
+    assert registro.token("REG") == 201
+    # 200 jugadas, una sola escritura
+    registro.cerrar()
+    assert almacen.cargar("REG")["ronda"] == 200
+    assert almacen.cargar("REG")["version"] == 201
+    assert len((tmp_path / "REG.diario.jsonl").read_bytes().splitlines()) == 1
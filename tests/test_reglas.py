@@ -0,0 +1,64 @@
+# tests/test_reglas.py
+import game_logic as gl
+from mazo import mascara
+from reglas import GrafoReglas
+
+
+def _grafo():
+    return GrafoReglas(
+        paquetes={10: [1, 2, 3], 11: [3, 4], 12: [2, 1, 3]},
+        entregables={20: [10, 11]},
+        proyectos={30: [20]},
+    )
+
+
+def test_receta_exacta():
+    grafo = _grafo()
+    assert grafo.receta_exacta("paquete", [3, 2, 1]) == 10  # 12 repite la receta: gana la primera
+    assert grafo.receta_exacta("paquete", {3, 4}) == 11
+    # Ni subconjuntos ni superconjuntos
+    assert grafo.receta_exacta("paquete", [1, 2]) is None
+    assert grafo.receta_exacta("paquete", [1, 2, 3, 4]) is None
+    assert grafo.receta_exacta("entregable", [11, 10]) == 20
+
+
+def test_disponibles_con_mascara():
+    grafo = _grafo()
+    assert grafo.disponibles("paquete", [1, 2, 3, 4, 9]) == [10, 11, 12]
+    assert grafo.disponibles("paquete", [3, 4]) == [11]
+    assert grafo.disponibles_mascara("paquete", mascara([1, 2])) == []
+    assert grafo.mascaras["entregable"][20] == mascara([10, 11])
+
+
+def test_mas_cercana():
+    grafo = _grafo()
+    assert grafo.mas_cercana("paquete", [1, 2, 9]) == (10, [3], [9])
+
+
+def test_agrupaciones_inversas():
+    agrupaciones = _grafo().agrupaciones()
+    assert agrupaciones["actividades_a_paquete"][3] == [10, 11, 12]
+    assert agrupaciones["paquetes_a_entregable"][11] == [20]
+    assert agrupaciones["entregables_a_proyecto"][20] == [30]
+
+
+def test_reglas_del_juego_coinciden_con_los_txt():
+    for paquete_id, actividades in gl.FUSIONES_PAQUETES.items():
+        encontrado = gl.REGLAS.receta_exacta("paquete", actividades)
+        assert set(gl.REGLAS.requisitos["paquete"][encontrado]) == set(actividades)
+    for proyecto_id, entregables in gl.PROYECTOS.items():
+        assert gl.REGLAS.requisitos["proyecto"][proyecto_id] == frozenset(entregables)
+
+
+def test_fusion_con_seleccion_exacta():
+    paquete_id, actividades = next(iter(gl.FUSIONES_PAQUETES.items()))
+    estado = gl.inicializar_juego(1)
+    estado["mazos"]["1"] = list(actividades) + [999]
+
+    nuevo, ok, msg = gl.ejecutar_fusion_con_seleccion(estado, "1", [f"{a}.jpg" for a in actividades])
+    assert ok, msg
+    assert paquete_id in nuevo["proyectos"]["1"]
+    assert nuevo["mazos"]["1"] == [999]
+
+    _, ok, msg = gl.ejecutar_fusion_con_seleccion(estado, "1", list(actividades)[:-1])
+    assert not ok and "Faltan" in msg
@@ -0,0 +1,65 @@
+# tests/test_reproduccion.py
+import random
+
+import game_logic as gl
+import motor
+from motor import CrearEntregable, CrearProyecto, Fusionar, Motor, Reiniciar, SiguienteRonda
+
+
+def _permutada(estructura, semilla):
+    """Misma estructura con proyectos y actividades en otro orden (otro disco, sin manifiesto...)."""
+    rng = random.Random(semilla)
+    proyectos = list(estructura)
+    rng.shuffle(proyectos)
+    permutada = {}
+    for pid in proyectos:
+        actividades = list(estructura[pid]["actividades"])
+        rng.shuffle(actividades)
+        permutada[pid] = {"actividades": actividades}
+    return permutada
+
+
+def _jugar(estructura, semilla=42, rondas=8):
+    m = Motor(gl.inicializar_juego(semilla), estructura=estructura)
+    for _ in range(rondas):
+        m.aplicar(SiguienteRonda())
+        for equipo in ("1", "2"):
+            for accion in m.acciones_validas(equipo)[1:2]:
+                m.aplicar(accion)
+    return m.estado
+
+
+def test_jugadas_ida_y_vuelta():
+    for accion in (SiguienteRonda(), Fusionar("1", (3, 4)), CrearEntregable("2", (5,)), CrearProyecto("1", (7, 8))):
+        assert motor.de_jugada(motor.a_jugada(accion)) == accion
+
+
+def test_misma_semilla_mismas_cartas():
+    estructura = gl.cargar_estructura_proyecto()
+    assert _jugar(estructura)["mazos"] == _jugar(estructura)["mazos"]
+
+
+def test_no_depende_del_orden_de_la_estructura():
+    estructura = gl.cargar_estructura_proyecto()
+    estado = _jugar(estructura)
+    for semilla in range(3):
+        permutada = _permutada(estructura, semilla)
+        assert _jugar(permutada)["mazos"] == estado["mazos"]
+        assert motor.verificar(estado, permutada) == (True, [])
+
+
+def test_verificar_partida_nueva_jugada_y_reiniciada():
+    m = Motor(gl.inicializar_juego(42))
+    assert motor.verificar(m.estado) == (True, [])
+    for _ in range(5):
+        m.aplicar(SiguienteRonda())
+    assert motor.verificar(m.estado) == (True, [])
+    m.aplicar(Reiniciar())
+    assert motor.verificar(m.estado) == (True, [])
+
+
+def test_verificar_detecta_cambios():
+    estado = _jugar(gl.cargar_estructura_proyecto(), rondas=3)
+    coincide, diferencias = motor.verificar(dict(estado, ronda=99))
+    assert not coincide
+    assert ["s", ["ronda"], 3] in diferencias
@@ -0,0 +1,135 @@
+# tests/test_servidor.py
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import cliente
+from motor import Fusionar, SiguienteRonda
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLAVE = "tests"
+
+
+@pytest.fixture(scope="module")
+def url(tmp_path_factory):
+    directorio = tmp_path_factory.mktemp("servidor")
+    entorno = dict(os.environ, BIVRA_PARTIDAS_DIR=str(directorio), BIVRA_SERVIDOR_CLAVE=CLAVE)
+    proceso = subprocess.Popen([sys.executable, os.path.join(RAIZ, "servidor.py"), "--puerto", "0"],
+                               cwd=RAIZ, env=entorno, stdout=subprocess.PIPE, text=True)
+    linea = proceso.stdout.readline()
+    assert "http://" in linea, linea
+    yield linea.strip().rsplit(" ", 1)[-1]
+    proceso.send_signal(signal.SIGTERM)
+    proceso.wait(timeout=30)
+
+
+def _get(url, ruta, cabeceras=None):
+    partes = url.split("//", 1)[1]
+    conn = http.client.HTTPConnection(partes, timeout=10)
+    conn.request("GET", ruta, headers=dict({"Authorization": f"Bearer {CLAVE}"}, **(cabeceras or {})))
+    resp = conn.getresponse()
+    cuerpo = resp.read()
+    conn.close()
+    return resp, cuerpo
+
+
+def test_jugadas_en_el_servidor(url):
+    remoto = cliente.ClientePartidas(url, clave=CLAVE)
+    estado = remoto.crear_si_no_existe("SRV")
+    res = remoto.aplicar("SRV", SiguienteRonda())
+    assert res.ok
+    assert res.estado["ronda"] == estado["ronda"] + 1
+    assert remoto.token("SRV") == res.estado["version"]
+    # Las reglas se comprueban en el servidor
+    malo = remoto.aplicar("SRV", Fusionar("1", (1, 2, 3)))
+    assert not malo.ok
+
+
+def test_etag_y_304(url):
+    remoto = cliente.ClientePartidas(url, clave=CLAVE)
+    remoto.crear_si_no_existe("ETAG")
+    primero = remoto.cargar("ETAG")
+    assert remoto.cargar("ETAG") is primero
+
+    resp, _ = _get(url, "/partidas/ETAG")
+    etag = resp.getheader("ETag")
+    assert etag == f'"{primero["version"]}"'
+    resp, cuerpo = _get(url, "/partidas/ETAG", {"If-None-Match": etag})
+    assert resp.status == 304 and cuerpo == b""
+
+    remoto.aplicar("ETAG", SiguienteRonda())
+    assert remoto.cargar("ETAG")["version"] == primero["version"] + 1
+
+
+def test_errores(url):
+    with pytest.raises(cliente.ErrorServidor) as error:
+        cliente.ClientePartidas(url, clave=None).token("SRV")
+    assert error.value.estado_http == 401
+    remoto = cliente.ClientePartidas(url, clave=CLAVE)
+    assert remoto.cargar("NOEXISTE") is None
+    assert not remoto.aplicar("NOEXISTE", SiguienteRonda()).ok
+    remoto.crear_si_no_existe("SRV")
+    with pytest.raises(cliente.ErrorServidor) as error:
+        remoto._pedir("POST", "/partidas/SRV/fusion", {"equipo": "1"})
+    assert error.value.estado_http == 400
+
+
+class _Cortador(BaseHTTPRequestHandler):
+    """Contesta {"version": 1} o, si se le pide, cierra la conexión sin contestar."""
+
+    protocol_version = "HTTP/1.1"
+    peticiones = []
+    cortar = 0
+
+    def _atender(self):
+        largo = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(largo)
+        type(self).peticiones.append(self.command)
+        if type(self).cortar:
+            type(self).cortar -= 1
+            self.close_connection = True
+            return
+        cuerpo = json.dumps({"version": 1}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    do_GET = do_POST = _atender
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cortador():
+    _Cortador.peticiones, _Cortador.cortar = [], 0
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Cortador)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield cliente.ClientePartidas(f"http://127.0.0.1:{servidor.server_address[1]}", clave=None)
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_get_se_repite_si_se_corta_la_conexion(cortador):
+    assert cortador.token("X") == 1
+    _Cortador.cortar = 1
+    assert cortador.token("X") == 1
+    assert _Cortador.peticiones == ["GET", "GET", "GET"]
+
+
+def test_post_no_se_repite(cortador):
+    assert cortador.token("X") == 1
+    _Cortador.cortar = 1
+    with pytest.raises((http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+        cortador._pedir("POST", "/partidas/X/siguiente_ronda", {})
+    assert _Cortador.peticiones == ["GET", "POST"]
@@ -0,0 +1,89 @@
+# tests/test_sqlite.py
+import sqlite3
+import threading
+
+import pytest
+
+import almacen
+from almacen import AlmacenSQLite, PartidaDesactualizada
+
+
+@pytest.fixture
+def db(tmp_path):
+    return AlmacenSQLite(tmp_path / "partidas.db")
+
+
+def test_guardar_y_cargar(db):
+    assert db.cargar("abc") is None
+    assert db.guardar("abc", {"ronda": 3}) == 1
+    assert db.cargar(" ABC ") == {"ronda": 3, "version": 1}
+    assert db.existe("Abc")
+    assert db.codigos() == ["ABC"]
+
+
+def test_version_desactualizada(db):
+    db.guardar("CAS", {"ronda": 0})
+    leido = db.cargar("CAS")
+    db.guardar("CAS", dict(leido, ronda=1))
+    with pytest.raises(PartidaDesactualizada) as error:
+        db.guardar("CAS", dict(leido, ronda=2))
+    assert (error.value.esperada, error.value.actual) == (1, 2)
+    assert db.cargar("CAS")["ronda"] == 1
+
+
+def test_token_cambia_con_cada_guardado(db):
+    assert db.token("TOK") is None
+    db.guardar("TOK", {"ronda": 0})
+    antes = db.token("TOK")
+    db.guardar("TOK", dict(db.cargar("TOK"), ronda=1))
+    assert db.token("TOK") != antes
+
+
+def test_crear_si_no_existe_no_pisa(db):
+    creado = db.crear_si_no_existe("NUEVA", lambda: {"ronda": 0})
+    assert creado["version"] == 1
+    db.guardar("NUEVA", dict(creado, ronda=5))
+    assert db.crear_si_no_existe("NUEVA", lambda: {"ronda": 0})["ronda"] == 5
+
+
+def test_hilos_sin_jugadas_perdidas(db):
+    db.guardar("HILOS", {"ronda": 0})
+
+    def jugar():
+        for _ in range(25):
+            while True:
+                estado = db.cargar("HILOS")
+                try:
+                    db.guardar("HILOS", dict(estado, ronda=estado["ronda"] + 1))
+                    break
+                except PartidaDesactualizada:
+                    continue
+
+    hilos = [threading.Thread(target=jugar) for _ in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert db.cargar("HILOS")["ronda"] == 100
+
+
+def test_tabla_antigua_sin_version(tmp_path):
+    ruta = tmp_path / "antigua.db"
+    conn = sqlite3.connect(str(ruta))
+    conn.execute("CREATE TABLE partidas (codigo TEXT PRIMARY KEY, estado TEXT NOT NULL, actualizado REAL NOT NULL)")
+    conn.execute("INSERT INTO partidas VALUES ('VIEJA', '{\"ronda\": 4}', 0)")
+    conn.commit()
+    conn.close()
+
+    db = AlmacenSQLite(ruta)
+    assert db.cargar("VIEJA") == {"ronda": 4}
+    assert db.guardar("VIEJA", {"ronda": 5, "version": 0}) == 1
+
+
+def test_crear_almacen_segun_entorno(tmp_path, monkeypatch):
+    monkeypatch.setenv("BIVRA_SQLITE", str(tmp_path / "otra.db"))
+    assert isinstance(almacen.crear_almacen("sqlite"), AlmacenSQLite)
+    monkeypatch.setenv("BIVRA_ALMACEN", "json")
+    assert isinstance(almacen.crear_almacen(), almacen.AlmacenJSON)
+    with pytest.raises(ValueError):
+        almacen.crear_almacen("redis")